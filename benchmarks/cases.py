@@ -0,0 +1,189 @@
+"""Benchmark cases for devopstemplate (see run.py)
+
+Every case is executed in a separate Python process:
+
+    python benchmarks/cases.py CASE WORKDIR
+
+The devopstemplate package is imported from PYTHONPATH (the sources or a
+synthetic copy of the package, see run.py). A case prints a JSON object with
+the wall time of the measured section, the peak RSS of the process and the
+number of read/write system calls (Linux, /proc/self/io) to stdout.
+
+Modules are imported inside the cases, i.e., import times are only measured
+by the CLI cases.
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+# Context for rendering the template (same for all cases)
+CONTEXT = {
+    "project_name": "benchproject",
+    "project_slug": "benchproject",
+    "project_version": "0.1.0",
+    "project_url": "https://example.com/benchproject",
+    "project_description": "Benchmark project",
+    "author_name": "Bench Mark",
+    "author_email": "bench.mark@example.com",
+}
+# Number of times the template Makefile is repeated (large Makefile cases)
+MAKEFILE_REPEAT = 500
+
+
+def io_syscalls() -> dict[str, int]:
+    """Obtain the number of read/write system calls of this process
+
+    Returns: Dictionary with the keys syscr and syscw, empty if not supported
+    """
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as handle:
+            io_dict = dict(line.split(": ") for line in handle.read().splitlines())
+    except OSError:
+        return {}
+    return {key: int(io_dict[key]) for key in ("syscr", "syscw")}
+
+
+def components() -> list[str]:
+    """Obtain all components of the template (template.json)"""
+    from devopstemplate import pack
+
+    return list(json.loads(pack.string("template.json")))
+
+
+def create(workdir: str) -> Callable[[], Any]:
+    """Create a project with all components"""
+    from devopstemplate.template import DevOpsTemplate
+
+    comp_list = components()
+
+    def run() -> None:
+        template = DevOpsTemplate(projectdirectory=os.path.join(workdir, "project"))
+        template.create(CONTEXT, comp_list)
+
+    return run
+
+
+def manage(workdir: str) -> Callable[[], Any]:
+    """Add all components to an existing (up to date) project"""
+    from devopstemplate.template import DevOpsTemplate
+
+    comp_list = components()
+    project_dname = os.path.join(workdir, "project")
+    DevOpsTemplate(projectdirectory=project_dname).create(CONTEXT, comp_list)
+
+    def run() -> None:
+        template = DevOpsTemplate(projectdirectory=project_dname)
+        template.manage(CONTEXT, comp_list)
+
+    return run
+
+
+def cookiecutter(workdir: str) -> Callable[[], Any]:
+    """Create a cookiecutter template with all components"""
+    from devopstemplate.template import DevOpsTemplate
+
+    comp_list = components()
+
+    def run() -> None:
+        template = DevOpsTemplate(
+            projectdirectory=os.path.join(workdir, "cookiecutter")
+        )
+        template.cookiecutter(CONTEXT, comp_list)
+
+    return run
+
+
+def makefile(workdir: str) -> Callable[[], Any]:
+    """Parse a large Makefile and generate a Makefile without some sections"""
+    # pylint: disable=unused-argument
+    # signature of benchmark cases
+    from devopstemplate import pkg
+    from devopstemplate.makefile import MakefileTemplate
+
+    with pkg.stream(os.path.join("template", "Makefile")) as handle:
+        content_list = handle.read().decode("utf-8").splitlines() * MAKEFILE_REPEAT
+
+    def run() -> None:
+        mk_section_list = MakefileTemplate.parse(content_list)
+        MakefileTemplate.generate(
+            mk_section_list, ["docker", "sonar"], {"PYTHON": "python3"}
+        )
+
+    return run
+
+
+def cli_version(workdir: str) -> Callable[[], Any]:
+    """Start the CLI (imports included) and print the version"""
+    return cli(workdir, ["--version"])
+
+
+def cli_create(workdir: str) -> Callable[[], Any]:
+    """Start the CLI (imports included) and create a project (dry run)"""
+    return cli(workdir, ["--dry-run", "create", os.path.join(workdir, "project")])
+
+
+def cli(workdir: str, argv: list[str]) -> Callable[[], Any]:
+    """Run main.main in this process (imports are part of the measurement)
+
+    Params:
+        workdir: String with the path to the working directory
+        argv: List of strings with command-line arguments
+    """
+    # No server is running for benchmarks
+    os.environ["DEVOPSTEMPLATE_SOCKET"] = os.path.join(workdir, "none.sock")
+
+    def run() -> None:
+        from devopstemplate.main import main
+
+        sys.argv = ["devopstemplate"] + argv
+        main()
+
+    return run
+
+
+CASES: dict[str, Callable[[str], Callable[[], Any]]] = {
+    "create": create,
+    "manage": manage,
+    "cookiecutter": cookiecutter,
+    "makefile": makefile,
+    "cli_version": cli_version,
+    "cli_create": cli_create,
+}
+
+
+def main() -> None:
+    """Run a benchmark case and print the measurements (JSON)"""
+    case_name, workdir = sys.argv[1:3]
+    # Log messages are not part of the measurements
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        stderr = sys.stderr
+        sys.stderr = devnull
+        try:
+            run = CASES[case_name](workdir)
+            io_start = io_syscalls()
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+            io_end = io_syscalls()
+        finally:
+            sys.stderr = stderr
+    result = {
+        "seconds": seconds,
+        # Kilobytes on Linux (bytes on macOS)
+        "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "read_syscalls": None,
+        "write_syscalls": None,
+    }
+    if io_start and io_end:
+        result["read_syscalls"] = io_end["syscr"] - io_start["syscr"]
+        result["write_syscalls"] = io_end["syscw"] - io_start["syscw"]
+    sys.stdout.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Benchmark suite for devopstemplate
+
+Measures wall time, peak RSS and system calls for creating, managing and
+generating cookiecutter templates with
+
+- the template of the distribution package (sources in src),
+- synthetic templates with many files (1k-50k) and with large single files,
+- parsing/generating a large Makefile,
+- CLI cold starts (including imports).
+
+Every run of a benchmark is executed in a new Python process with an empty
+user cache directory (cases.py). Synthetic templates are generated in a copy
+of the devopstemplate package. Results are written as JSON and can be
+compared with the results of another commit:
+
+    python benchmarks/run.py --output new.json --compare baseline.json
+
+The exit status is 1 if the median wall time of a benchmark has increased by
+more than the threshold (see --threshold).
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+BENCHMARK_DNAME = os.path.dirname(os.path.abspath(__file__))
+REPO_DNAME = os.path.dirname(BENCHMARK_DNAME)
+SRC_DNAME = os.path.join(REPO_DNAME, "src")
+CASES_FPATH = os.path.join(BENCHMARK_DNAME, "cases.py")
+# Numbers of files of synthetic templates
+SYNTHETIC_SIZES = (1000, 10000, 50000)
+# Number of files per directory of synthetic templates
+SYNTHETIC_DIR_SIZE = 100
+# Sizes (bytes) of the rendered and of the static file of the large template
+LARGE_RENDERED_SIZE = 8 * 1024 * 1024
+LARGE_STATIC_SIZE = 64 * 1024 * 1024
+
+
+def synthetic_files(count: int) -> dict[str, bytes]:
+    """Generate template files (three rendered files for every static file)
+
+    Params:
+        count: Integer with the number of files
+    Returns: Dictionary mapping template file paths to contents
+    """
+    file_dict: dict[str, bytes] = {}
+    for index in range(count):
+        fpath = f"dir{index // SYNTHETIC_DIR_SIZE:04d}/file{index:05d}.txt"
+        if index % 4 == 3:
+            line = f"static line of file {index}\n"
+        else:
+            line = f"{{{{project_name}}}} line of file {index}\n"
+        file_dict[fpath] = (line * (1024 // len(line))).encode("utf-8")
+    return file_dict
+
+
+def large_files() -> dict[str, bytes]:
+    """Generate a large rendered template file and a large static file
+
+    Returns: Dictionary mapping template file paths to contents
+    """
+    rendered_line = "{{project_name}}: " + "x" * 62 + "\n"
+    static_line = "static: " + "x" * 71 + "\n"
+    return {
+        "large/rendered.txt": (
+            rendered_line * (LARGE_RENDERED_SIZE // len(rendered_line))
+        ).encode("utf-8"),
+        "large/static.txt": (
+            static_line * (LARGE_STATIC_SIZE // len(static_line))
+        ).encode("utf-8"),
+    }
+
+
+def synthetic_package(root_dname: str, file_dict: dict[str, bytes]) -> str:
+    """Copy the devopstemplate package and replace its template
+
+    The template contains a single component "bench" with all files.
+
+    Params:
+        root_dname: String with the path to the directory for the package
+        file_dict: Dictionary mapping template file paths to contents
+    Returns: String with the import path (PYTHONPATH) of the package
+    """
+    pkg_dname = os.path.join(root_dname, "devopstemplate")
+    shutil.copytree(
+        os.path.join(SRC_DNAME, "devopstemplate"),
+        pkg_dname,
+        ignore=shutil.ignore_patterns("template", "template.pack", "__pycache__"),
+    )
+    for fpath, data in file_dict.items():
+        template_fpath = os.path.join(pkg_dname, "template", fpath)
+        os.makedirs(os.path.dirname(template_fpath), exist_ok=True)
+        with open(template_fpath, "wb") as handle:
+            handle.write(data)
+    for fname, definition in (
+        ("template.json", {"bench": sorted(file_dict)}),
+        ("dependencies.json", {}),
+    ):
+        with open(os.path.join(pkg_dname, fname), "w", encoding="utf-8") as handle:
+            json.dump(definition, handle)
+    return root_dname
+
+
+def benchmarks(sizes: list[int]) -> list[tuple[str, str, str]]:
+    """Define the benchmarks
+
+    Params:
+        sizes: List of integers with the numbers of files of synthetic
+            templates
+    Returns: List of (benchmark name, case name, package) tuples. The package
+        is "src" for the sources or the name of a synthetic template.
+    """
+    benchmark_list = [
+        ("create", "create", "src"),
+        ("manage", "manage", "src"),
+        ("cookiecutter", "cookiecutter", "src"),
+        ("makefile", "makefile", "src"),
+        ("cli_version", "cli_version", "src"),
+        ("cli_create", "cli_create", "src"),
+    ]
+    for size in sizes:
+        for case_name in ("create", "manage", "cookiecutter"):
+            benchmark_list.append(
+                (f"{case_name}_files{size}", case_name, f"files{size}")
+            )
+    for case_name in ("create", "manage"):
+        benchmark_list.append((f"{case_name}_large", case_name, "large"))
+    return benchmark_list
+
+
+def run_case(case_name: str, python_path: str, strace: bool = False) -> dict[str, Any]:
+    """Run a benchmark case in a new process with an empty cache
+
+    Params:
+        case_name: String with the name of the case (see cases.CASES)
+        python_path: String with the import path of the package
+        strace: Boolean specifying whether to count all system calls with
+            strace (timings are not representative then)
+    Returns: Dictionary with the measurements (see cases.main) and the wall
+        time of the process (process_seconds)
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = python_path
+        env["XDG_CACHE_HOME"] = os.path.join(workdir, "cache")
+        cmd = [sys.executable, CASES_FPATH, case_name, workdir]
+        strace_fpath = os.path.join(workdir, "strace.txt")
+        if strace:
+            cmd = ["strace", "-f", "-c", "-o", strace_fpath] + cmd
+        start = time.perf_counter()
+        output = subprocess.run(
+            cmd, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        process_seconds = time.perf_counter() - start
+        result: dict[str, Any] = json.loads(output.splitlines()[-1])
+        result["process_seconds"] = process_seconds
+        if strace:
+            result["syscalls"] = strace_total(strace_fpath)
+    return result
+
+
+def strace_total(fpath: str) -> int | None:
+    """Obtain the total number of system calls from a strace summary (-c)
+
+    Returns: Integer with the number of calls, None if not found
+    """
+    with open(fpath, "r", encoding="utf-8") as handle:
+        for line in handle:
+            fields = line.split()
+            if fields and fields[-1] == "total":
+                return int(fields[3])
+    return None
+
+
+def summarize(run_list: list[dict[str, Any]]) -> dict[str, Any]:
+    """Combine the measurements of several runs of a benchmark
+
+    Returns: Dictionary with minimum/median wall times, maximum peak RSS and
+        median numbers of system calls
+    """
+
+    def median(key: str) -> float | None:
+        value_list = [run[key] for run in run_list if run.get(key) is not None]
+        return statistics.median(value_list) if value_list else None
+
+    return {
+        "seconds_min": min(run["seconds"] for run in run_list),
+        "seconds_median": median("seconds"),
+        "process_seconds_median": median("process_seconds"),
+        "maxrss": max(run["maxrss"] for run in run_list),
+        "read_syscalls": median("read_syscalls"),
+        "write_syscalls": median("write_syscalls"),
+        "syscalls": median("syscalls"),
+        "runs": run_list,
+    }
+
+
+def commit() -> str | None:
+    """Obtain the commit of the repository (None if not available)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DNAME,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    result_dict: dict[str, Any], baseline_dict: dict[str, Any], threshold: float
+) -> list[str]:
+    """Compare median wall times with a baseline and print the ratios
+
+    Params:
+        result_dict: Dictionary with benchmark results (see main)
+        baseline_dict: Dictionary with baseline results (see main)
+        threshold: Float with the relative increase that is a regression
+    Returns: List of strings with the names of regressed benchmarks
+    """
+    regression_list = []
+    print(f"\nBaseline: {baseline_dict.get('commit')}")
+    print(f"{'benchmark':<28}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, summary in result_dict["benchmarks"].items():
+        base_summary = baseline_dict.get("benchmarks", {}).get(name)
+        if base_summary is None:
+            continue
+        base_seconds = base_summary["seconds_median"]
+        seconds = summary["seconds_median"]
+        ratio = seconds / base_seconds if base_seconds else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regression_list.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28}{base_seconds:>12.4f}{seconds:>12.4f}{ratio:>8.2f}{flag}")
+    return regression_list
+
+
+def main() -> None:
+    """Run the benchmark suite (command-line interface)"""
+    parser = argparse.ArgumentParser(description="Benchmark devopstemplate")
+    parser.add_argument(
+        "-k",
+        "--filter",
+        action="append",
+        default=None,
+        help="Only run benchmarks matching the pattern (fnmatch, repeatable)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(SYNTHETIC_SIZES),
+        help="Numbers of files of synthetic templates, default: %(default)s",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of runs per benchmark, default: %(default)s",
+    )
+    parser.add_argument(
+        "--strace",
+        action="store_true",
+        help="Count all system calls with strace (additional run)",
+    )
+    parser.add_argument("--output", default=None, help="Write results (JSON)")
+    parser.add_argument(
+        "--compare", default=None, help="Compare with baseline results (JSON)"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative increase of wall time that is a regression, default: %(default)s",
+    )
+    args = parser.parse_args()
+    benchmark_list = [
+        benchmark
+        for benchmark in benchmarks(args.sizes)
+        if args.filter is None
+        or any(fnmatch.fnmatch(benchmark[0], pattern) for pattern in args.filter)
+    ]
+    if args.strace and shutil.which("strace") is None:
+        parser.error("strace is not available")
+    result_dict: dict[str, Any] = {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    print(
+        f"{'benchmark':<28}{'median s':>10}{'min s':>10}{'process s':>11}"
+        f"{'maxrss':>10}{'reads':>9}{'writes':>9}"
+    )
+    with tempfile.TemporaryDirectory() as package_root:
+        path_dict = {"src": SRC_DNAME}
+        for name, case_name, package in benchmark_list:
+            if package not in path_dict:
+                if package == "large":
+                    file_dict = large_files()
+                else:
+                    file_dict = synthetic_files(int(package.removeprefix("files")))
+                path_dict[package] = synthetic_package(
+                    os.path.join(package_root, package), file_dict
+                )
+            run_list = [
+                run_case(case_name, path_dict[package]) for _ in range(args.repeat)
+            ]
+            if args.strace:
+                syscalls = run_case(case_name, path_dict[package], strace=True)
+                run_list[0]["syscalls"] = syscalls["syscalls"]
+            summary = summarize(run_list)
+            result_dict["benchmarks"][name] = summary
+            print(
+                f"{name:<28}{summary['seconds_median']:>10.4f}"
+                f"{summary['seconds_min']:>10.4f}"
+                f"{summary['process_seconds_median']:>11.4f}"
+                f"{summary['maxrss']:>10}{summary['read_syscalls'] or '-':>9}"
+                f"{summary['write_syscalls'] or '-':>9}",
+                flush=True,
+            )
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(result_dict, handle, indent=2)
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline_dict = json.load(handle)
+        if compare(result_dict, baseline_dict, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
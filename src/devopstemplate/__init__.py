@@ -1,10 +1,19 @@
 """Initializations on Python package level
 
 - Define package version
-- Initialize Python logging framework
+- Record the start of the import (see profiling module)
+- Initialize Python logging framework on first access of LOGCONFIG (importing
+  the package does not configure logging)
 """
 
-from devopstemplate.log import LoggerConfig
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from devopstemplate.log import LoggerConfig
+
+# Start of the package import (see profiling module)
+IMPORT_START = time.perf_counter()
 
 # Version can be parsed from setup.py or managed globally,
 # e.g., with bumpversion
@@ -13,4 +22,19 @@ __version__ = "0.10.0.dev0"
 
 # Global module variable that stores a singleton of the LoggerConfig
 # Can be used globally in order to adjust log behavior.
-LOGCONFIG = LoggerConfig()
+LOGCONFIG: "LoggerConfig"
+
+
+def __getattr__(name: str) -> "LoggerConfig":
+    """Create the LoggerConfig singleton on first access (module attribute
+    LOGCONFIG)
+    """
+    # pylint: disable=import-outside-toplevel
+    # logging is configured when it is used
+    if name != "LOGCONFIG":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from devopstemplate.log import LoggerConfig
+
+    logconfig = LoggerConfig()
+    globals()["LOGCONFIG"] = logconfig
+    return logconfig
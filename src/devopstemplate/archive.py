@@ -0,0 +1,192 @@
+"""Write projects generated from the DevOps template to archives
+
+- archives are written as streams (also to stdout), no intermediate files
+  are written to disk
+- zip archives: files are compressed chunk by chunk while they are rendered
+- tar archives: the size of a file has to be known before its data, every file
+  is rendered into memory first (memory is bounded by the largest file)
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+from types import TracebackType
+from typing import IO, Self
+
+ARCHIVE_STDOUT = "-"
+ARCHIVE_FORMAT_TAR = "tar"
+ARCHIVE_FORMAT_TAR_GZ = "tar.gz"
+ARCHIVE_FORMAT_TAR_BZ2 = "tar.bz2"
+ARCHIVE_FORMAT_TAR_XZ = "tar.xz"
+ARCHIVE_FORMAT_ZIP = "zip"
+# Maps archive formats to file name suffixes
+ARCHIVE_SUFFIX_DICT = {
+    ARCHIVE_FORMAT_TAR: (".tar",),
+    ARCHIVE_FORMAT_TAR_GZ: (".tar.gz", ".tgz"),
+    ARCHIVE_FORMAT_TAR_BZ2: (".tar.bz2", ".tbz2"),
+    ARCHIVE_FORMAT_TAR_XZ: (".tar.xz", ".txz"),
+    ARCHIVE_FORMAT_ZIP: (".zip",),
+}
+ARCHIVE_FORMATS = list(ARCHIVE_SUFFIX_DICT)
+
+
+def archive_format(archive_fpath: str) -> str:
+    """Determine the archive format from the file name of the archive
+
+    Params:
+        archive_fpath: String with the path to the archive file
+    Returns: String with the archive format (see ARCHIVE_FORMATS)
+    Raises:
+        ValueError: if the suffix of the file name is not supported
+    """
+    for fmt, suffix_tuple in ARCHIVE_SUFFIX_DICT.items():
+        if archive_fpath.lower().endswith(suffix_tuple):
+            return fmt
+    raise ValueError(
+        f"Unknown archive format for '{archive_fpath}'"
+        f" (supported: {', '.join(ARCHIVE_FORMATS)})"
+    )
+
+
+class ArchiveWriter:
+    """Base class for writing files to an archive stream
+
+    Writers are context managers, the archive is finalized when the context
+    is left. The file object is not closed.
+    """
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        """Params:
+        fileobj: Binary file object the archive is written to (does not
+            have to be seekable)
+        """
+        self._fileobj = fileobj
+
+    def write(self, arcname: str, chunks: Iterable[bytes]) -> None:
+        """Write a file to the archive
+
+        Params:
+            arcname: String with the path of the file in the archive
+            chunks: Iterable of bytes with the content of the file
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finalize the archive"""
+        raise NotImplementedError
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class TarArchiveWriter(ArchiveWriter):
+    """Write files to a (compressed) tar stream"""
+
+    def __init__(self, fileobj: IO[bytes], compression: str = "") -> None:
+        """Params:
+        fileobj: Binary file object the archive is written to
+        compression: String with the compression ("", "gz", "bz2", "xz")
+        """
+        super().__init__(fileobj)
+        # Stream mode "w|..." does not require a seekable file object
+        # (mode is not a literal, see typeshed overloads)
+        self.__tar = tarfile.open(  # type: ignore[call-overload]
+            fileobj=fileobj, mode=f"w|{compression}"
+        )
+
+    def write(self, arcname: str, chunks: Iterable[bytes]) -> None:
+        buffer = io.BytesIO()
+        for chunk in chunks:
+            buffer.write(chunk)
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = buffer.tell()
+        tarinfo.mtime = int(time.time())
+        tarinfo.mode = 0o644
+        buffer.seek(0)
+        self.__tar.addfile(tarinfo, buffer)
+
+    def close(self) -> None:
+        self.__tar.close()
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    """Write files to a zip stream (deflate compression)"""
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        super().__init__(fileobj)
+        self.__zip = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, arcname: str, chunks: Iterable[bytes]) -> None:
+        zipinfo = zipfile.ZipInfo(arcname, time.localtime()[:6])
+        zipinfo.compress_type = zipfile.ZIP_DEFLATED
+        zipinfo.external_attr = 0o644 << 16
+        # force_zip64: the size of the file is not known in advance
+        with self.__zip.open(zipinfo, "w", force_zip64=True) as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+
+    def close(self) -> None:
+        self.__zip.close()
+
+
+def archive_writer(fileobj: IO[bytes], fmt: str) -> ArchiveWriter:
+    """Create an archive writer for the given format
+
+    Params:
+        fileobj: Binary file object the archive is written to
+        fmt: String with the archive format (see ARCHIVE_FORMATS)
+    Returns: ArchiveWriter object
+    Raises:
+        ValueError: if the format is not supported
+    """
+    if fmt == ARCHIVE_FORMAT_ZIP:
+        return ZipArchiveWriter(fileobj)
+    if fmt in ARCHIVE_SUFFIX_DICT:
+        compression = fmt.split(".")[1] if "." in fmt else ""
+        return TarArchiveWriter(fileobj, compression)
+    raise ValueError(f"Unknown archive format '{fmt}'")
+
+
+@contextlib.contextmanager
+def open_archive(archive_fpath: str, fmt: str | None = None) -> Iterator[ArchiveWriter]:
+    """Open an archive file (or stdout) for writing
+
+    Params:
+        archive_fpath: String with the path to the archive file, "-" for
+            stdout
+        fmt: String with the archive format (see ARCHIVE_FORMATS), default:
+            determined from the file name (tar.gz for stdout)
+    Returns: Context manager providing an ArchiveWriter object. Incomplete
+        archive files are removed if an error occurs.
+    """
+    if fmt is None:
+        if archive_fpath == ARCHIVE_STDOUT:
+            fmt = ARCHIVE_FORMAT_TAR_GZ
+        else:
+            fmt = archive_format(archive_fpath)
+    if archive_fpath == ARCHIVE_STDOUT:
+        with archive_writer(sys.stdout.buffer, fmt) as writer:
+            yield writer
+        sys.stdout.buffer.flush()
+        return
+    try:
+        with open(archive_fpath, "wb") as handle:
+            with archive_writer(handle, fmt) as writer:
+                yield writer
+    except BaseException:
+        if os.path.exists(archive_fpath):
+            os.remove(archive_fpath)
+        raise
@@ -0,0 +1,334 @@
+"""Generate many projects from the DevOps template in a single process
+
+- projects are defined by ProjectSpec objects (project directory, context,
+  components)
+- template definitions and compiled templates are loaded once and shared by
+  all projects
+- results report errors and timing per project
+- JSON lines with parameters for the create command can be processed with a
+  pool of worker processes
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import Any, TypeVar
+
+from devopstemplate.config import (
+    ARGUMENTS_INTERACTIVE_KEY,
+    ARGUMENTS_PROJECT_DIR_KEY,
+    COMMANDS_COMPONENTS_KEY,
+    COMMANDS_COOKIECUTTER_KEY,
+    COMMANDS_CREATE_KEY,
+    COMMANDS_MANAGE_KEY,
+    COMMANDS_PARAMETERS_DEFAULT_KEY,
+    COMMANDS_PARAMETERS_KEY,
+    COMMANDS_PARAMETERS_NAME_KEY,
+    CommandsConfig,
+    ProjectConfig,
+)
+from devopstemplate.template import DevOpsTemplate
+
+# Defaults for top-level command-line options (see main.parse_args)
+OPTION_DEFAULTS: dict[str, Any] = {
+    "overwrite_exists": False,
+    "skip_exists": False,
+    "dry_run": False,
+    "workers": 1,
+    "no_cache": False,
+    "archive": None,
+    "archive_format": None,
+    "link_static": None,
+}
+
+R = TypeVar("R")
+
+
+class ProjectSpec:
+    """Defines a project that will be generated from the DevOps template
+
+    Attributes:
+        project_dir: String with the path to the project directory.
+        context: Dictionary with the context for rendering Jinja2 templates.
+        components: List of template components that should be installed.
+        command: String specifying the template action (create, manage,
+            cookiecutter).
+    """
+
+    def __init__(
+        self,
+        project_dir: str,
+        context: dict[str, Any],
+        components: list[str],
+        command: str = COMMANDS_CREATE_KEY,
+    ) -> None:
+        if command not in (
+            COMMANDS_CREATE_KEY,
+            COMMANDS_MANAGE_KEY,
+            COMMANDS_COOKIECUTTER_KEY,
+        ):
+            raise ValueError(f"Invalid command '{command}'")
+        self.project_dir = project_dir
+        self.context = context
+        self.components = components
+        self.command = command
+
+    @classmethod
+    def from_args(
+        cls, args: argparse.Namespace, command: str = COMMANDS_CREATE_KEY
+    ) -> "ProjectSpec":
+        """Define a project based on command-line arguments
+
+        Params:
+            args: argparse.Namespace object with command-line arguments for
+                the given command (see main.parse_args)
+            command: String specifying the template action (create, manage,
+                cookiecutter).
+        Returns: ProjectSpec object with configurations generated by
+            ProjectConfig
+        """
+        config = ProjectConfig(args)
+        if command == COMMANDS_CREATE_KEY:
+            context, components = config.create()
+        elif command == COMMANDS_MANAGE_KEY:
+            context, components = config.manage()
+        else:
+            context, components = config.cookiecutter()
+        return cls(config.project_dir, context, components, command)
+
+
+class ProjectResult:
+    """Result of generating a project
+
+    Attributes:
+        spec: ProjectSpec object defining the project.
+        seconds: Float with the wall time for generating the project.
+        error: Exception that has been raised while generating the project,
+            None if the project has been generated successfully.
+    """
+
+    def __init__(
+        self, spec: ProjectSpec, seconds: float, error: Exception | None = None
+    ) -> None:
+        self.spec = spec
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """True if the project has been generated without error"""
+        return self.error is None
+
+
+def generate(
+    spec_list: Iterable[ProjectSpec],
+    overwrite_exists: bool = False,
+    skip_exists: bool = False,
+    dry_run: bool = False,
+    workers: int = 1,
+    cache: bool = True,
+    link_static: str | None = None,
+) -> Iterator[ProjectResult]:
+    """Generate projects from the DevOps template one after the other.
+
+    Errors are reported in the results and do not stop the generation of the
+    remaining projects.
+
+    Params:
+        spec_list: Iterable of ProjectSpec objects (evaluated lazily).
+        overwrite_exists, skip_exists, dry_run, workers, cache, link_static:
+            see DevOpsTemplate.__init__
+    Returns: Iterator over ProjectResult objects (in the order of spec_list)
+    """
+    logger = logging.getLogger("batch.generate")
+    for spec in spec_list:
+        start = time.perf_counter()
+        error: Exception | None = None
+        try:
+            template = DevOpsTemplate(
+                projectdirectory=spec.project_dir,
+                overwrite_exists=overwrite_exists,
+                skip_exists=skip_exists,
+                dry_run=dry_run,
+                workers=workers,
+                cache=cache,
+                link_static=link_static,
+            )
+            if spec.command == COMMANDS_CREATE_KEY:
+                template.create(spec.context, spec.components)
+            elif spec.command == COMMANDS_MANAGE_KEY:
+                template.manage(spec.context, spec.components)
+            else:
+                template.cookiecutter(spec.context, spec.components)
+        # pylint: disable=broad-exception-caught
+        # errors are reported per project
+        except Exception as err:
+            logger.error("Project %s: %s", spec.project_dir, err)
+            error = err
+        seconds = time.perf_counter() - start
+        logger.debug("Project %s: %.3fs", spec.project_dir, seconds)
+        yield ProjectResult(spec, seconds, error)
+
+
+def spec_from_record(
+    record: dict[str, Any], options: dict[str, Any] | None = None
+) -> ProjectSpec:
+    """Define a project for the create command from a JSON record.
+
+    The record maps parameter and component names of the create command
+    (see commands.json, with "-" or "_") to values. Components are boolean
+    flags with the same meaning as on the command-line. The project directory
+    is defined with the key "project_dir".
+
+    Params:
+        record: Dictionary with create parameters/components.
+        options: Dictionary with top-level command-line options (see
+            main.parse_args: overwrite_exists, skip_exists, dry_run, workers,
+            no_cache, link_static). (optional)
+    Returns: ProjectSpec object for the create command
+    Raises:
+        ValueError: if the record contains unknown keys or if the project
+            directory is missing.
+        TypeError: if a component (boolean flag) is not a JSON boolean.
+    """
+    cfg = CommandsConfig()
+    # Initialize arguments with defaults as defined for the command-line
+    args_dict: dict[str, Any] = {ARGUMENTS_PROJECT_DIR_KEY: None}
+    for param_dict in cfg.values_dict(COMMANDS_CREATE_KEY, COMMANDS_PARAMETERS_KEY):
+        key = param_dict[COMMANDS_PARAMETERS_NAME_KEY].replace("-", "_")
+        args_dict[key] = param_dict[COMMANDS_PARAMETERS_DEFAULT_KEY]
+    for comp_dict in cfg.values_dict(COMMANDS_CREATE_KEY, COMMANDS_COMPONENTS_KEY):
+        args_dict[comp_dict[COMMANDS_PARAMETERS_NAME_KEY].replace("-", "_")] = False
+    for key, value in record.items():
+        key = key.replace("-", "_")
+        if key not in args_dict:
+            raise ValueError(f"Unknown parameter '{key}'")
+        # Flags are only set by JSON booleans (the string "false" is not false)
+        if isinstance(args_dict[key], bool) and not isinstance(value, bool):
+            raise TypeError(f"Parameter '{key}' must be true or false")
+        args_dict[key] = value
+    if not args_dict[ARGUMENTS_PROJECT_DIR_KEY]:
+        raise ValueError(f"Missing parameter '{ARGUMENTS_PROJECT_DIR_KEY}'")
+    args_dict[ARGUMENTS_INTERACTIVE_KEY] = False
+    args_dict.update(OPTION_DEFAULTS)
+    if options is not None:
+        args_dict.update(options)
+    return ProjectSpec.from_args(argparse.Namespace(**args_dict))
+
+
+def bulk_create(options: dict[str, Any], line_number: int, line: str) -> dict[str, Any]:
+    """Generate a project for a JSON line (executed in worker processes)
+
+    Params:
+        options: Dictionary with top-level command-line options (see
+            spec_from_record).
+        line_number: Integer with the line number in the input (for
+            reporting).
+        line: String with a JSON record (see spec_from_record).
+    Returns: Dictionary with the status record (see generate_bulk)
+    """
+    status: dict[str, Any] = {
+        "line": line_number,
+        ARGUMENTS_PROJECT_DIR_KEY: None,
+        "status": "ok",
+        "error": None,
+        "seconds": 0.0,
+    }
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise TypeError("JSON line must contain an object")
+        status[ARGUMENTS_PROJECT_DIR_KEY] = record.get(ARGUMENTS_PROJECT_DIR_KEY)
+        spec = spec_from_record(record, options)
+    except (TypeError, ValueError) as err:
+        status.update({"status": "error", "error": str(err)})
+        return status
+    template_options = {
+        "overwrite_exists": options.get("overwrite_exists", False),
+        "skip_exists": options.get("skip_exists", False),
+        "dry_run": options.get("dry_run", False),
+        "workers": options.get("workers", 1),
+        "cache": not options.get("no_cache", False),
+        "link_static": options.get("link_static"),
+    }
+    result = next(generate([spec], **template_options))
+    status[ARGUMENTS_PROJECT_DIR_KEY] = spec.project_dir
+    status["seconds"] = result.seconds
+    if result.error is not None:
+        status.update({"status": "error", "error": str(result.error)})
+    return status
+
+
+def generate_bulk(
+    lines: Iterable[str],
+    processes: int | None = None,
+    options: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Generate projects for JSON lines with a pool of worker processes.
+
+    Lines are read lazily. The number of lines that are processed or waiting
+    to be processed is bounded (twice the number of processes).
+
+    Params:
+        lines: Iterable of strings with JSON records (see spec_from_record),
+            empty lines are ignored.
+        processes: Integer with the number of worker processes (default:
+            number of CPUs).
+        options: Dictionary with top-level command-line options (see
+            spec_from_record). (optional)
+    Returns: Iterator over status records (in the order of completion). A
+        status record is a dictionary with the keys "line", "project_dir",
+        "status" ("ok" or "error"), "error" (message or None) and "seconds".
+    """
+    if options is None:
+        options = {}
+    create_line = functools.partial(bulk_create, options)
+    numbered_lines = (
+        (line_number, line)
+        for line_number, line in enumerate(lines, start=1)
+        if line.strip()
+    )
+    yield from process_unordered(create_line, numbered_lines, processes)
+
+
+def process_unordered(
+    func: Callable[..., R],
+    args_iter: Iterable[tuple[Any, ...]],
+    processes: int | None = None,
+) -> Iterator[R]:
+    """Call a function for argument tuples with a pool of worker processes.
+
+    Arguments are read lazily. The number of calls that are processed or
+    waiting to be processed is bounded (twice the number of processes).
+
+    Params:
+        func: Function that is called in the worker processes (picklable)
+        args_iter: Iterable of tuples with positional arguments for func
+        processes: Integer with the number of worker processes (default:
+            number of CPUs).
+    Returns: Iterator over the results (in the order of completion)
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    max_pending = 2 * processes
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending: set[Future[R]] = set()
+        for args in args_iter:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(func, *args))
+        for future in as_completed(pending):
+            yield future.result()
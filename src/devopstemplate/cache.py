@@ -0,0 +1,286 @@
+"""Persistent cache for compiled Jinja2 templates
+
+- compiled templates (bytecode) are stored in the user cache directory
+- cache entries are separated by package version and are validated with the
+  checksum of the template source (stale entries are recompiled)
+- the size of the cache is bounded, least recently used entries are evicted
+- file contents (e.g., static template files, installed outputs) are stored
+  by their hash in a content-addressed object store (bounded, least recently
+  used objects are evicted)
+"""
+
+import logging
+import os
+import threading
+from collections.abc import Callable
+from typing import BinaryIO
+
+from jinja2.bccache import Bucket, FileSystemBytecodeCache
+
+from devopstemplate import __version__
+from devopstemplate.lock import digest, file_digest
+from devopstemplate.paths import cache_dir
+from devopstemplate.static import copy_file
+
+BYTECODE_DNAME = "bytecode"
+BYTECODE_MAX_SIZE = 8 * 1024 * 1024
+OBJECTS_DNAME = "objects"
+OBJECTS_MAX_SIZE = 64 * 1024 * 1024
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache for Jinja2 environments that stores compiled templates
+    in a directory per package version.
+
+    Jinja2 identifies a cache entry by the template name and validates the
+    entry with the checksum of the template source. Thus, warm runs skip
+    parsing and compiling templates while modified templates are recompiled.
+    """
+
+    def __init__(
+        self, directory: str | None = None, max_size: int = BYTECODE_MAX_SIZE
+    ) -> None:
+        """Create the cache directory for the current package version if not
+        present.
+
+        Params:
+            directory: String with the path to the cache root directory.
+                (default: bytecode directory in the user cache directory)
+            max_size: Maximum size of the cache in bytes (for all package
+                versions).
+        Raises:
+            OSError: if the cache directory cannot be created
+        """
+        if directory is None:
+            directory = os.path.join(cache_dir(), BYTECODE_DNAME)
+        self.__root_dname = directory
+        self.__max_size = max_size
+        version_dname = os.path.join(directory, __version__)
+        os.makedirs(version_dname, exist_ok=True)
+        super().__init__(version_dname, "%s.cache")
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        """Load bytecode from the cache and mark the entry as recently used"""
+        super().load_bytecode(bucket)
+        if bucket.code is not None:
+            try:
+                os.utime(self._get_cache_filename(bucket))
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        """Write bytecode to the cache and evict entries if the cache exceeds
+        its maximum size. The cache is optional, write errors are ignored.
+        """
+        logger = logging.getLogger("TemplateBytecodeCache.dump_bytecode")
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as err:
+            logger.debug("Could not write template cache: %s", err)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used cache entries (of all package versions)
+        until the size of the cache is below its maximum size.
+        """
+        # List of (mtime, size, path) tuples
+        entry_list: list[tuple[float, int, str]] = []
+        with os.scandir(self.__root_dname) as version_iter:
+            for version_entry in version_iter:
+                if not version_entry.is_dir():
+                    continue
+                with os.scandir(version_entry.path) as entry_iter:
+                    for entry in entry_iter:
+                        if entry.is_file():
+                            entry_stat = entry.stat()
+                            entry_list.append(
+                                (entry_stat.st_mtime, entry_stat.st_size, entry.path)
+                            )
+        cache_size = sum(entry_size for _, entry_size, _ in entry_list)
+        # Oldest entries first
+        for _, entry_size, entry_path in sorted(entry_list):
+            if cache_size <= self.__max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            cache_size -= entry_size
+
+
+class ObjectStore:
+    """Content-addressed store for file contents in the user cache directory
+
+    Objects are stored as objects/<hash[:2]>/<hash> (hash: sha256 hex digest,
+    see lock.digest) and are read-only, i.e., projects can share objects
+    (hardlinks) without modifying the store accidentally. Objects are written
+    atomically, concurrent processes may add the same object. Existing
+    objects are verified with their hash before they are used, modified
+    objects are replaced (add, put) or ignored (read).
+
+    The size of the store is bounded (see evict). Objects are marked as
+    recently used when they are read or added again, except for objects that
+    are linked to project files (the modification time is shared by all
+    links).
+    """
+
+    def __init__(
+        self, directory: str | None = None, max_size: int = OBJECTS_MAX_SIZE
+    ) -> None:
+        """Params:
+        directory: String with the path to the object directory.
+            (default: objects directory in the user cache directory)
+        max_size: Maximum size of the store in bytes
+        """
+        if directory is None:
+            directory = os.path.join(cache_dir(), OBJECTS_DNAME)
+        self.directory = directory
+        self.__max_size = max_size
+
+    def path(self, object_hash: str) -> str:
+        """Obtain the path to an object
+
+        Params:
+            object_hash: String with the (hex) hash of the object content
+        Returns: String with the path to the object file (may not exist)
+        """
+        return os.path.join(self.directory, object_hash[:2], object_hash)
+
+    def add(self, object_hash: str, src_handle: BinaryIO, size: int) -> str:
+        """Store an object if not present
+
+        Params:
+            object_hash: String with the (hex) hash of the object content
+            src_handle: Binary file object with the object content at the
+                beginning (positioned at the beginning)
+            size: Integer with the size of the object content
+        Returns: String with the path to the object file
+        Raises:
+            OSError: if the object cannot be written
+        """
+        object_fpath = self.path(object_hash)
+        try:
+            if os.stat(object_fpath).st_size == size and self.__valid(object_hash):
+                self.__touch(object_fpath)
+                return object_fpath
+        except FileNotFoundError:
+            pass
+        self.__replace(object_fpath, lambda fpath: copy_file(src_handle, fpath, size))
+        return object_fpath
+
+    def put(self, object_hash: str, data: bytes) -> str:
+        """Store an object from memory if not present
+
+        Params:
+            object_hash: String with the (hex) hash of the object content
+            data: Bytes with the object content
+        Returns: String with the path to the object file
+        Raises:
+            OSError: if the object cannot be written
+        """
+        object_fpath = self.path(object_hash)
+        if self.__valid(object_hash):
+            self.__touch(object_fpath)
+            return object_fpath
+
+        def write(fpath: str) -> None:
+            with open(fpath, "wb") as handle:
+                handle.write(data)
+
+        self.__replace(object_fpath, write)
+        return object_fpath
+
+    def read(self, object_hash: str) -> bytes | None:
+        """Obtain the content of an object
+
+        Params:
+            object_hash: String with the (hex) hash of the object content
+        Returns: Bytes with the object content, None if not present or
+            modified
+        """
+        object_fpath = self.path(object_hash)
+        try:
+            with open(object_fpath, "rb") as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            return None
+        if digest(data) != object_hash:
+            return None
+        self.__touch(object_fpath)
+        return data
+
+    def __valid(self, object_hash: str) -> bool:
+        """Check whether an object is present and has not been modified
+        (e.g., through a hardlink)
+        """
+        return file_digest(self.path(object_hash)) == object_hash
+
+    def evict(self) -> None:
+        """Remove least recently used objects until the size of the store is
+        below its maximum size. Objects that are removed while they are
+        linked to project files remain in the projects.
+        """
+        # List of (mtime, size, path) tuples
+        entry_list: list[tuple[float, int, str]] = []
+        try:
+            with os.scandir(self.directory) as prefix_iter:
+                for prefix_entry in prefix_iter:
+                    if not prefix_entry.is_dir():
+                        continue
+                    with os.scandir(prefix_entry.path) as entry_iter:
+                        for entry in entry_iter:
+                            # Temporary files are written by other processes
+                            if entry.is_file() and not entry.name.endswith(".tmp"):
+                                entry_stat = entry.stat()
+                                entry_list.append(
+                                    (
+                                        entry_stat.st_mtime,
+                                        entry_stat.st_size,
+                                        entry.path,
+                                    )
+                                )
+        except FileNotFoundError:
+            return
+        store_size = sum(entry_size for _, entry_size, _ in entry_list)
+        # Oldest objects first
+        for _, entry_size, entry_path in sorted(entry_list):
+            if store_size <= self.__max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            store_size -= entry_size
+
+    @staticmethod
+    def __touch(object_fpath: str) -> None:
+        """Mark an object as recently used (unless it is linked to project
+        files)
+        """
+        try:
+            if os.stat(object_fpath).st_nlink == 1:
+                os.utime(object_fpath)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __replace(object_fpath: str, write: Callable[[str], None]) -> None:
+        """Write an object atomically (temporary file in the object directory)
+
+        Params:
+            object_fpath: String with the path to the object file
+            write: Function that writes the object content to a given path
+        Raises:
+            OSError: if the object cannot be written
+        """
+        os.makedirs(os.path.dirname(object_fpath), exist_ok=True)
+        tmp_fpath = f"{object_fpath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp_fpath)
+            os.chmod(tmp_fpath, 0o444)
+            os.replace(tmp_fpath, object_fpath)
+        except OSError:
+            if os.path.exists(tmp_fpath):
+                os.remove(tmp_fpath)
+            raise
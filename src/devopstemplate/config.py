@@ -2,24 +2,30 @@
 
 import argparse
 import json
+import logging
+import marshal
 import os
-import shutil
-import subprocess
+import threading
 from typing import Any, cast
 
-from jinja2 import Template
-
-from devopstemplate import pkg
+from devopstemplate import __version__
+from devopstemplate.gitconfig import GitConfig, GitConfigError
+from devopstemplate.lock import ProjectLock
+from devopstemplate.paths import cache_dir
 
 ARGUMENTS_INTERACTIVE_KEY = "interactive"
 ARGUMENTS_PACKAGE_NAME_KEY = "package_name"
 ARGUMENTS_PROJECT_DIR_KEY = "project_dir"
 ARGUMENTS_PROJECT_NAME_KEY = "project_name"
 ARGUMENTS_PROJECT_SLUG_KEY = "project_slug"
+ARGUMENTS_UPGRADE_KEY = "upgrade"
+ARGUMENTS_UPGRADABLE_KEY = "upgradable"
 ARGUMENTS_YES_KEY = "y"
 ARGUMENTS_NO_KEY = "n"
 COOKIECUTTER_FNAME = "cookiecutter.json"
 COMMANDS_FNAME = "commands.json"
+# Parsed command definitions in the user cache directory (per version)
+COMMANDS_CACHE_FNAME = "commands-{version}.marshal"
 COMMANDS_CREATE_KEY = "create"
 COMMANDS_COOKIECUTTER_KEY = "cookiecutter"
 COMMANDS_MANAGE_KEY = "manage"
@@ -32,6 +38,50 @@ COMMANDS_PARAMETERS_HELP_KEY = "help"
 GIT_NAME_KEY = "git_name"
 GIT_EMAIL_KEY = "git_email"
 TEMPLATES_FNAME = "template.json"
+DEPENDENCIES_FNAME = "dependencies.json"
+
+
+class GitDefault:
+    """Default value of a parameter that depends on the git config, e.g.,
+    the author name ({{git_name}}/{{git_email}} placeholders in
+    commands.json). The git config is only read when the value is used
+    (str), i.e., commands that do not use the default do not read it.
+    Placeholders are substituted without Jinja2 (help messages must not
+    import Jinja2).
+
+    Compares equal to the rendered string.
+    """
+
+    def __init__(self, template: str) -> None:
+        self.template = template
+
+    def __str__(self) -> str:
+        name, email = CommandsConfig.git_user()
+        value = self.template
+        for key, key_value in ((GIT_NAME_KEY, name), (GIT_EMAIL_KEY, email)):
+            value = value.replace(f"{{{{{key}}}}}", key_value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"GitDefault({self.template!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, GitDefault):
+            return self.template == other.template
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.template)
+
+    @staticmethod
+    def resolve(value: Any) -> Any:
+        """Render a value if it is a GitDefault object
+
+        Returns: String with the rendered value or the value
+        """
+        return str(value) if isinstance(value, GitDefault) else value
 
 
 class CommandsConfig:
@@ -111,49 +161,131 @@ class CommandsConfig:
         Returns:
             commands_dict: Dictionary representing commands.json
         """
-        # Load commands.json with definitions for command-line arguments
-        # -> sub-commands, their arguments, defaults and help messages
-        commands_str = pkg.string(COMMANDS_FNAME)
-        # Define context for substituting default values in the commands file
-        # in order to be substituted with Jinja2
-        # git user and email as default for author data
-        name, email = CommandsConfig.git_user()
-        context = {GIT_NAME_KEY: name, GIT_EMAIL_KEY: email}
-        commands_str = Template(commands_str).render(**context)
-        commands_dict = json.loads(commands_str)
-        if not isinstance(commands_dict, dict) and any(
-            not isinstance(k, str) for k in commands_dict
-        ):
-            raise TypeError(
-                "commands.json must contain a dictionary of string keys / commands"
-            )
+        commands_dict = CommandsConfig.__read_cache()
+        if commands_dict is None:
+            # pylint: disable=import-outside-toplevel
+            # Read from the package (not from the pack) if the definitions are
+            # not cached: loading the pack imports Jinja2
+            from devopstemplate import pkg
+
+            # Load commands.json with definitions for command-line arguments
+            # -> sub-commands, their arguments, defaults and help messages
+            commands_dict = json.loads(pkg.string(COMMANDS_FNAME))
+            if not isinstance(commands_dict, dict) and any(
+                not isinstance(k, str) for k in commands_dict
+            ):
+                raise TypeError(
+                    "commands.json must contain a dictionary of string keys / commands"
+                )
+            CommandsConfig.__write_cache(commands_dict)
+        # Defaults with Jinja2 syntax depend on the git config (author data),
+        # they are rendered when they are used
+        for cmd_dict in commands_dict.values():
+            for param_dict in cmd_dict.get(COMMANDS_PARAMETERS_KEY, []):
+                default = param_dict.get(COMMANDS_PARAMETERS_DEFAULT_KEY)
+                if isinstance(default, str) and "{{" in default:
+                    param_dict[COMMANDS_PARAMETERS_DEFAULT_KEY] = GitDefault(default)
         return cast(dict[str, Any], commands_dict)
 
     @staticmethod
-    def git_user() -> tuple[str, str]:
-        """Obtain git user name and email from git config.
+    def __source_key() -> tuple[Any, ...]:
+        """Identify the source of the command definitions (package version,
+        modification time and size of commands.json, (0, 0) if the file is not
+        available)
+        """
+        try:
+            stat = os.stat(os.path.join(os.path.dirname(__file__), COMMANDS_FNAME))
+        except OSError:
+            return (__version__, (0, 0))
+        return (__version__, (stat.st_mtime_ns, stat.st_size))
+
+    @staticmethod
+    def __cache_fpath() -> str:
+        return os.path.join(
+            cache_dir(), COMMANDS_CACHE_FNAME.format(version=__version__)
+        )
+
+    @staticmethod
+    def __read_cache() -> dict[str, Any] | None:
+        """Read parsed command definitions from the user cache directory (no
+        package resource lookup, no JSON parsing)
+
+        Returns: Dictionary with command definitions, None if not cached or
+            if the sources have changed
+        """
+        try:
+            with open(CommandsConfig.__cache_fpath(), "rb") as cache_fh:
+                source_key, commands_dict = marshal.loads(cache_fh.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if source_key != CommandsConfig.__source_key():
+            return None
+        return cast(dict[str, Any], commands_dict)
+
+    @staticmethod
+    def __write_cache(commands_dict: dict[str, Any]) -> None:
+        """Write parsed command definitions to the user cache directory
+        (atomically, errors are ignored)
+        """
+        logger = logging.getLogger("CommandsConfig.__write_cache")
+        cache_fpath = CommandsConfig.__cache_fpath()
+        tmp_fpath = f"{cache_fpath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_fpath), exist_ok=True)
+            with open(tmp_fpath, "wb") as cache_fh:
+                cache_fh.write(
+                    marshal.dumps((CommandsConfig.__source_key(), commands_dict))
+                )
+            os.replace(tmp_fpath, cache_fpath)
+        except (OSError, ValueError) as err:
+            logger.debug("Could not cache command definitions: %s", err)
+            if os.path.exists(tmp_fpath):
+                os.remove(tmp_fpath)
 
-        The function expects that the command 'git' is found on the PATH.
+    @staticmethod
+    def git_user() -> tuple[str, str]:
+        """Obtain git user name and email from git config (config files are
+        read directly, see gitconfig module). The values are obtained from
+        'git config' if the config files are not supported, e.g., conditional
+        includes (includeIf).
 
         Returns:
-            name: String with git user name, empty string if no 'git' command
-            email: String with git user email, empty string if no 'git' command
+            name: String with git user name, empty string if not configured
+            email: String with git user email, empty string if not configured
         """
-        name = ""
-        email = ""
-        if shutil.which("git"):
-            name = subprocess.check_output(
-                ["git", "config", "user.name"],
-                stderr=subprocess.STDOUT,
-                encoding="utf-8",
-            )
-            email = subprocess.check_output(
-                ["git", "config", "user.email"],
-                stderr=subprocess.STDOUT,
-                encoding="utf-8",
-            )
+        logger = logging.getLogger("CommandsConfig.git_user")
+        try:
+            name = GitConfig.get("user.name") or ""
+            email = GitConfig.get("user.email") or ""
+        except GitConfigError as err:
+            logger.debug("Reading git config with git: %s", err)
+            name = CommandsConfig.__git_config("user.name")
+            email = CommandsConfig.__git_config("user.email")
         return name.strip(), email.strip()
 
+    @staticmethod
+    def __git_config(key: str) -> str:
+        """Obtain a value with 'git config --get'
+
+        Returns: String with the value, empty string if the key is not defined
+            or if the command 'git' is not found on the PATH
+        """
+        # pylint: disable=import-outside-toplevel
+        # subprocess is only needed for unsupported config files
+        import shutil
+        import subprocess
+
+        if not shutil.which("git"):
+            return ""
+        result = subprocess.run(
+            ["git", "config", "--get", key],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            check=False,
+        )
+        return result.stdout
+
 
 class ProjectConfig:
     """Generate config dictionaries for template actions:
@@ -176,6 +308,15 @@ class ProjectConfig:
         self.overwrite_exists = args.overwrite_exists
         self.skip_exists = args.skip_exists
         self.dry_run = args.dry_run
+        self.workers = args.workers
+        self.cache = not args.no_cache
+        self.archive = args.archive
+        self.archive_format = args.archive_format
+        self.link_static = args.link_static
+        # Upgrade mode is only defined for action 'manage'
+        self.upgrade = bool(self.__args_dict.get(ARGUMENTS_UPGRADE_KEY, False))
+        # Storing bases for upgrades is only defined for action 'create'
+        self.upgradable = bool(self.__args_dict.get(ARGUMENTS_UPGRADABLE_KEY, False))
         # load definition for (sub-)commands
         self.__cfg = CommandsConfig()
 
@@ -194,8 +335,11 @@ class ProjectConfig:
         param_key_list = [
             p[COMMANDS_PARAMETERS_NAME_KEY].replace("-", "_") for p in param_def_list
         ]
-        # Define param dict for project context
-        param_dict = {key: self.__args_dict[key] for key in param_key_list}
+        # Define param dict for project context (defaults from the git config
+        # are rendered here)
+        param_dict = {
+            key: GitDefault.resolve(self.__args_dict[key]) for key in param_key_list
+        }
         # Overwrite default/specified values in interactive mode
         if (
             ARGUMENTS_INTERACTIVE_KEY in self.__args_dict
@@ -204,7 +348,7 @@ class ProjectConfig:
             param_dict = self.__input(param_key_list, param_dict)
         return param_dict
 
-    def __comp_list(self, command: str) -> list[str]:
+    def __comp_list(self, command: str, defaults: bool = False) -> list[str]:
         """Generate list of project components that will be installed according
         to template.json
 
@@ -212,6 +356,8 @@ class ProjectConfig:
 
         Params:
             command: String specifying the command.
+            defaults: Boolean specifying whether to ignore component flags,
+                i.e., to obtain the default components of the command.
         Returns:
             comp_list: List of strings specifying template components
         """
@@ -232,10 +378,14 @@ class ProjectConfig:
         comp_dict = dict(zip(comp_key_list, comp_def_list))
 
         # Define comp_args dict for project component flags specified by user
-        comp_args = {key: self.__args_dict[key] for key in comp_key_list}
+        if defaults:
+            comp_args = {key: False for key in comp_key_list}
+        else:
+            comp_args = {key: self.__args_dict[key] for key in comp_key_list}
         # Overwrite default/specified values in interactive mode
         if (
-            ARGUMENTS_INTERACTIVE_KEY in self.__args_dict
+            not defaults
+            and ARGUMENTS_INTERACTIVE_KEY in self.__args_dict
             and self.__args_dict[ARGUMENTS_INTERACTIVE_KEY]
         ):
             comp_args = self.__input(comp_key_list, comp_args)
@@ -268,6 +418,23 @@ class ProjectConfig:
             comp_list: List of template components that will be installed
                 according to template.json
         """
+        # Parameters
+        param_dict = self.__create_param_dict()
+
+        # Components
+        comp_list = self.__comp_list(command=COMMANDS_CREATE_KEY)
+
+        return param_dict, comp_list
+
+    def __create_param_dict(self) -> dict[str, Any]:
+        """Generate the parameters of action 'create' (see create)
+
+        Supports interactive mode.
+
+        Returns:
+            param_dict: Dictionary with configurations for creating an instance
+                of the devops template.
+        """
         # Set default for package_name if not present
         project_name = os.path.basename(self.project_dir)
         # If package_name is not given as CLI argument
@@ -288,15 +455,17 @@ class ProjectConfig:
         project_slug = param_dict[ARGUMENTS_PACKAGE_NAME_KEY]
         project_slug = project_slug.replace(" ", "_").replace("-", "_")
         param_dict[ARGUMENTS_PROJECT_SLUG_KEY] = project_slug.lower()
-
-        # Components
-        comp_list = self.__comp_list(command=COMMANDS_CREATE_KEY)
-
-        return param_dict, comp_list
+        return param_dict
 
     def manage(self) -> tuple[dict[str, Any], list[str]]:
         """Generate project configuration for action 'manage'.
 
+        The configuration that has been recorded in the lock manifest of the
+        project is used (files that are up to date are detected by the hash
+        of the context, see ProjectLock.is_current). In upgrade mode, the
+        components that have been recorded in the lock manifest are used in
+        addition, i.e., all installed components are upgraded.
+
         Returns:
             param_dict: Dictionary with configurations for modifying an
                 instance of the devops template.
@@ -305,10 +474,44 @@ class ProjectConfig:
         """
         # Parameters
         param_dict = {ARGUMENTS_PROJECT_NAME_KEY: os.path.basename(self.project_dir)}
+        project_lock = ProjectLock(self.project_dir)
+        param_dict.update(project_lock.context)
 
         # Components
         comp_list = self.__comp_list(command=COMMANDS_MANAGE_KEY)
 
+        if self.upgrade:
+            comp_list = project_lock.components + [
+                comp for comp in comp_list if comp not in project_lock.components
+            ]
+
+        return param_dict, comp_list
+
+    def diff(self) -> tuple[dict[str, Any], list[str]]:
+        """Generate project configuration for action 'diff'.
+
+        The configuration that has been recorded in the lock manifest of the
+        project is used if available. Otherwise, the parameters are obtained
+        as for action 'create' and the default components of 'create' are
+        compared. Components can be added with the flags of 'manage'.
+
+        Returns:
+            param_dict: Dictionary with configurations for rendering the
+                template instance.
+            comp_list: List of template components that will be compared
+                according to template.json
+        """
+        project_lock = ProjectLock(self.project_dir)
+        # Parameters
+        param_dict = self.__create_param_dict()
+        param_dict.update(project_lock.context)
+
+        # Components
+        comp_list = project_lock.components
+        if not comp_list:
+            comp_list = self.__comp_list(command=COMMANDS_CREATE_KEY, defaults=True)
+        comp_list.extend(self.__comp_list(command=COMMANDS_MANAGE_KEY))
+
         return param_dict, comp_list
 
     def cookiecutter(self) -> tuple[dict[str, Any], list[str]]:
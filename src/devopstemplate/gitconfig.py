@@ -0,0 +1,272 @@
+"""Read values from git config files without running git
+
+- files are read in the order of git: system ($GIT_CONFIG_SYSTEM, default:
+  /etc/gitconfig, skipped if $GIT_CONFIG_NOSYSTEM is set), global
+  ($GIT_CONFIG_GLOBAL or $XDG_CONFIG_HOME/git/config and ~/.gitconfig) and
+  the config of the repository that contains the working directory ($GIT_DIR
+  or .git in the working directory or a parent directory), later values
+  override earlier values
+- supports sections, subsections, quoted values, escape sequences, comments,
+  line continuations and include.path (worktree configs and configs from
+  the environment/command-line are not supported)
+- conditional includes (includeIf) and files that cannot be parsed raise a
+  GitConfigError, callers fall back to running git then
+- parsed files are cached per process and are read again if they change
+"""
+
+import os
+
+# Maximum depth of nested include.path directives
+GITCONFIG_INCLUDE_DEPTH = 10
+GITCONFIG_SYSTEM_FPATH = "/etc/gitconfig"
+# Escape sequences in values
+GITCONFIG_ESCAPES = {"n": "\n", "t": "\t", "b": "\b", "\\": "\\", '"': '"'}
+# Sections that are not supported (values depend on the repository)
+GITCONFIG_UNSUPPORTED_SECTIONS = ("includeif",)
+
+
+class GitConfigError(ValueError):
+    """Will be raised if a config file cannot be parsed or if it contains
+    directives that are not supported (see module docstring).
+    """
+
+
+class GitConfig:
+    """Obtain values from git config files (see module docstring)"""
+
+    # Static variable storing parsed files: path -> (stat key, entries)
+    __file_dict: dict[str, tuple[tuple[int, int], list[tuple[str, str]]]] = {}
+
+    @staticmethod
+    def get(key: str, cwd: str | None = None) -> str | None:
+        """Obtain the value of a key (like 'git config KEY')
+
+        Params:
+            key: String with the key, e.g., user.name (section and name are
+                case-insensitive)
+            cwd: String with the working directory for finding the config of
+                the repository, default: current working directory
+        Returns: String with the value, None if the key is not defined
+        Raises:
+            GitConfigError: if a config file cannot be parsed or contains
+                conditional includes (includeIf)
+        """
+        section, _, name = key.rpartition(".")
+        section_name, dot, subsection = section.partition(".")
+        key = f"{section_name.lower()}{dot}{subsection}.{name.lower()}"
+        value = None
+        for fpath in GitConfig.files(cwd):
+            for entry_key, entry_value in GitConfig.__read(fpath):
+                if entry_key.split(".")[0] in GITCONFIG_UNSUPPORTED_SECTIONS:
+                    raise GitConfigError(
+                        f"Unsupported section '{entry_key}' in {fpath}"
+                    )
+                if entry_key == key:
+                    value = entry_value
+        return value
+
+    @staticmethod
+    def files(cwd: str | None = None) -> list[str]:
+        """Obtain the paths to the config files (in the order of git, files
+        may not exist)
+
+        Params:
+            cwd: String with the working directory for finding the config of
+                the repository, default: current working directory
+        Returns: List of strings with paths to config files
+        """
+        fpath_list = []
+        if not os.environ.get("GIT_CONFIG_NOSYSTEM"):
+            fpath_list.append(
+                os.environ.get("GIT_CONFIG_SYSTEM") or GITCONFIG_SYSTEM_FPATH
+            )
+        global_fpath = os.environ.get("GIT_CONFIG_GLOBAL")
+        if global_fpath:
+            fpath_list.append(global_fpath)
+        else:
+            xdg_dname = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+                os.path.expanduser("~"), ".config"
+            )
+            fpath_list.append(os.path.join(xdg_dname, "git", "config"))
+            fpath_list.append(os.path.join(os.path.expanduser("~"), ".gitconfig"))
+        git_dname = GitConfig.__git_dir(cwd if cwd is not None else os.getcwd())
+        if git_dname is not None:
+            fpath_list.append(os.path.join(git_dname, "config"))
+        return fpath_list
+
+    @staticmethod
+    def __git_dir(cwd: str) -> str | None:
+        """Find the (common) git directory of the repository that contains a
+        directory
+
+        Returns: String with the path to the git directory, None if the
+            directory is not in a repository
+        """
+        git_dname = os.environ.get("GIT_DIR")
+        dname = os.path.abspath(cwd)
+        while git_dname is None:
+            dot_git = os.path.join(dname, ".git")
+            if os.path.isdir(dot_git):
+                git_dname = dot_git
+            elif os.path.isfile(dot_git):
+                # Worktrees and submodules: "gitdir: <path>"
+                with open(dot_git, "r", encoding="utf-8") as git_fh:
+                    content = git_fh.read().strip()
+                if not content.startswith("gitdir:"):
+                    return None
+                git_dname = os.path.join(dname, content[len("gitdir:") :].strip())
+            else:
+                parent_dname = os.path.dirname(dname)
+                if parent_dname == dname:
+                    return None
+                dname = parent_dname
+        # Worktrees share the config of the main repository
+        commondir_fpath = os.path.join(git_dname, "commondir")
+        if os.path.isfile(commondir_fpath):
+            with open(commondir_fpath, "r", encoding="utf-8") as commondir_fh:
+                git_dname = os.path.join(git_dname, commondir_fh.read().strip())
+        return os.path.normpath(git_dname)
+
+    @staticmethod
+    def __read(fpath: str, depth: int = 0) -> list[tuple[str, str]]:
+        """Read a config file including the files it includes (cached)
+
+        Returns: List of (key, value) tuples, empty list if the file cannot be
+            read
+        Raises:
+            GitConfigError: if the file cannot be parsed
+        """
+        try:
+            stat = os.stat(fpath)
+        except OSError:
+            return []
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cached = GitConfig.__file_dict.get(fpath)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+        try:
+            with open(fpath, "r", encoding="utf-8", errors="replace") as config_fh:
+                text = config_fh.read()
+        except OSError:
+            return []
+        try:
+            entry_list = GitConfig.parse(text)
+        except GitConfigError as err:
+            raise GitConfigError(f"{fpath}: {err}") from err
+        expanded_list: list[tuple[str, str]] = []
+        for key, value in entry_list:
+            expanded_list.append((key, value))
+            if key == "include.path" and depth < GITCONFIG_INCLUDE_DEPTH:
+                include_fpath = os.path.expanduser(value)
+                if not os.path.isabs(include_fpath):
+                    include_fpath = os.path.join(os.path.dirname(fpath), value)
+                expanded_list.extend(GitConfig.__read(include_fpath, depth + 1))
+        GitConfig.__file_dict[fpath] = (stat_key, expanded_list)
+        return expanded_list
+
+    @staticmethod
+    def parse(text: str) -> list[tuple[str, str]]:
+        """Parse the content of a git config file
+
+        Params:
+            text: String with the content of the file
+        Returns: List of (key, value) tuples in the order of the file. Keys
+            are section.[subsection.]name with lower case section and name.
+            Keys without value are booleans with the value "true".
+        Raises:
+            GitConfigError: if the content is not valid (invalid section
+                headers or names, unterminated quotes)
+        """
+        entry_list = []
+        section = ""
+        pos = 0
+        while pos < len(text):
+            char = text[pos]
+            if char.isspace():
+                pos += 1
+            elif char in "#;":
+                pos = GitConfig.__line_end(text, pos)
+            elif char == "[":
+                end = text.find("]", pos)
+                if end < 0:
+                    raise GitConfigError("Unterminated section header")
+                section = GitConfig.__section(text[pos + 1 : end])
+                pos = end + 1
+            else:
+                end = pos
+                while end < len(text) and (text[end].isalnum() or text[end] == "-"):
+                    end += 1
+                if end == pos:
+                    line = text[pos : GitConfig.__line_end(text, pos)]
+                    raise GitConfigError(f"Invalid line: {line!r}")
+                name = text[pos:end].lower()
+                while end < len(text) and text[end] in " \t\r":
+                    end += 1
+                if end < len(text) and text[end] == "=":
+                    value, pos = GitConfig.__value(text, end + 1)
+                else:
+                    value, pos = "true", end
+                entry_list.append((f"{section}.{name}", value))
+        return entry_list
+
+    @staticmethod
+    def __line_end(text: str, pos: int) -> int:
+        end = text.find("\n", pos)
+        return len(text) if end < 0 else end
+
+    @staticmethod
+    def __section(header: str) -> str:
+        """Obtain the key prefix of a section header (without brackets)"""
+        name, quote, subsection = header.partition('"')
+        if not quote:
+            # Deprecated syntax [section.subsection] (case-insensitive)
+            return header.strip().lower()
+        subsection = subsection.rpartition('"')[0]
+        for escaped in ('\\"', "\\\\"):
+            subsection = subsection.replace(escaped, escaped[1])
+        return f"{name.strip().lower()}.{subsection}"
+
+    @staticmethod
+    def __value(text: str, pos: int) -> tuple[str, int]:
+        """Parse a value starting after "="
+
+        Returns: Tuple with the value and the position after the value
+        """
+        char_list: list[str] = []
+        space = ""
+        quoted = False
+        while pos < len(text):
+            char = text[pos]
+            pos += 1
+            if char == "\n" and not quoted:
+                break
+            if char in "#;" and not quoted:
+                pos = GitConfig.__line_end(text, pos)
+                break
+            if char == '"':
+                quoted = not quoted
+                char_list.append(space)
+                space = ""
+                continue
+            if char == "\\" and pos < len(text):
+                escaped = text[pos]
+                pos += 1
+                if escaped == "\r" and text.startswith("\n", pos):
+                    # Line continuation (CRLF line endings)
+                    pos += 1
+                    continue
+                if escaped == "\n":
+                    # Line continuation
+                    continue
+                char = GITCONFIG_ESCAPES.get(escaped, escaped)
+            elif char in " \t\r" and not quoted:
+                # Whitespace is kept between words only
+                if char_list:
+                    space += char
+                continue
+            char_list.append(space)
+            char_list.append(char)
+            space = ""
+        if quoted:
+            raise GitConfigError("Unterminated quote")
+        return "".join(char_list), pos
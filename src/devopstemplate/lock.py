@@ -0,0 +1,201 @@
+"""Lock manifest for projects that have been generated from the DevOps template
+
+The manifest (.devopstemplate.lock in the project directory) records the
+configuration of the project and the following hashes for each installed file:
+
+- hash of the template source
+- hash of the context that has been used for rendering the template
+- hash of the rendered output
+
+Files that are up to date can be detected without rendering templates.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+
+from devopstemplate import __version__
+
+LOCK_FNAME = ".devopstemplate.lock"
+LOCK_VERSION_KEY = "version"
+LOCK_CONTEXT_KEY = "context"
+LOCK_COMPONENTS_KEY = "components"
+LOCK_UPGRADABLE_KEY = "upgradable"
+LOCK_FILES_KEY = "files"
+LOCK_TEMPLATE_KEY = "template"
+LOCK_TEMPLATE_HASH_KEY = "template_hash"
+LOCK_CONTEXT_HASH_KEY = "context_hash"
+LOCK_OUTPUT_HASH_KEY = "output_hash"
+
+
+def digest(data: bytes) -> str:
+    """Hash binary data
+
+    Returns: String with the hex digest (sha256)
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def context_digest(context: dict[str, Any]) -> str:
+    """Hash a context dictionary for rendering Jinja2 templates
+
+    Returns: String with the hex digest (sha256) of the context in JSON format
+    """
+    return digest(json.dumps(context, sort_keys=True, default=str).encode("utf-8"))
+
+
+def file_digest(fpath: str) -> str | None:
+    """Hash the contents of a file
+
+    Returns: String with the hex digest (sha256), None if the file does not
+        exist
+    """
+    try:
+        with open(fpath, "rb") as handle:
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+
+
+class ProjectLock:
+    """Represents the lock manifest of a project"""
+
+    def __init__(self, project_dname: str, load: bool = True) -> None:
+        """Load the lock manifest from the project directory if present
+
+        Params:
+            project_dname: String with the path to the project directory
+            load: Boolean specifying whether to load an existing manifest
+                (start with an empty manifest otherwise)
+        """
+        logger = logging.getLogger("ProjectLock.__init__")
+        self.__project_dname = project_dname
+        self.fpath = os.path.join(project_dname, LOCK_FNAME)
+        self.__lock_dict: dict[str, Any] = {}
+        try:
+            if not load:
+                raise FileNotFoundError(self.fpath)
+            with open(self.fpath, "r", encoding="utf-8") as handle:
+                lock_dict = json.load(handle)
+            if not isinstance(lock_dict, dict):
+                raise TypeError("Lock manifest must contain a dictionary")
+            self.__lock_dict = lock_dict
+        except FileNotFoundError:
+            pass
+        except (TypeError, ValueError) as err:
+            logger.warning("Ignoring invalid lock manifest %s: %s", self.fpath, err)
+        self.__lock_dict.setdefault(LOCK_CONTEXT_KEY, {})
+        self.__lock_dict.setdefault(LOCK_COMPONENTS_KEY, [])
+        self.__lock_dict.setdefault(LOCK_FILES_KEY, {})
+
+    @property
+    def context(self) -> dict[str, Any]:
+        """Context that has been used for rendering the project"""
+        return dict(self.__lock_dict[LOCK_CONTEXT_KEY])
+
+    @property
+    def components(self) -> list[str]:
+        """Template components that have been installed in the project"""
+        return list(self.__lock_dict[LOCK_COMPONENTS_KEY])
+
+    @property
+    def upgradable(self) -> bool:
+        """Whether installed outputs are stored as bases for upgrades (see
+        DevOpsTemplate.__init__)
+        """
+        return bool(self.__lock_dict.get(LOCK_UPGRADABLE_KEY, False))
+
+    @property
+    def files(self) -> dict[str, dict[str, str]]:
+        """Dictionary mapping from project files (relative paths) to entries
+        with hashes
+        """
+        return dict(self.__lock_dict[LOCK_FILES_KEY])
+
+    def relpath(self, project_fpath: str) -> str:
+        """Obtain the key of a project file in the manifest
+
+        Returns: String with the path relative to the project directory
+            (separated by "/")
+        """
+        relpath = os.path.relpath(project_fpath, self.__project_dname)
+        return relpath.replace(os.sep, "/")
+
+    def entry(self, project_fpath: str) -> dict[str, str] | None:
+        """Obtain the manifest entry of a project file
+
+        Returns: Dictionary with hashes, None if the file is not recorded
+        """
+        entry: dict[str, str] | None = self.__lock_dict[LOCK_FILES_KEY].get(
+            self.relpath(project_fpath)
+        )
+        return entry
+
+    def is_current(
+        self, project_fpath: str, template_hash: str, context_hash: str
+    ) -> bool:
+        """Check whether a project file is up to date, i.e., it has been
+        rendered from the same template source with the same context and it
+        has not been modified since.
+
+        Params:
+            project_fpath: String with the path to the project file
+            template_hash: String with the hash of the template source
+            context_hash: String with the hash of the rendering context
+        Returns: True if the file does not have to be rendered again
+        """
+        entry = self.entry(project_fpath)
+        if entry is None:
+            return False
+        if (
+            entry.get(LOCK_TEMPLATE_HASH_KEY) != template_hash
+            or entry.get(LOCK_CONTEXT_HASH_KEY) != context_hash
+        ):
+            return False
+        return file_digest(project_fpath) == entry.get(LOCK_OUTPUT_HASH_KEY)
+
+    def update(
+        self,
+        project_fpath: str,
+        pkg_fname: str,
+        template_hash: str,
+        context_hash: str,
+        output_hash: str,
+    ) -> None:
+        """Record the hashes for an installed project file"""
+        self.__lock_dict[LOCK_FILES_KEY][self.relpath(project_fpath)] = {
+            LOCK_TEMPLATE_KEY: pkg_fname,
+            LOCK_TEMPLATE_HASH_KEY: template_hash,
+            LOCK_CONTEXT_HASH_KEY: context_hash,
+            LOCK_OUTPUT_HASH_KEY: output_hash,
+        }
+
+    def update_config(
+        self, context: dict[str, Any], components: list[str], upgradable: bool = False
+    ) -> None:
+        """Record the project configuration. Context values are updated and
+        components are added to the previously recorded configuration. Once
+        the project is upgradable, it remains upgradable.
+        """
+        self.__lock_dict[LOCK_CONTEXT_KEY].update(context)
+        if upgradable:
+            self.__lock_dict[LOCK_UPGRADABLE_KEY] = True
+        component_list = self.__lock_dict[LOCK_COMPONENTS_KEY]
+        for component in components:
+            if component not in component_list:
+                component_list.append(component)
+
+    def dumps(self) -> str:
+        """Serialize the lock manifest
+
+        Returns: String with the manifest in JSON format
+        """
+        self.__lock_dict[LOCK_VERSION_KEY] = __version__
+        return json.dumps(self.__lock_dict, indent=2, sort_keys=True) + "\n"
+
+    def write(self) -> None:
+        """Write the lock manifest to the project directory"""
+        with open(self.fpath, "w", encoding="utf-8") as handle:
+            handle.write(self.dumps())
@@ -1,6 +1,37 @@
 """Initialize the Python logging system"""
 
+import atexit
+import json
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+# Attribute of log records with structured event data (see JsonFormatter),
+# e.g., logger.info("...", extra={LOG_EVENT_KEY: {"event": "file", ...}})
+LOG_EVENT_KEY = "event_data"
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as JSON lines
+
+    Every line is a JSON object with the keys time (seconds since the epoch),
+    level, logger and message. Structured event data of the record (see
+    LOG_EVENT_KEY) is added to the object.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        event_dict: dict[str, Any] = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        event_dict.update(getattr(record, LOG_EVENT_KEY, {}))
+        if record.exc_info:
+            event_dict["exception"] = self.formatException(record.exc_info)
+        return json.dumps(event_dict)
 
 
 class LoggerConfig:
@@ -20,27 +51,125 @@ class LoggerConfig:
         #                     format='%(message)s')
         self.__format_plain = "%(message)s"
         self.__format_debug = "%(asctime)-15s: [%(name)s] %(message)s"
-        self.__handler = logging.StreamHandler()
-        logging.getLogger().addHandler(self.__handler)
+        self.__json = False
+        self.__fmt = self.__format_plain
+        self.__formatter: logging.Formatter = logging.Formatter(self.__format_plain)
+        self.__handler_list: list[logging.Handler] = []
+        # Background thread that passes queued records to the handlers (see
+        # queue), None if handlers are attached to the root logger
+        self.__listener: QueueListener | None = None
+        self.__queue_handler: QueueHandler | None = None
+        self.add_handler(logging.StreamHandler())
         self.info()
+        # Queued records are written before the interpreter exits. Worker
+        # processes do not inherit the listener thread.
+        atexit.register(self.queue, False)
+        os.register_at_fork(after_in_child=self.__detach_queue)
+
+    def add_handler(self, handler: logging.Handler) -> None:
+        """Add a handler to the root logger. The handler uses the log message
+        format of the current log level.
+        """
+        handler.setFormatter(self.__formatter)
+        self.__handler_list.append(handler)
+        if self.__listener is not None:
+            self.__listener.handlers = tuple(self.__handler_list)
+        else:
+            logging.getLogger().addHandler(handler)
+
+    def remove_handler(self, handler: logging.Handler) -> None:
+        """Remove a handler that has been added with add_handler"""
+        self.flush()
+        self.__handler_list.remove(handler)
+        if self.__listener is not None:
+            self.__listener.handlers = tuple(self.__handler_list)
+        else:
+            logging.getLogger().removeHandler(handler)
+
+    def queue(self, enabled: bool = True) -> None:
+        """Switch between writing log records in a background thread and
+        writing them in the logging thread. In queue mode, the root logger
+        only puts records into a queue (messages are formatted when they are
+        queued), i.e., threads do not block on slow streams. Disabling the
+        queue mode writes all queued records.
+        """
+        if enabled == (self.__listener is not None):
+            return
+        root_logger = logging.getLogger()
+        if enabled:
+            record_queue: queue.Queue[logging.LogRecord] = queue.Queue()
+            self.__queue_handler = QueueHandler(record_queue)
+            self.__listener = QueueListener(
+                record_queue, *self.__handler_list, respect_handler_level=True
+            )
+            self.__listener.start()
+            for handler in self.__handler_list:
+                root_logger.removeHandler(handler)
+            root_logger.addHandler(self.__queue_handler)
+        else:
+            listener = self.__listener
+            self.__detach_queue()
+            # Writes the remaining records and stops the thread
+            if listener is not None:
+                listener.stop()
+
+    def queue_enabled(self) -> bool:
+        """True if log records are written in a background thread"""
+        return self.__listener is not None
+
+    def flush(self) -> None:
+        """Wait until all queued log records have been written (queue mode)"""
+        if self.__listener is not None:
+            self.__listener.queue.join()  # type: ignore[attr-defined]
+
+    def __detach_queue(self) -> None:
+        """Attach the handlers to the root logger instead of the queue"""
+        if self.__queue_handler is None:
+            return
+        root_logger = logging.getLogger()
+        for handler in self.__handler_list:
+            root_logger.addHandler(handler)
+        root_logger.removeHandler(self.__queue_handler)
+        self.__listener = None
+        self.__queue_handler = None
+
+    def __set_format(self, fmt: str) -> None:
+        self.__fmt = fmt
+        if self.__json:
+            self.__formatter = JsonFormatter()
+        else:
+            self.__formatter = logging.Formatter(fmt)
+        for handler in self.__handler_list:
+            handler.setFormatter(self.__formatter)
+
+    def json(self, enabled: bool = True) -> None:
+        """Switch between JSON lines (see JsonFormatter) and text log
+        messages. The log level is not changed.
+        """
+        self.__json = enabled
+        self.__set_format(self.__fmt)
+
+    def json_enabled(self) -> bool:
+        """True if log messages are formatted as JSON lines"""
+        return self.__json
 
     def debug(self) -> None:
         """Switch to debug log level. Change level-of-detail for log message.
         (add meta information)
         """
         logging.getLogger().setLevel(logging.DEBUG)
-        self.__handler.setFormatter(logging.Formatter(self.__format_debug))
+        self.__set_format(self.__format_debug)
 
     def info(self) -> None:
         """Switch to info log level. Change level-of-detail for log message.
         (just the log message)
         """
         logging.getLogger().setLevel(logging.INFO)
-        self.__handler.setFormatter(logging.Formatter(self.__format_plain))
+        self.__set_format(self.__format_plain)
 
     def warning(self) -> None:
         """Switch to info log level. Change level-of-detail for log message.
         (just the log message)
         """
         logging.getLogger().setLevel(logging.WARNING)
-        self.__handler.setFormatter(logging.Formatter(self.__format_plain))
+        self.__set_format(self.__format_plain)
@@ -4,15 +4,22 @@ Defines module functions for sub-commands
 """
 
 import argparse
+import contextlib
+import json
 import logging
 import platform
 import sys
+import time
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 import devopstemplate
+from devopstemplate.archive import ARCHIVE_FORMATS, ArchiveWriter, open_archive
 from devopstemplate.config import (
     ARGUMENTS_INTERACTIVE_KEY,
     ARGUMENTS_PROJECT_DIR_KEY,
+    ARGUMENTS_UPGRADABLE_KEY,
+    ARGUMENTS_UPGRADE_KEY,
     COMMANDS_COMPONENTS_KEY,
     COMMANDS_COOKIECUTTER_KEY,
     COMMANDS_CREATE_KEY,
@@ -24,7 +31,30 @@ from devopstemplate.config import (
     CommandsConfig,
     ProjectConfig,
 )
-from devopstemplate.template import DevOpsTemplate
+from devopstemplate.profiling import Profiler
+from devopstemplate.server import TemplateServer, forward, socket_path
+from devopstemplate.static import LINK_MODES
+
+# pylint: disable=import-outside-toplevel
+# Modules that import Jinja2 or multiprocessing (template, batch, scan) are
+# imported by the sub-commands, i.e., --version, --help and argument errors
+# do not import them (see test_main.TestMain.test_imports)
+
+
+@contextlib.contextmanager
+def project_archive(config: ProjectConfig) -> Iterator[ArchiveWriter | None]:
+    """Open the archive for writing the project if requested (--archive)
+
+    Params:
+        config: ProjectConfig object with command-line arguments
+    Returns: Context manager providing an ArchiveWriter object, None if the
+        project is written to the project directory
+    """
+    if config.archive is None:
+        yield None
+        return
+    with open_archive(config.archive, config.archive_format) as archive:
+        yield archive
 
 
 def create(args: argparse.Namespace) -> None:
@@ -33,17 +63,26 @@ def create(args: argparse.Namespace) -> None:
     Params:
         args: argparse.Namespace object with argument parser attributes
     """
-
-    config = ProjectConfig(args)
-    template = DevOpsTemplate(
-        projectdirectory=config.project_dir,
-        overwrite_exists=config.overwrite_exists,
-        skip_exists=config.skip_exists,
-        dry_run=config.dry_run,
-    )
-
-    param_dict, comp_list = config.create()
-    template.create(context=param_dict, components=comp_list)
+    from devopstemplate.template import DevOpsTemplate
+
+    with Profiler.phase("config"):
+        config = ProjectConfig(args)
+    with project_archive(config) as archive:
+        template = DevOpsTemplate(
+            projectdirectory=config.project_dir,
+            overwrite_exists=config.overwrite_exists,
+            skip_exists=config.skip_exists,
+            dry_run=config.dry_run,
+            workers=config.workers,
+            cache=config.cache,
+            archive=archive,
+            link_static=config.link_static,
+            store_bases=config.upgradable,
+        )
+
+        with Profiler.phase("config"):
+            param_dict, comp_list = config.create()
+        template.create(context=param_dict, components=comp_list)
 
 
 def manage(args: argparse.Namespace) -> None:
@@ -52,16 +91,30 @@ def manage(args: argparse.Namespace) -> None:
     Params:
         args: argparse.Namespace object with argument parser attributes
     """
-    config = ProjectConfig(args)
-    template = DevOpsTemplate(
-        projectdirectory=config.project_dir,
-        overwrite_exists=config.overwrite_exists,
-        skip_exists=config.skip_exists,
-        dry_run=config.dry_run,
-    )
-
-    param_dict, comp_list = config.manage()
-    template.manage(context=param_dict, components=comp_list)
+    from devopstemplate.template import DevOpsTemplate
+
+    with Profiler.phase("config"):
+        config = ProjectConfig(args)
+    with project_archive(config) as archive:
+        template = DevOpsTemplate(
+            projectdirectory=config.project_dir,
+            overwrite_exists=config.overwrite_exists,
+            skip_exists=config.skip_exists,
+            dry_run=config.dry_run,
+            workers=config.workers,
+            cache=config.cache,
+            archive=archive,
+            link_static=config.link_static,
+            upgrade=config.upgrade,
+        )
+
+        with Profiler.phase("config"):
+            param_dict, comp_list = config.manage()
+        conflict_list = template.manage(context=param_dict, components=comp_list)
+    if conflict_list:
+        logger = logging.getLogger("main.manage")
+        logger.error("Merge conflicts in: %s", ", ".join(conflict_list))
+        sys.exit(1)
 
 
 def cookiecutter(args: argparse.Namespace) -> None:
@@ -70,16 +123,172 @@ def cookiecutter(args: argparse.Namespace) -> None:
     Params:
         args: argparse.Namespace object with argument parser attributes
     """
-    config = ProjectConfig(args)
+    from devopstemplate.template import DevOpsTemplate
+
+    with Profiler.phase("config"):
+        config = ProjectConfig(args)
+    with project_archive(config) as archive:
+        template = DevOpsTemplate(
+            projectdirectory=config.project_dir,
+            overwrite_exists=config.overwrite_exists,
+            skip_exists=config.skip_exists,
+            dry_run=config.dry_run,
+            workers=config.workers,
+            cache=config.cache,
+            archive=archive,
+            link_static=config.link_static,
+        )
+
+        with Profiler.phase("config"):
+            param_dict, comp_list = config.cookiecutter()
+        template.cookiecutter(context=param_dict, components=comp_list)
+
+
+def diff(args: argparse.Namespace) -> None:
+    """Wrapper for sub-command diff
+
+    Writes JSON lines with the status of project files that differ from the
+    template to stdout. Exits with status 1 if the project has drifted from
+    the template.
+
+    Params:
+        args: argparse.Namespace object with argument parser attributes
+    """
+    from devopstemplate.template import DIFF_UNCHANGED, DevOpsTemplate
+
+    with Profiler.phase("config"):
+        config = ProjectConfig(args)
+    # Nothing is written to the project
     template = DevOpsTemplate(
         projectdirectory=config.project_dir,
-        overwrite_exists=config.overwrite_exists,
-        skip_exists=config.skip_exists,
-        dry_run=config.dry_run,
+        dry_run=True,
+        workers=config.workers,
+        cache=config.cache,
     )
+    with Profiler.phase("config"):
+        param_dict, comp_list = config.diff()
+    drift = False
+    for diff_dict in template.diff(context=param_dict, components=comp_list):
+        if diff_dict["status"] != DIFF_UNCHANGED:
+            drift = True
+        elif not args.all:
+            continue
+        sys.stdout.write(json.dumps(diff_dict) + "\n")
+    if drift:
+        sys.exit(1)
+
+
+def bulk(args: argparse.Namespace) -> None:
+    """Wrapper for sub-command bulk
+
+    Reads JSON lines with parameters for the create command and writes JSON
+    lines with status records to stdout.
+
+    Params:
+        args: argparse.Namespace object with argument parser attributes
+    """
+    if args.spec_file == "-":
+        bulk_lines(sys.stdin, args)
+    else:
+        with open(args.spec_file, "r", encoding="utf-8") as handle:
+            bulk_lines(handle, args)
+
+
+def bulk_lines(lines: Iterable[str], args: argparse.Namespace) -> None:
+    """Generate projects for JSON lines and stream status records to stdout
+
+    Params:
+        lines: Iterable of strings with JSON records.
+        args: argparse.Namespace object with argument parser attributes
+    """
+    from devopstemplate.batch import generate_bulk
+
+    options = {
+        "overwrite_exists": args.overwrite_exists,
+        "skip_exists": args.skip_exists,
+        "dry_run": args.dry_run,
+        "workers": args.workers,
+        "no_cache": args.no_cache,
+        "link_static": args.link_static,
+    }
+    for status in generate_bulk(lines, processes=args.processes, options=options):
+        sys.stdout.write(json.dumps(status) + "\n")
+        sys.stdout.flush()
 
-    param_dict, comp_list = config.cookiecutter()
-    template.cookiecutter(context=param_dict, components=comp_list)
+
+def scan_projects(args: argparse.Namespace) -> None:
+    """Wrapper for sub-command scan
+
+    Writes a JSON line with the status record of each project and a summary
+    record to stdout. Exits with status 1 if a project has drifted from the
+    template or could not be compared.
+
+    Params:
+        args: argparse.Namespace object with argument parser attributes
+    """
+    from devopstemplate.scan import SCAN_DRIFT, SCAN_ERROR, SCAN_OK, scan
+
+    options = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("func", "root", "processes")
+    }
+    start = time.perf_counter()
+    count_dict = {SCAN_OK: 0, SCAN_DRIFT: 0, SCAN_ERROR: 0}
+    for status in scan(args.root, processes=args.processes, options=options):
+        count_dict[status["status"]] += 1
+        sys.stdout.write(json.dumps(status) + "\n")
+        sys.stdout.flush()
+    summary = {
+        "summary": True,
+        "projects": sum(count_dict.values()),
+        **count_dict,
+        "seconds": time.perf_counter() - start,
+    }
+    sys.stdout.write(json.dumps(summary) + "\n")
+    if count_dict[SCAN_DRIFT] or count_dict[SCAN_ERROR]:
+        sys.exit(1)
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Wrapper for sub-command serve
+
+    Compiles all templates and processes commands from clients until
+    interrupted.
+
+    Params:
+        args: argparse.Namespace object with argument parser attributes
+    """
+    from devopstemplate.template import DevOpsTemplate
+
+    logger = logging.getLogger("main.serve")
+    DevOpsTemplate.preload(cache=not args.no_cache)
+    # Command definitions are loaded once, defaults from the git config are
+    # read for every request (working directory of the client)
+    CommandsConfig()
+    server = TemplateServer(args.socket or socket_path(), parse_args)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+
+
+def positive_int(value: str) -> int:
+    """Convert a command-line argument to a positive integer (argparse type)
+
+    Params:
+        value: String with the command-line argument
+    Returns: Integer >= 1
+    Raises:
+        argparse.ArgumentTypeError: if the argument is not a positive integer
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"invalid positive integer: '{value}'")
+    return number
 
 
 def arg_command_group(
@@ -138,12 +347,18 @@ def parse_args(args_list: list[str]) -> None:
         args_list: List of strings with command-line flags (sys.argv[1:])
     """
     logger = logging.getLogger("main.parse_args")
+    # Logging is configured on first access (info messages on stderr)
+    logconfig = devopstemplate.LOGCONFIG
 
+    # Phases before parsing are recorded after --profile has been parsed
+    start = time.perf_counter()
     # Initiate CommandsConfig in order to obtain command definitions
     cfg = CommandsConfig()
+    commands_end = time.perf_counter()
 
     descr = "".join(["Create and manage dev-ops template projects. "])
-    parser = argparse.ArgumentParser(description=descr)
+    # Abbreviated options are not accepted (see server.forwardable)
+    parser = argparse.ArgumentParser(description=descr, allow_abbrev=False)
     # top-level arguments (optional)
     parser.add_argument(
         "--skip-exists",
@@ -159,9 +374,73 @@ def parse_args(args_list: list[str]) -> None:
         "--quiet", action="store_true", help="Print only warning/error messages"
     )
     parser.add_argument("--verbose", action="store_true", help="Print debug messages")
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Print log messages as JSON lines (with per-file metrics)",
+    )
+    parser.add_argument(
+        "--log-async",
+        action="store_true",
+        help="Write log messages in a background thread (slow stderr pipes)",
+    )
     parser.add_argument(
         "--dry-run", action="store_true", help="Pretend to perform actions"
     )
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="Number of threads for rendering and writing files, default: 1",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use cached compiled templates (user cache directory)",
+    )
+    parser.add_argument(
+        "--archive",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Write the project to an archive instead of the project directory"
+            " ('-' for stdout)"
+        ),
+    )
+    parser.add_argument(
+        "--archive-format",
+        choices=ARCHIVE_FORMATS,
+        default=None,
+        help="Archive format, default: from archive file name (stdout: tar.gz)",
+    )
+    parser.add_argument(
+        "--link-static",
+        choices=LINK_MODES,
+        default=None,
+        help=(
+            "Link static template files to copies in the user cache directory"
+            " instead of copying them (reflink: copy-on-write clones, hardlink:"
+            " read-only shared files, reflink for root), falls back to copying if"
+            " not supported"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent in each phase of the command (stderr)",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        default=None,
+        help="Write the time spent in each phase of the command to a JSON file",
+    )
+    parser.add_argument(
+        "--profile-pstats",
+        metavar="PATH",
+        default=None,
+        help="Write a cProfile profile of the command (pstats format)",
+    )
     parser.add_argument("--version", action="store_true", help="Print version")
     # Default for printing help message if no command is provided
     # attribute "func" is set to a lambda function
@@ -172,7 +451,9 @@ def parse_args(args_list: list[str]) -> None:
     subparsers = parser.add_subparsers(help="Commands")
 
     create_parser = subparsers.add_parser(
-        COMMANDS_CREATE_KEY, help=("Create a new project based on the dev-ops template")
+        COMMANDS_CREATE_KEY,
+        help=("Create a new project based on the dev-ops template"),
+        allow_abbrev=False,
     )
     create_parser.add_argument(
         ARGUMENTS_PROJECT_DIR_KEY,
@@ -185,6 +466,14 @@ def parse_args(args_list: list[str]) -> None:
         action="store_true",
         help=("Configure project parameters/components interactively"),
     )
+    create_parser.add_argument(
+        f"--{ARGUMENTS_UPGRADABLE_KEY}",
+        action="store_true",
+        help=(
+            "Store installed files in the user cache directory as bases for"
+            " merging template changes (manage --upgrade)"
+        ),
+    )
 
     arg_command_group(
         create_parser,
@@ -206,13 +495,23 @@ def parse_args(args_list: list[str]) -> None:
     create_parser.set_defaults(func=create)
 
     manage_parser = subparsers.add_parser(
-        COMMANDS_MANAGE_KEY, help=("Add individual components of the dev-ops template")
+        COMMANDS_MANAGE_KEY,
+        help=("Add individual components of the dev-ops template"),
+        allow_abbrev=False,
     )
     manage_parser.add_argument(
         f"--{ARGUMENTS_PROJECT_DIR_KEY}",
         default=".",
         help="Project directory, default: current directory",
     )
+    manage_parser.add_argument(
+        f"--{ARGUMENTS_UPGRADE_KEY}",
+        action="store_true",
+        help=(
+            "Upgrade all installed components: merge template changes into"
+            " modified files (conflicts are marked in the files)"
+        ),
+    )
     arg_command_group(
         manage_parser,
         "project components",
@@ -226,7 +525,9 @@ def parse_args(args_list: list[str]) -> None:
     manage_parser.set_defaults(func=manage)
 
     cc_parser = subparsers.add_parser(
-        COMMANDS_COOKIECUTTER_KEY, help=("Create a cookiecutter template")
+        COMMANDS_COOKIECUTTER_KEY,
+        help=("Create a cookiecutter template"),
+        allow_abbrev=False,
     )
     cc_parser.add_argument(
         ARGUMENTS_PROJECT_DIR_KEY,
@@ -257,7 +558,130 @@ def parse_args(args_list: list[str]) -> None:
     # command, override the func attribute with a pointer to the "cookiecutter"
     # function (defined above) --> overrides default for the main parser.
     cc_parser.set_defaults(func=cookiecutter)
+
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help=(
+            "Compare an existing project with the dev-ops template"
+            " (JSON lines: added/changed/missing files)"
+        ),
+        allow_abbrev=False,
+    )
+    diff_parser.add_argument(
+        f"--{ARGUMENTS_PROJECT_DIR_KEY}",
+        default=".",
+        help="Project directory, default: current directory",
+    )
+    diff_parser.add_argument(
+        "--all", action="store_true", help="Also list unchanged files"
+    )
+    arg_command_group(
+        diff_parser,
+        "project parameters (if not recorded in the project)",
+        group_argument_list=cfg.values_dict(
+            COMMANDS_CREATE_KEY, COMMANDS_PARAMETERS_KEY
+        ),
+    )
+    arg_command_group(
+        diff_parser,
+        "project components (in addition to recorded components)",
+        group_argument_list=cfg.values_dict(
+            COMMANDS_MANAGE_KEY, COMMANDS_COMPONENTS_KEY
+        ),
+    )
+    # If the diff subparser has been activated by the "diff" command,
+    # override the func attribute with a pointer to the "diff" function
+    # (defined above) --> overrides default defined for the main parser.
+    diff_parser.set_defaults(func=diff)
+
+    bulk_parser = subparsers.add_parser(
+        "bulk",
+        help=("Create many projects from JSON lines with create parameters"),
+        allow_abbrev=False,
+    )
+    bulk_parser.add_argument(
+        "spec_file",
+        nargs="?",
+        default="-",
+        help="JSON lines file with one project per line, default: stdin",
+    )
+    bulk_parser.add_argument(
+        "--processes",
+        type=positive_int,
+        default=None,
+        help="Number of worker processes, default: number of CPUs",
+    )
+    # If the bulk subparser has been activated by the "bulk" command,
+    # override the func attribute with a pointer to the "bulk" function
+    # (defined above) --> overrides default defined for the main parser.
+    bulk_parser.set_defaults(func=bulk)
+
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help=(
+            "Compare all projects below a root directory with the dev-ops"
+            " template (JSON lines: status per project)"
+        ),
+        allow_abbrev=False,
+    )
+    scan_parser.add_argument(
+        "root",
+        nargs="?",
+        default=".",
+        help="Root directory that contains the projects, default: current directory",
+    )
+    scan_parser.add_argument(
+        "--processes",
+        type=positive_int,
+        default=None,
+        help="Number of worker processes, default: number of CPUs",
+    )
+    arg_command_group(
+        scan_parser,
+        "project parameters (if not recorded in a project)",
+        group_argument_list=cfg.values_dict(
+            COMMANDS_CREATE_KEY, COMMANDS_PARAMETERS_KEY
+        ),
+    )
+    arg_command_group(
+        scan_parser,
+        "project components (in addition to recorded components)",
+        group_argument_list=cfg.values_dict(
+            COMMANDS_MANAGE_KEY, COMMANDS_COMPONENTS_KEY
+        ),
+    )
+    # If the scan subparser has been activated by the "scan" command,
+    # override the func attribute with a pointer to the "scan_projects"
+    # function (defined above) --> overrides default for the main parser.
+    scan_parser.set_defaults(func=scan_projects)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help=(
+            "Keep templates loaded and process commands from other"
+            " devopstemplate calls (Unix domain socket)"
+        ),
+        allow_abbrev=False,
+    )
+    serve_parser.add_argument(
+        "--socket",
+        default=None,
+        help=(
+            "Path to the server socket, default: $DEVOPSTEMPLATE_SOCKET or"
+            " $XDG_RUNTIME_DIR/devopstemplate.sock"
+        ),
+    )
+    # If the serve subparser has been activated by the "serve" command,
+    # override the func attribute with a pointer to the "serve" function
+    # (defined above) --> overrides default defined for the main parser.
+    serve_parser.set_defaults(func=serve)
     args_ns = parser.parse_args(args=args_list)
+    # Bulk generation writes each project to its own directory
+    if args_ns.func is bulk and (
+        args_ns.archive is not None or args_ns.archive_format is not None
+    ):
+        parser.error("argument --archive/--archive-format: not allowed with bulk")
+    parse_end = time.perf_counter()
 
     # If version flag is set: print version and quit
     if args_ns.version:
@@ -266,27 +690,69 @@ def parse_args(args_list: list[str]) -> None:
 
     # Set log level according to command-line flags
     if args_ns.verbose:
-        devopstemplate.LOGCONFIG.debug()
+        logconfig.debug()
         logger.debug("%s:: %s", platform.node(), " ".join(sys.argv))
         logger.debug("devopstemplate v%s\n", devopstemplate.__version__)
     elif args_ns.quiet:
-        devopstemplate.LOGCONFIG.warning()
+        logconfig.warning()
+    if args_ns.log_json:
+        logconfig.json()
+    if args_ns.log_async:
+        logconfig.queue()
 
     logger.debug("Command-line args: %s", args_list)
-    args_dict = vars(args_ns)
-    logger.debug(
-        "Options:\n%s", ", ".join(f"{key} : {val}" for key, val in args_dict.items())
-    )
-    args_ns.func(args_ns)
+    if logger.isEnabledFor(logging.DEBUG):
+        args_dict = vars(args_ns)
+        logger.debug(
+            "Options:\n%s",
+            ", ".join(f"{key} : {val}" for key, val in args_dict.items()),
+        )
+    if args_ns.profile or args_ns.profile_json or args_ns.profile_pstats:
+        Profiler.enable(start)
+        Profiler.record("commands", start, commands_end)
+        Profiler.record("argparse", commands_end, parse_end)
+        try:
+            profile_command(args_ns)
+        finally:
+            Profiler.disable()
+            report = Profiler.report()
+            if args_ns.profile:
+                sys.stderr.write(Profiler.table(report) + "\n")
+            if args_ns.profile_json:
+                Profiler.write_json(report, args_ns.profile_json)
+    else:
+        args_ns.func(args_ns)
+
+
+def profile_command(args: argparse.Namespace) -> None:
+    """Process a command with cProfile if requested (--profile-pstats)
+
+    Params:
+        args: argparse.Namespace object with argument parser attributes
+    """
+    if args.profile_pstats is None:
+        args.func(args)
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(args.func, args)
+    finally:
+        profiler.dump_stats(args.profile_pstats)
 
 
 def main() -> None:
     """Entrypoint for starting the command-line interface.
     Control-flow continues depending on user arguments.
 
-    Passes all command-line flags sys.argv[1:] to argparse
-    (implemented in parse_args)
+    Forwards all command-line flags sys.argv[1:] to a running server (see
+    serve) or passes them to argparse (implemented in parse_args)
     """
+    Profiler.mark_import()
+    exit_code = forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
     parse_args(sys.argv[1:])
 
 
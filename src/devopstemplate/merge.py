@@ -0,0 +1,107 @@
+"""Three-way merge of text files (upgrading projects, see DevOpsTemplate)
+
+- base: output of the template that has been installed in the project
+- ours: file in the project (may have been modified by the user)
+- theirs: output of the current template
+- lines that have been changed on one side only are taken from that side,
+  lines that have been changed differently on both sides are conflicts and
+  are marked like merge conflicts in git
+"""
+
+from collections.abc import Iterator
+from difflib import SequenceMatcher
+
+MERGE_OURS_MARKER = "<<<<<<< project\n"
+MERGE_SEP_MARKER = "=======\n"
+MERGE_THEIRS_MARKER = ">>>>>>> template\n"
+
+
+def merge3(base: str, ours: str, theirs: str) -> tuple[str, int]:
+    """Merge changes of the project and of the template relative to a
+    common base (line-based)
+
+    Params:
+        base: String with the common base
+        ours: String with the project file
+        theirs: String with the current template output
+    Returns: Tuple with the merged text (conflicts are marked) and the number
+        of conflicts
+    """
+    base_lines = base.splitlines(keepends=True)
+    ours_lines = ours.splitlines(keepends=True)
+    theirs_lines = theirs.splitlines(keepends=True)
+    merged: list[str] = []
+    conflicts = 0
+    for base_chunk, ours_chunk, theirs_chunk in _chunks(
+        base_lines, ours_lines, theirs_lines
+    ):
+        if ours_chunk == theirs_chunk or theirs_chunk == base_chunk:
+            merged.extend(ours_chunk)
+        elif ours_chunk == base_chunk:
+            merged.extend(theirs_chunk)
+        else:
+            conflicts += 1
+            merged.append(MERGE_OURS_MARKER)
+            merged.extend(_terminated(ours_chunk))
+            merged.append(MERGE_SEP_MARKER)
+            merged.extend(_terminated(theirs_chunk))
+            merged.append(MERGE_THEIRS_MARKER)
+    return "".join(merged), conflicts
+
+
+def _chunks(
+    base: list[str], ours: list[str], theirs: list[str]
+) -> Iterator[tuple[list[str], list[str], list[str]]]:
+    """Split the files into chunks that are aligned with the base: stable
+    chunks (unchanged on both sides) alternate with unstable chunks (changed
+    on at least one side)
+
+    Returns: Iterator over tuples with the lines of base, ours and theirs
+    """
+    ours_blocks = SequenceMatcher(None, base, ours, autojunk=False)
+    theirs_blocks = SequenceMatcher(None, base, theirs, autojunk=False)
+    ours_iter = iter(ours_blocks.get_matching_blocks())
+    theirs_iter = iter(theirs_blocks.get_matching_blocks())
+    ours_match = next(ours_iter)
+    theirs_match = next(theirs_iter)
+    base_pos = ours_pos = theirs_pos = 0
+    # Matching blocks end with a sentinel of size 0 (end of the sequences)
+    while True:
+        # Lines of the base that are unchanged on both sides
+        start = max(ours_match.a, theirs_match.a)
+        end = min(ours_match.a + ours_match.size, theirs_match.a + theirs_match.size)
+        if start < end or (ours_match.size == 0 and theirs_match.size == 0):
+            ours_start = ours_match.b + start - ours_match.a
+            theirs_start = theirs_match.b + start - theirs_match.a
+            if (base_pos, ours_pos, theirs_pos) != (start, ours_start, theirs_start):
+                yield (
+                    base[base_pos:start],
+                    ours[ours_pos:ours_start],
+                    theirs[theirs_pos:theirs_start],
+                )
+            if ours_match.size == 0 and theirs_match.size == 0:
+                return
+            yield (
+                base[start:end],
+                ours[ours_start : ours_start + end - start],
+                theirs[theirs_start : theirs_start + end - start],
+            )
+            base_pos = end
+            ours_pos = ours_start + end - start
+            theirs_pos = theirs_start + end - start
+        # Advance the block that ends first (sentinels are not advanced)
+        ours_end = ours_match.a + ours_match.size
+        theirs_end = theirs_match.a + theirs_match.size
+        if ours_end < theirs_end or (ours_end == theirs_end and ours_match.size):
+            ours_match = next(ours_iter)
+        else:
+            theirs_match = next(theirs_iter)
+
+
+def _terminated(lines: list[str]) -> list[str]:
+    """Terminate the last line of a conflict with a newline (markers start
+    on a new line)
+    """
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
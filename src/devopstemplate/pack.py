@@ -0,0 +1,259 @@
+"""Precompiled template pack (built at wheel-build time)
+
+- the pack is a single file in the distribution package that contains the
+  compiled Jinja2 templates (code objects), the properties of the template
+  sources (see static.TemplateSource) and the JSON definitions
+- the CLI loads templates from the pack instead of looking up and compiling
+  template files in the package (PackageLoader)
+- the pack is only used by the Python and Jinja2 versions it has been built
+  with, template files are loaded from the package otherwise
+- the template files in the package are not read if the pack is used (no
+  validation on start-up)
+
+Build the pack with:
+
+    python -m devopstemplate.pack [PATH]
+
+ATTENTION: the pack is trusted for the package version it has been built
+for, rebuild or remove the pack after modifying templates (make pack, make
+clean).
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import logging
+import marshal
+import os
+import sys
+from collections.abc import Callable, MutableMapping
+from types import CodeType
+from typing import Any
+
+import jinja2
+from jinja2 import (
+    BaseLoader,
+    BytecodeCache,
+    Environment,
+    Template,
+    TemplateNotFound,
+    select_autoescape,
+)
+
+from devopstemplate import __version__, pkg
+from devopstemplate.paths import PACK_FNAME
+from devopstemplate.static import TemplateSource
+
+# Directory in the distribution package that contains the template files
+TEMPLATE_DNAME = "template"
+# JSON definitions stored in the pack (read by template.DevOpsTemplate)
+PACK_RESOURCES = (
+    "template.json",
+    "dependencies.json",
+)
+PACK_VERSION_KEY = "version"
+PACK_JINJA_KEY = "jinja"
+PACK_RESOURCES_KEY = "resources"
+PACK_TEMPLATES_KEY = "templates"
+PACK_SOURCES_KEY = "sources"
+
+
+def environment(
+    loader: BaseLoader, bytecode_cache: BytecodeCache | None = None
+) -> Environment:
+    """Create a Jinja2 environment for the template files (the pack is
+    compiled with the same settings)
+
+    Params:
+        loader: Jinja2 loader for the template files
+        bytecode_cache: Jinja2 bytecode cache (optional)
+    Returns: Jinja2 environment
+    """
+    return Environment(
+        loader=loader,
+        autoescape=select_autoescape(default=True),
+        bytecode_cache=bytecode_cache,
+    )
+
+
+class PackLoader(BaseLoader):
+    """Load compiled templates from the pack"""
+
+    def __init__(self, code_dict: dict[str, CodeType]) -> None:
+        """Params:
+        code_dict: Dictionary mapping template names to code objects
+        """
+        self.__code_dict = code_dict
+
+    def load(
+        self,
+        environment: Environment,
+        name: str,
+        globals: MutableMapping[str, Any] | None = None,
+    ) -> Template:
+        # pylint: disable=redefined-builtin
+        # signature of BaseLoader.load
+        code = self.__code_dict.get(name)
+        if code is None:
+            raise TemplateNotFound(name)
+        return environment.template_class.from_code(
+            environment, code, environment.make_globals(globals), None
+        )
+
+    def list_templates(self) -> list[str]:
+        return sorted(self.__code_dict)
+
+
+class TemplatePack:
+    """Compiled templates and definitions from the pack file"""
+
+    # Static variables storing the pack of the distribution package (loaded
+    # once per process, None if not available)
+    __loaded = False
+    __pack: "TemplatePack | None" = None
+
+    def __init__(self, pack_dict: dict[str, Any]) -> None:
+        """Params:
+        pack_dict: Dictionary with the pack contents (see build)
+        """
+        self.__resource_dict: dict[str, str] = pack_dict[PACK_RESOURCES_KEY]
+        self.loader = PackLoader(pack_dict[PACK_TEMPLATES_KEY])
+        self.sources = {
+            name: TemplateSource.restore(*values)
+            for name, values in pack_dict[PACK_SOURCES_KEY].items()
+        }
+
+    def resource(self, resource_name: str) -> str | None:
+        """Obtain a JSON definition
+
+        Params:
+            resource_name: String with the file name in the package
+        Returns: String with the file contents, None if not in the pack
+        """
+        return self.__resource_dict.get(resource_name)
+
+    @staticmethod
+    def read(fpath: str) -> "TemplatePack | None":
+        """Read a pack file
+
+        Params:
+            fpath: String with the path to the pack file
+        Returns: TemplatePack object, None if the file does not exist or if it
+            has been built for other versions (Python, Jinja2, devopstemplate)
+        """
+        logger = logging.getLogger("TemplatePack.read")
+        try:
+            with open(fpath, "rb") as handle:
+                magic = handle.read(len(importlib.util.MAGIC_NUMBER))
+                # Code objects can only be loaded by the same Python version
+                if magic != importlib.util.MAGIC_NUMBER:
+                    logger.debug("Pack %s has been built for another Python", fpath)
+                    return None
+                pack_dict = marshal.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as err:
+            logger.warning("Could not read template pack %s: %s", fpath, err)
+            return None
+        versions = (pack_dict.get(PACK_VERSION_KEY), pack_dict.get(PACK_JINJA_KEY))
+        if versions != (__version__, jinja2.__version__):
+            logger.debug("Pack %s has been built for other versions", fpath)
+            return None
+        return TemplatePack(pack_dict)
+
+    @staticmethod
+    def load() -> "TemplatePack | None":
+        """Load the pack of the distribution package (once per process)
+
+        Returns: TemplatePack object, None if not available
+        """
+        if not TemplatePack.__loaded:
+            # The pack is located next to this module (no package resource
+            # lookup on start-up)
+            pack_fpath = os.path.join(os.path.dirname(__file__), PACK_FNAME)
+            TemplatePack.__pack = TemplatePack.read(pack_fpath)
+            TemplatePack.__loaded = True
+        return TemplatePack.__pack
+
+
+def string(resource_name: str) -> str:
+    """Obtain a JSON definition from the pack or from the package
+
+    Params:
+        resource_name: String with the file name in the package
+    Returns: String with the file contents
+    """
+    template_pack = TemplatePack.load()
+    if template_pack is not None:
+        content = template_pack.resource(resource_name)
+        if content is not None:
+            return content
+    return pkg.string(resource_name)
+
+
+def build(fpath: str) -> int:
+    """Compile all template files and write the pack file
+
+    Params:
+        fpath: String with the path to the pack file
+    Returns: Integer with the number of compiled templates
+    """
+    resource_dict = {
+        resource_name: pkg.string(resource_name) for resource_name in PACK_RESOURCES
+    }
+    template_dict: dict[str, list[str]] = json.loads(resource_dict["template.json"])
+    # Compile without loader, sources are read from the package
+    env = environment(BaseLoader())
+    code_dict: dict[str, CodeType] = {}
+    source_dict: dict[str, tuple[str, int | None, str | None]] = {}
+    for pkg_fname in sorted(set(itertools.chain(*template_dict.values()))):
+        with pkg.stream(os.path.join(TEMPLATE_DNAME, pkg_fname)) as handle:
+            data = handle.read()
+        source = TemplateSource(data)
+        source_dict[pkg_fname] = (
+            source.source_hash,
+            source.static_size,
+            source.static_hash,
+        )
+        code_dict[pkg_fname] = env.compile(
+            data.decode("utf-8"), pkg_fname, os.path.join(TEMPLATE_DNAME, pkg_fname)
+        )
+    pack_dict = {
+        PACK_VERSION_KEY: __version__,
+        PACK_JINJA_KEY: jinja2.__version__,
+        PACK_RESOURCES_KEY: resource_dict,
+        PACK_TEMPLATES_KEY: code_dict,
+        PACK_SOURCES_KEY: source_dict,
+    }
+    tmp_fpath = f"{fpath}.tmp"
+    with open(tmp_fpath, "wb") as handle:
+        handle.write(importlib.util.MAGIC_NUMBER)
+        marshal.dump(pack_dict, handle)
+    os.replace(tmp_fpath, fpath)
+    return len(code_dict)
+
+
+def main(argv: list[str] | None = None, out: Callable[[str], Any] = print) -> None:
+    """Build the pack (devopstemplate.pack command)
+
+    Params:
+        argv: List of strings with command-line arguments (default: sys.argv)
+        out: Function for printing the result
+    """
+    parser = argparse.ArgumentParser(
+        description="Precompile the template files into a single pack file"
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=os.path.join(os.path.dirname(__file__), PACK_FNAME),
+        help="Path to the pack file, default: %(default)s",
+    )
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    count = build(args.path)
+    out(f"Compiled {count} templates into {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Paths of devopstemplate files that are needed on start-up
+
+The module does not depend on Jinja2 (fast start-up of the command-line
+interface, see main).
+"""
+
+import os
+
+CACHE_DNAME = "devopstemplate"
+# Precompiled template pack in the distribution package (see pack)
+PACK_FNAME = "template.pack"
+
+
+def cache_dir() -> str:
+    """Obtain the user cache directory for devopstemplate
+
+    Returns: String with the path to $XDG_CACHE_HOME/devopstemplate
+        ($XDG_CACHE_HOME defaults to ~/.cache)
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, CACHE_DNAME)
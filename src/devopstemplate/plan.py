@@ -0,0 +1,113 @@
+"""Install plan for template components
+
+- components can depend on other components (dependencies.json), e.g., the
+  Sonar configuration uses targets of the Makefile
+- every template file is contained once in the plan, even if it is part of
+  several components
+- components are grouped in levels: components only depend on components of
+  previous levels, i.e., files of a level can be installed concurrently
+"""
+
+import logging
+
+
+class InstallPlan:
+    """Deduplicated install plan for a list of template components
+
+    Attributes:
+        components: List of strings with all components that are installed
+            (requested components and dependencies, in level order)
+        dependencies: Set of strings with components that have not been
+            requested, i.e., that are only installed as dependencies
+        levels: List of lists of strings with the template file paths of each
+            level (see template.json)
+        optional: Set of strings with template file paths that only belong to
+            dependencies (installed if not present in the project)
+    """
+
+    def __init__(
+        self,
+        components: list[str],
+        template_dict: dict[str, list[str]],
+        dependency_dict: dict[str, list[str]],
+    ) -> None:
+        """Resolve dependencies and group the template files in levels
+
+        Params:
+            components: List of strings with the requested components
+            template_dict: Dictionary representing template.json (maps
+                components to template file paths)
+            dependency_dict: Dictionary representing dependencies.json (maps
+                components to the components they depend on)
+        Raises:
+            ValueError: if a component is unknown or if dependencies are
+                cyclic
+        """
+        logger = logging.getLogger("InstallPlan.__init__")
+        # Requested components first (without duplicates), dependencies are
+        # appended in the order in which they are found
+        component_list = list(dict.fromkeys(components))
+        level_dict: dict[str, int] = {}
+        for component in list(component_list):
+            self.__level(component, template_dict, dependency_dict, level_dict, ())
+        for component in level_dict:
+            if component not in component_list:
+                component_list.append(component)
+        self.dependencies = set(component_list) - set(components)
+        self.components = sorted(component_list, key=lambda c: level_dict[c])
+        level_count = max(level_dict.values(), default=-1) + 1
+        self.levels: list[list[str]] = [[] for _ in range(level_count)]
+        requested_set: set[str] = set()
+        file_set: set[str] = set()
+        for component in self.components:
+            logger.debug(" # %s (level %d)", component, level_dict[component])
+            if component not in self.dependencies:
+                requested_set.update(template_dict[component])
+            for template_fpath in template_dict[component]:
+                if template_fpath not in file_set:
+                    file_set.add(template_fpath)
+                    self.levels[level_dict[component]].append(template_fpath)
+        self.optional = file_set - requested_set
+
+    def __level(
+        self,
+        component: str,
+        template_dict: dict[str, list[str]],
+        dependency_dict: dict[str, list[str]],
+        level_dict: dict[str, int],
+        path: tuple[str, ...],
+    ) -> int:
+        """Determine the level of a component (recursively for its
+        dependencies). Components without dependencies have level 0.
+
+        Params:
+            component: String with the component
+            template_dict, dependency_dict: see __init__
+            level_dict: Dictionary mapping components to levels (memo, is
+                updated)
+            path: Tuple of components that depend on the component (for
+                detecting cycles)
+        Returns: Integer with the level of the component
+        Raises:
+            ValueError: if the component is unknown or if dependencies are
+                cyclic
+        """
+        if component in level_dict:
+            return level_dict[component]
+        if component in path:
+            cycle = " -> ".join(path[path.index(component) :] + (component,))
+            raise ValueError(f"Cyclic component dependencies: {cycle}")
+        if component not in template_dict:
+            raise ValueError(f"Unknown template component '{component}'")
+        level = 0
+        for dependency in dependency_dict.get(component, []):
+            dependency_level = self.__level(
+                dependency,
+                template_dict,
+                dependency_dict,
+                level_dict,
+                path + (component,),
+            )
+            level = max(level, dependency_level + 1)
+        level_dict[component] = level
+        return level
@@ -0,0 +1,174 @@
+"""Per-phase timing of devopstemplate commands (--profile)
+
+- phases: import of the package, loading command definitions,
+  constructing/parsing the argument parser, resolving the project
+  configuration (including git config defaults), setting up the Jinja2
+  environment, compiling, rendering and writing template files (per file)
+- phases are only recorded while profiling is enabled (no records are kept
+  in long running processes, see server module)
+- the report is printed as a table or written as JSON, profiles of the
+  Python functions can be written with cProfile (pstats format)
+"""
+
+import contextlib
+import json
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+from typing import Any
+
+from devopstemplate import IMPORT_START
+
+# Number of the slowest files that are listed in the table
+PROFILE_TOP_FILES = 10
+
+
+class Profiler:
+    """Records the wall times of phases of a command (one profile per
+    process, phases can be recorded from several threads)
+    """
+
+    # Static variables storing the profile
+    __enabled = False
+    __start = 0.0
+    __import_seconds: float | None = None
+    __record_list: list[tuple[str, str | None, float]] = []
+    # Context manager for phases that are not recorded
+    __null_context = contextlib.nullcontext()
+
+    @staticmethod
+    def mark_import() -> None:
+        """Record the time that has been spent for importing the package
+        (call on entry to the command-line interface)
+        """
+        Profiler.__import_seconds = time.perf_counter() - IMPORT_START
+
+    @staticmethod
+    def enable(start: float) -> None:
+        """Start recording phases (previous records are discarded)
+
+        Params:
+            start: Float with the start time of the command (perf_counter)
+        """
+        Profiler.__record_list = []
+        Profiler.__start = start
+        Profiler.__enabled = True
+        if Profiler.__import_seconds is not None:
+            # The command starts with the import of the package
+            Profiler.__start = IMPORT_START
+            Profiler.__record_list.append(("import", None, Profiler.__import_seconds))
+
+    @staticmethod
+    def disable() -> None:
+        """Stop recording phases"""
+        Profiler.__enabled = False
+
+    @staticmethod
+    def enabled() -> bool:
+        """True if phases are recorded"""
+        return Profiler.__enabled
+
+    @staticmethod
+    def record(
+        phase: str, start: float, end: float | None = None, detail: str | None = None
+    ) -> None:
+        """Record a phase (if enabled)
+
+        Params:
+            phase: String with the name of the phase
+            start: Float with the start time of the phase (perf_counter)
+            end: Float with the end time of the phase, default: now
+            detail: String specifying the subject of the phase, e.g., a
+                template file. (optional)
+        """
+        if not Profiler.__enabled:
+            return
+        if end is None:
+            end = time.perf_counter()
+        Profiler.__record_list.append((phase, detail, end - start))
+
+    @staticmethod
+    def phase(phase: str, detail: str | None = None) -> AbstractContextManager[None]:
+        """Record the phase of a with statement (if enabled)
+
+        Params:
+            phase: String with the name of the phase
+            detail: String specifying the subject of the phase. (optional)
+        Returns: Context manager
+        """
+        if not Profiler.__enabled:
+            return Profiler.__null_context
+        return Profiler.__timer(phase, detail)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def __timer(phase: str, detail: str | None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Profiler.record(phase, start, detail=detail)
+
+    @staticmethod
+    def report() -> dict[str, Any]:
+        """Summarize the recorded phases
+
+        Returns: Dictionary with the keys
+            seconds: Float with the wall time of the command (including
+                the import if recorded, see mark_import)
+            phases: List of dictionaries with the keys phase, count and
+                seconds (in the order in which phases have been recorded
+                first, phases can overlap if files are written with several
+                workers)
+            files: List of dictionaries with the keys phase, file and seconds
+                (records with details, slowest first)
+        """
+        seconds = time.perf_counter() - Profiler.__start
+        phase_dict: dict[str, dict[str, Any]] = {}
+        file_list: list[dict[str, Any]] = []
+        for phase, detail, phase_seconds in Profiler.__record_list:
+            phase_entry = phase_dict.setdefault(
+                phase, {"phase": phase, "count": 0, "seconds": 0.0}
+            )
+            phase_entry["count"] += 1
+            phase_entry["seconds"] += phase_seconds
+            if detail is not None:
+                file_list.append(
+                    {"phase": phase, "file": detail, "seconds": phase_seconds}
+                )
+        file_list.sort(key=lambda entry: entry["seconds"], reverse=True)
+        return {
+            "seconds": seconds,
+            "phases": list(phase_dict.values()),
+            "files": file_list,
+        }
+
+    @staticmethod
+    def table(report: dict[str, Any]) -> str:
+        """Format a report (see report) as a table
+
+        Returns: String with the table
+        """
+        seconds = report["seconds"]
+        line_list = [f"{'phase':<16}{'count':>8}{'seconds':>12}{'%':>8}"]
+        for entry in report["phases"]:
+            percent = 100 * entry["seconds"] / seconds if seconds else 0.0
+            line_list.append(
+                f"{entry['phase']:<16}{entry['count']:>8}"
+                f"{entry['seconds']:>12.4f}{percent:>8.1f}"
+            )
+        line_list.append(f"{'command':<16}{'':>8}{seconds:>12.4f}")
+        if report["files"]:
+            line_list.append("")
+            line_list.append(f"Slowest files (top {PROFILE_TOP_FILES}):")
+            for entry in report["files"][:PROFILE_TOP_FILES]:
+                line_list.append(
+                    f"{entry['phase']:<16}{entry['seconds']:>12.4f}  {entry['file']}"
+                )
+        return "\n".join(line_list)
+
+    @staticmethod
+    def write_json(report: dict[str, Any], fpath: str) -> None:
+        """Write a report (see report) to a JSON file"""
+        with open(fpath, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
@@ -0,0 +1,186 @@
+"""Scan many projects below a root directory for drift from the DevOps template
+
+- projects are discovered by their lock manifest (.devopstemplate.lock) or
+  heuristically by a Makefile next to pyproject.toml (directories below a
+  project are not scanned)
+- projects are compared with the template (see DevOpsTemplate.diff) with a
+  pool of worker processes, nothing is written to the projects
+- templates are rendered once per distinct context in each worker process,
+  projects that share the referenced parameters share rendered outputs
+- a status record is reported for each project (in the order of completion)
+"""
+
+import argparse
+import functools
+import logging
+import os
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from devopstemplate.batch import OPTION_DEFAULTS, process_unordered
+from devopstemplate.config import (
+    ARGUMENTS_PROJECT_DIR_KEY,
+    COMMANDS_COMPONENTS_KEY,
+    COMMANDS_CREATE_KEY,
+    COMMANDS_MANAGE_KEY,
+    COMMANDS_PARAMETERS_DEFAULT_KEY,
+    COMMANDS_PARAMETERS_KEY,
+    COMMANDS_PARAMETERS_NAME_KEY,
+    CommandsConfig,
+    ProjectConfig,
+)
+from devopstemplate.lock import LOCK_FNAME
+from devopstemplate.template import (
+    DIFF_ADDED,
+    DIFF_CHANGED,
+    DIFF_MISSING,
+    DIFF_UNCHANGED,
+    DevOpsTemplate,
+)
+
+# Files that identify a project without lock manifest (all must be present)
+SCAN_PROJECT_FNAMES = ("Makefile", "pyproject.toml")
+# Directories that are never scanned (in addition to hidden directories)
+SCAN_SKIP_DNAMES = frozenset(
+    ("venv", "node_modules", "__pycache__", "build", "dist", "site-packages")
+)
+# Status of scanned projects
+SCAN_OK = "ok"
+SCAN_DRIFT = "drift"
+SCAN_ERROR = "error"
+
+
+def discover(root: str) -> Iterator[str]:
+    """Find project directories below a root directory (depth-first, sorted)
+
+    A directory is a project if it contains a lock manifest or all files in
+    SCAN_PROJECT_FNAMES. Subdirectories of projects are not scanned.
+
+    Params:
+        root: String with the path to the root directory (can be a project)
+    Returns: Iterator over strings with paths to project directories
+    """
+    logger = logging.getLogger("scan.discover")
+    stack = [root]
+    while stack:
+        dname = stack.pop()
+        try:
+            with os.scandir(dname) as entry_iter:
+                entry_list = list(entry_iter)
+        except OSError as err:
+            logger.warning("Skipping %s: %s", dname, err)
+            continue
+        fname_set = {entry.name for entry in entry_list if entry.is_file()}
+        if LOCK_FNAME in fname_set or fname_set.issuperset(SCAN_PROJECT_FNAMES):
+            yield dname
+            continue
+        subdir_list = [
+            entry.path
+            for entry in entry_list
+            if entry.is_dir(follow_symlinks=False)
+            and not entry.name.startswith(".")
+            and entry.name not in SCAN_SKIP_DNAMES
+        ]
+        # Reversed for visiting subdirectories in sorted order
+        stack.extend(sorted(subdir_list, reverse=True))
+
+
+def scan_args(
+    project_dir: str, options: dict[str, Any] | None = None
+) -> argparse.Namespace:
+    """Define command-line arguments of the diff command for a project
+
+    Params:
+        project_dir: String with the path to the project directory
+        options: Dictionary with top-level command-line options (see
+            batch.OPTION_DEFAULTS) and diff arguments (create parameters,
+            manage components) that apply to all projects. (optional)
+    Returns: argparse.Namespace object for ProjectConfig
+    """
+    cfg = CommandsConfig()
+    # Initialize arguments with defaults as defined for the command-line
+    args_dict: dict[str, Any] = {}
+    for param_dict in cfg.values_dict(COMMANDS_CREATE_KEY, COMMANDS_PARAMETERS_KEY):
+        key = param_dict[COMMANDS_PARAMETERS_NAME_KEY].replace("-", "_")
+        args_dict[key] = param_dict[COMMANDS_PARAMETERS_DEFAULT_KEY]
+    for comp_dict in cfg.values_dict(COMMANDS_MANAGE_KEY, COMMANDS_COMPONENTS_KEY):
+        args_dict[comp_dict[COMMANDS_PARAMETERS_NAME_KEY].replace("-", "_")] = False
+    args_dict.update(OPTION_DEFAULTS)
+    if options is not None:
+        args_dict.update(options)
+    args_dict[ARGUMENTS_PROJECT_DIR_KEY] = project_dir
+    return argparse.Namespace(**args_dict)
+
+
+def scan_project(options: dict[str, Any], project_dir: str) -> dict[str, Any]:
+    """Compare a project with the template (executed in worker processes)
+
+    Params:
+        options: Dictionary with command-line options (see scan_args)
+        project_dir: String with the path to the project directory
+    Returns: Dictionary with the status record (see scan)
+    """
+    logger = logging.getLogger("scan.scan_project")
+    start = time.perf_counter()
+    status: dict[str, Any] = {
+        ARGUMENTS_PROJECT_DIR_KEY: project_dir,
+        "status": SCAN_OK,
+        DIFF_CHANGED: [],
+        DIFF_MISSING: [],
+        DIFF_ADDED: [],
+        DIFF_UNCHANGED: 0,
+        "error": None,
+        "seconds": 0.0,
+    }
+    try:
+        config = ProjectConfig(scan_args(project_dir, options))
+        param_dict, comp_list = config.diff()
+        template = DevOpsTemplate(
+            projectdirectory=config.project_dir,
+            dry_run=True,
+            workers=config.workers,
+            cache=config.cache,
+        )
+        for diff_dict in template.diff(context=param_dict, components=comp_list):
+            if diff_dict["status"] == DIFF_UNCHANGED:
+                status[DIFF_UNCHANGED] += 1
+            else:
+                status[str(diff_dict["status"])].append(diff_dict["path"])
+                status["status"] = SCAN_DRIFT
+    # pylint: disable=broad-exception-caught
+    # errors are reported per project
+    except Exception as err:
+        logger.error("Project %s: %s", project_dir, err)
+        status.update({"status": SCAN_ERROR, "error": str(err)})
+    status["seconds"] = time.perf_counter() - start
+    return status
+
+
+def scan(
+    root: str,
+    processes: int | None = None,
+    options: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Compare all projects below a root directory with the template with a
+    pool of worker processes.
+
+    Projects are discovered lazily while the first projects are compared.
+
+    Params:
+        root: String with the path to the root directory (see discover)
+        processes: Integer with the number of worker processes (default:
+            number of CPUs).
+        options: Dictionary with command-line options (see scan_args).
+            (optional)
+    Returns: Iterator over status records (in the order of completion). A
+        status record is a dictionary with the keys "project_dir", "status"
+        ("ok", "drift" or "error"), "changed", "missing", "added" (lists of
+        file paths relative to the project directory), "unchanged" (number of
+        files), "error" (message or None) and "seconds".
+    """
+    if options is None:
+        options = {}
+    scan_dir = functools.partial(scan_project, options)
+    project_iter = ((project_dir,) for project_dir in discover(root))
+    yield from process_unordered(scan_dir, project_iter, processes)
@@ -0,0 +1,336 @@
+"""Resident process for generating projects (devopstemplate serve)
+
+- the server keeps template definitions, compiled templates and command
+  definitions in memory (defaults from the git config are read for every
+  request)
+- requests are received over a Unix domain socket and processed one after the
+  other
+- the CLI forwards commands to the server if it is running (client mode) and
+  if the server runs the same version, commands are processed locally
+  otherwise (e.g., a server of a previous installation)
+- requests are processed with the environment variables of the client that
+  define user configurations (git config, cache directory, see
+  FORWARD_ENVIRONMENT)
+
+Protocol (JSON lines):
+- greeting (server): {"version": package version}
+- request: {"argv": [command-line args], "cwd": working directory,
+  "env": {name: value or null}}
+- responses: {"log": message} for every log message (streamed), followed by
+  {"exit": exit code, "stdout": output, "stderr": output}
+"""
+
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import sys
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import devopstemplate
+from devopstemplate.paths import cache_dir
+
+SOCKET_ENV = "DEVOPSTEMPLATE_SOCKET"
+SOCKET_FNAME = "devopstemplate.sock"
+# Arguments that are always processed locally (require a terminal/stdin,
+# write binary data to stdout, start a server or worker processes, profile
+# the local process)
+LOCAL_ARGUMENTS = (
+    "serve",
+    "bulk",
+    "scan",
+    "-i",
+    "--interactive",
+    "-h",
+    "--help",
+    "--profile",
+    "--profile-json",
+    "--profile-pstats",
+)
+# Environment variables of the client that are used for processing requests
+# (unset if None)
+FORWARD_ENVIRONMENT = (
+    "HOME",
+    "XDG_CACHE_HOME",
+    "XDG_CONFIG_HOME",
+    "GIT_CONFIG_GLOBAL",
+    "GIT_CONFIG_SYSTEM",
+    "GIT_CONFIG_NOSYSTEM",
+    "GIT_DIR",
+)
+# Seconds to wait for the greeting of the server
+GREETING_TIMEOUT = 5.0
+
+
+def socket_path() -> str:
+    """Obtain the path to the server socket
+
+    Returns: String with the path from $DEVOPSTEMPLATE_SOCKET, default:
+        $XDG_RUNTIME_DIR/devopstemplate.sock (user cache directory if
+        $XDG_RUNTIME_DIR is not set)
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime_dname = os.environ.get("XDG_RUNTIME_DIR") or cache_dir()
+    return os.path.join(runtime_dname, SOCKET_FNAME)
+
+
+def forwardable(args_list: list[str]) -> bool:
+    """Check whether command-line arguments can be processed by the server
+
+    The parser does not accept abbreviated options (allow_abbrev=False),
+    arguments are compared with LOCAL_ARGUMENTS literally.
+
+    Params:
+        args_list: List of strings with command-line flags (sys.argv[1:])
+    Returns: True if the arguments can be forwarded to the server
+    """
+    for arg in args_list:
+        name = arg.split("=")[0]
+        if name in LOCAL_ARGUMENTS:
+            return False
+        # Groups of short options, e.g., -ih
+        if name.startswith("-") and not name.startswith("--"):
+            if any(f"-{char}" in LOCAL_ARGUMENTS for char in name[1:]):
+                return False
+    # Archives on stdout are written locally
+    for arg, next_arg in zip(args_list, args_list[1:] + [""]):
+        if arg == "--archive=-" or (arg == "--archive" and next_arg == "-"):
+            return False
+    return True
+
+
+class ClientLogHandler(logging.Handler):
+    """Send formatted log messages to a client"""
+
+    def __init__(self, send: Callable[[dict[str, Any]], None]) -> None:
+        """Params:
+        send: Function for sending a response message to the client
+        """
+        super().__init__()
+        self.__send = send
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.__send({"log": self.format(record)})
+        except OSError:
+            # Client has disconnected, request is processed nonetheless
+            pass
+
+
+class TemplateServer:
+    """Process CLI requests in a resident process"""
+
+    def __init__(
+        self,
+        path: str,
+        process: Callable[[list[str]], None],
+    ) -> None:
+        """Params:
+        path: String with the path to the server socket
+        process: Function for processing command-line arguments (see
+            main.parse_args)
+        """
+        self.path = path
+        self.__process = process
+
+    def serve(self) -> None:
+        """Listen on the socket and process requests until interrupted"""
+        logger = logging.getLogger("TemplateServer.serve")
+        with self.__listen() as server_sock:
+            logger.info("Listening on %s", self.path)
+            while True:
+                conn, _ = server_sock.accept()
+                with conn:
+                    try:
+                        self.handle(conn)
+                    except OSError as err:
+                        logger.warning("Client disconnected: %s", err)
+
+    @contextlib.contextmanager
+    def __listen(self) -> Iterator[socket.socket]:
+        """Bind the server socket (only accessible by the current user). The
+        socket file is removed when the server stops.
+
+        Raises:
+            RuntimeError: if another server is listening on the socket
+        """
+        if os.path.exists(self.path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe_sock:
+                try:
+                    probe_sock.connect(self.path)
+                except OSError:
+                    # Stale socket file of a server that has not been shut down
+                    os.remove(self.path)
+                else:
+                    raise RuntimeError(f"Server is running already: {self.path}")
+        os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_sock:
+            old_umask = os.umask(0o177)
+            try:
+                server_sock.bind(self.path)
+            finally:
+                os.umask(old_umask)
+            server_sock.listen()
+            try:
+                yield server_sock
+            finally:
+                os.remove(self.path)
+
+    def handle(self, conn: socket.socket) -> None:
+        """Process a single request
+
+        The server sends its version first (the client processes the request
+        locally if the versions differ). The request is processed in the
+        working directory and with the environment (see FORWARD_ENVIRONMENT)
+        of the client. Log messages are streamed to the client, output
+        (stdout/stderr) is sent with the exit code.
+
+        Params:
+            conn: Socket connected to the client
+        """
+        logger = logging.getLogger("TemplateServer.handle")
+
+        def send(message: dict[str, Any]) -> None:
+            conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+        try:
+            send({"version": devopstemplate.__version__})
+        except OSError:
+            # Connection has been closed already (e.g., probe)
+            return
+        with conn.makefile("rb") as reader:
+            request_line = reader.readline()
+        if not request_line:
+            # Connection has been closed without request
+            return
+        try:
+            request = json.loads(request_line)
+            args_list = [str(arg) for arg in request["argv"]]
+            cwd = str(request["cwd"])
+            env_dict = {
+                name: None if value is None else str(value)
+                for name, value in request.get("env", {}).items()
+                if name in FORWARD_ENVIRONMENT
+            }
+        except (AttributeError, KeyError, TypeError, ValueError) as err:
+            send({"exit": 2, "stdout": "", "stderr": f"Invalid request: {err}\n"})
+            return
+        logger.debug("Request: %s (%s)", " ".join(args_list), cwd)
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+        handler = ClientLogHandler(send)
+        # Requests start with default log level and format, the log level and
+        # format of the server are restored afterwards
+        server_level = logging.getLogger().level
+        server_json = devopstemplate.LOGCONFIG.json_enabled()
+        server_queue = devopstemplate.LOGCONFIG.queue_enabled()
+        devopstemplate.LOGCONFIG.json(False)
+        # Messages are sent to the client before the exit status
+        devopstemplate.LOGCONFIG.queue(False)
+        devopstemplate.LOGCONFIG.info()
+        devopstemplate.LOGCONFIG.add_handler(handler)
+        server_cwd = os.getcwd()
+        server_env_dict = {name: os.environ.get(name) for name in env_dict}
+        try:
+            os.chdir(cwd)
+            self.__environ(env_dict)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                self.__process(args_list)
+        except SystemExit as err:
+            exit_code = err.code if isinstance(err.code, int) else 1
+        # pylint: disable=broad-exception-caught
+        # errors are reported to the client, the server keeps running
+        except Exception as err:
+            stderr.write(f"{type(err).__name__}: {err}\n")
+            exit_code = 1
+        finally:
+            os.chdir(server_cwd)
+            self.__environ(server_env_dict)
+            devopstemplate.LOGCONFIG.remove_handler(handler)
+            if server_level <= logging.DEBUG:
+                devopstemplate.LOGCONFIG.debug()
+            elif server_level >= logging.WARNING:
+                devopstemplate.LOGCONFIG.warning()
+            else:
+                devopstemplate.LOGCONFIG.info()
+            devopstemplate.LOGCONFIG.json(server_json)
+            devopstemplate.LOGCONFIG.queue(server_queue)
+        send(
+            {
+                "exit": exit_code,
+                "stdout": stdout.getvalue(),
+                "stderr": stderr.getvalue(),
+            }
+        )
+
+    @staticmethod
+    def __environ(env_dict: dict[str, str | None]) -> None:
+        """Set environment variables (unset if None)"""
+        for name, value in env_dict.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def forward(args_list: list[str], path: str | None = None) -> int | None:
+    """Forward command-line arguments to a running server (client mode)
+
+    Log messages and output of the server are written to stderr/stdout.
+
+    Params:
+        args_list: List of strings with command-line flags (sys.argv[1:])
+        path: String with the path to the server socket, default: socket_path
+    Returns: Integer with the exit code, None if the server is not running,
+        if the server runs a different version or if the arguments have to be
+        processed locally
+    """
+    if not forwardable(args_list):
+        return None
+    if path is None:
+        path = socket_path()
+    if not os.path.exists(path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client_sock:
+        try:
+            client_sock.connect(path)
+        except OSError:
+            return None
+        with client_sock.makefile("rb") as reader:
+            client_sock.settimeout(GREETING_TIMEOUT)
+            try:
+                greeting = json.loads(reader.readline())
+                server_version = greeting["version"]
+            except (OSError, KeyError, TypeError, ValueError):
+                return None
+            if server_version != devopstemplate.__version__:
+                sys.stderr.write(
+                    f"Server {path} runs version {server_version}, processing"
+                    " locally (restart the server)\n"
+                )
+                return None
+            client_sock.settimeout(None)
+            request = {
+                "argv": args_list,
+                "cwd": os.getcwd(),
+                "env": {name: os.environ.get(name) for name in FORWARD_ENVIRONMENT},
+            }
+            client_sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            for line in reader:
+                message = json.loads(line)
+                if "log" in message:
+                    sys.stderr.write(message["log"] + "\n")
+                    continue
+                sys.stdout.write(message["stdout"])
+                sys.stderr.write(message["stderr"])
+                exit_code: int = message["exit"]
+                return exit_code
+    # Connection closed without result
+    sys.stderr.write("Server closed the connection\n")
+    return 1
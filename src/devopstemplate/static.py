@@ -0,0 +1,205 @@
+"""Install static template files without rendering
+
+A template file is static if it does not contain template syntax. Rendering a
+static file with Jinja2 reproduces the source except for a single trailing
+newline which is removed (keep_trailing_newline=False). Static files are
+copied in the kernel (os.copy_file_range, os.sendfile) if possible.
+
+Optionally, static files are linked to a copy in the object store (see
+cache.ObjectStore):
+- reflink: copy-on-write clone of the object (file systems with reflink
+  support, e.g., Btrfs, XFS), the project file can be modified safely
+- hardlink: the project file shares the read-only object, in-place
+  modifications fail, editors/tools that replace the file are not affected.
+  File permissions do not restrict root, hardlinks are not used for root
+  (reflinks or copies are used instead).
+"""
+
+import io
+import os
+from typing import BinaryIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (not available on Windows)
+    fcntl = None  # type: ignore[assignment]
+
+from devopstemplate.lock import digest
+
+# Tokens that start template syntax (variables, statements, comments)
+TEMPLATE_TOKENS = ("{{", "{%", "{#")
+# Buffer size for copying files in user space
+COPY_BUFSIZE = 1024 * 1024
+# Modes for linking static files (see link_file)
+LINK_REFLINK = "reflink"
+LINK_HARDLINK = "hardlink"
+LINK_MODES = (LINK_REFLINK, LINK_HARDLINK)
+# ioctl request for cloning a file on Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+
+class TemplateSource:
+    """Properties of a template file in the distribution package
+
+    Attributes:
+        source_hash: String with the hash of the template source.
+        static_size: Integer with the size of the rendered output if the
+            template is static, None otherwise.
+        static_hash: String with the hash of the rendered output if the
+            template is static, None otherwise.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        """Classify a template file
+
+        Params:
+            data: Bytes with the template source
+        """
+        self.source_hash = digest(data)
+        self.static_size: int | None = None
+        self.static_hash: str | None = None
+        if is_static(data):
+            # Jinja2 removes a single trailing newline
+            size = len(data) - 1 if data.endswith(b"\n") else len(data)
+            self.static_size = size
+            self.static_hash = digest(data[:size])
+
+    @classmethod
+    def restore(
+        cls, source_hash: str, static_size: int | None, static_hash: str | None
+    ) -> "TemplateSource":
+        """Create a TemplateSource object from its attributes (e.g., stored in
+        the template pack) without reading the template source
+
+        Returns: TemplateSource object
+        """
+        source = cls.__new__(cls)
+        source.source_hash = source_hash
+        source.static_size = static_size
+        source.static_hash = static_hash
+        return source
+
+
+def is_static(data: bytes) -> bool:
+    """Check whether a template source renders to itself, i.e., it contains
+    no template syntax and Jinja2 does not normalize its line endings.
+
+    Params:
+        data: Bytes with the template source
+    Returns: True if the template source is static
+    """
+    if b"\r" in data:
+        return False
+    if any(token.encode("ascii") in data for token in TEMPLATE_TOKENS):
+        return False
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def copy_file(src_handle: BinaryIO, dst_fpath: str, size: int) -> None:
+    """Copy the first bytes of a file without passing the data through user
+    space (os.copy_file_range, os.sendfile). Falls back to a buffered copy if
+    kernel copies are not supported (platform, file systems, file objects
+    without file descriptor).
+
+    Params:
+        src_handle: Binary file object of the source file (positioned at the
+            beginning)
+        dst_fpath: String with the path to the target file (created or
+            truncated)
+        size: Integer with the number of bytes to copy
+    """
+    with open(dst_fpath, "wb") as dst_handle:
+        offset = 0
+        for copy_name in ("copy_file_range", "sendfile"):
+            copy = getattr(os, copy_name, None)
+            if copy is None:
+                continue
+            try:
+                src_fd = src_handle.fileno()
+                dst_fd = dst_handle.fileno()
+                while offset < size:
+                    if copy_name == "sendfile":
+                        count = copy(dst_fd, src_fd, offset, size - offset)
+                    else:
+                        count = copy(src_fd, dst_fd, size - offset, offset)
+                    if count == 0:
+                        break
+                    offset += count
+            except (OSError, io.UnsupportedOperation):
+                # Not supported for these files (or no file descriptor, e.g.,
+                # in-memory files), the target file offset is advanced by the
+                # bytes that have been copied already
+                continue
+            if offset >= size:
+                return
+        src_handle.seek(offset)
+        remaining = size - offset
+        while remaining > 0:
+            chunk = src_handle.read(min(remaining, COPY_BUFSIZE))
+            if not chunk:
+                break
+            dst_handle.write(chunk)
+            remaining -= len(chunk)
+
+
+def unshare(fpath: str) -> None:
+    """Remove a file if it has multiple (hard) links, e.g., to the object
+    store, such that writing the file does not modify the shared content.
+
+    Params:
+        fpath: String with the path to the file (may not exist)
+    """
+    try:
+        if os.stat(fpath).st_nlink > 1:
+            os.remove(fpath)
+    except FileNotFoundError:
+        pass
+
+
+def link_file(object_fpath: str, dst_fpath: str, mode: str) -> bool:
+    """Link a file to an object in the object store (see LINK_MODES). An
+    existing target file is replaced.
+
+    Params:
+        object_fpath: String with the path to the object file
+        dst_fpath: String with the path to the target file
+        mode: String with the link mode (reflink, hardlink)
+    Returns: True if the file has been linked, False if linking is not
+        supported (platform, file systems, different devices). The target
+        file may have been truncated then. Hardlinks fall back to reflinks
+        for root (read-only objects could be modified through the link).
+    Raises:
+        ValueError: if the mode is unknown
+    """
+    if mode == LINK_REFLINK:
+        if fcntl is None:
+            return False
+        try:
+            with (
+                open(object_fpath, "rb") as src_handle,
+                open(dst_fpath, "wb") as dst_handle,
+            ):
+                fcntl.ioctl(dst_handle.fileno(), FICLONE, src_handle.fileno())
+        except OSError:
+            return False
+        return True
+    if mode == LINK_HARDLINK:
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            return link_file(object_fpath, dst_fpath, LINK_REFLINK)
+        tmp_fpath = f"{dst_fpath}.{os.getpid()}.link"
+        try:
+            os.link(object_fpath, tmp_fpath)
+            os.replace(tmp_fpath, dst_fpath)
+            # Replacing a link to the same file has no effect
+            if os.path.lexists(tmp_fpath):
+                os.remove(tmp_fpath)
+        except OSError:
+            if os.path.lexists(tmp_fpath):
+                os.remove(tmp_fpath)
+            return False
+        return True
+    raise ValueError(f"Unknown link mode '{mode}'")
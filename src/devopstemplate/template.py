@@ -3,22 +3,63 @@
 - defines how components/files will be installed according to user requests
 """
 
+import asyncio
+import hashlib
+import itertools
 import json
 import logging
 import os
-from typing import Any
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, ClassVar
 
-from jinja2 import Environment, PackageLoader, Template, select_autoescape
+from jinja2 import Environment, PackageLoader, Template, meta, nodes
 
-from devopstemplate import pkg
+from devopstemplate import pack, pkg
+from devopstemplate.archive import ArchiveWriter
+from devopstemplate.cache import ObjectStore, TemplateBytecodeCache
 from devopstemplate.config import (
     ARGUMENTS_PROJECT_NAME_KEY,
     ARGUMENTS_PROJECT_SLUG_KEY,
     COOKIECUTTER_FNAME,
+    DEPENDENCIES_FNAME,
     TEMPLATES_FNAME,
 )
+from devopstemplate.lock import (
+    LOCK_OUTPUT_HASH_KEY,
+    LOCK_TEMPLATE_KEY,
+    ProjectLock,
+    context_digest,
+    digest,
+    file_digest,
+)
+from devopstemplate.log import LOG_EVENT_KEY
+from devopstemplate.merge import merge3
+from devopstemplate.paths import PACK_FNAME
+from devopstemplate.plan import InstallPlan
+from devopstemplate.profiling import Profiler
+from devopstemplate.static import (
+    LINK_MODES,
+    TEMPLATE_TOKENS,
+    TemplateSource,
+    copy_file,
+    link_file,
+    unshare,
+)
 
 COOKIECUTTER_README_FNAME = "README.md"
+# Status of project files compared to the template (see DevOpsTemplate.diff)
+DIFF_ADDED = "added"
+DIFF_CHANGED = "changed"
+DIFF_MISSING = "missing"
+DIFF_UNCHANGED = "unchanged"
+# Maximum number of rendered outputs (sizes and hashes) that are kept for
+# comparing files (see DevOpsTemplate.diff)
+OUTPUT_CACHE_SIZE = 4096
 
 
 class SkipFileError(FileExistsError):
@@ -27,6 +68,146 @@ class SkipFileError(FileExistsError):
     """
 
 
+class InstallFile:
+    """Template file that will be installed to the project
+
+    Attributes:
+        pkg_fname: String specifying the file in the distribution package
+        project_fpath: String specifying the path to the target file
+        write: Boolean specifying whether the file will be written (False if
+            the file is overwritten by a later item in an archive, see
+            DevOpsTemplate.__preflight)
+        exists: Boolean specifying whether the target file exists
+        level: Integer with the level of the file in the install plan (see
+            plan.InstallPlan)
+        base_hash: String with the hash of the previously installed output if
+            the target file is upgraded (see DevOpsTemplate.__upgrade_file),
+            None otherwise
+        store_base: Boolean specifying whether the installed output is stored
+            in the object store (base for future upgrades)
+        size: Integer with the number of bytes that have been written (0 if
+            the target file has not been modified)
+        render_seconds: Float with the time for compiling and rendering the
+            template
+        write_seconds: Float with the time for writing (copying, merging)
+            the target file
+        conflict: Boolean specifying whether the upgraded target file has
+            merge conflicts or could not be merged
+    """
+
+    def __init__(
+        self,
+        pkg_fname: str,
+        project_fpath: str,
+        write: bool,
+        exists: bool,
+        level: int = 0,
+        base_hash: str | None = None,
+        store_base: bool = False,
+    ) -> None:
+        self.pkg_fname = pkg_fname
+        self.project_fpath = project_fpath
+        self.write = write
+        self.exists = exists
+        self.level = level
+        self.base_hash = base_hash
+        self.store_base = store_base
+        self.size = 0
+        self.render_seconds = 0.0
+        self.write_seconds = 0.0
+        self.conflict = False
+
+
+class ProjectIndex:
+    """Index of existing entries in a project directory tree
+
+    A directory is listed with a single os.scandir call when it is looked up
+    for the first time. Directories within the project root are only listed
+    if they exist according to their parent directory. Entries that will be
+    created can be added to the index.
+    """
+
+    def __init__(self, project_dname: str) -> None:
+        """Initialize an empty index
+
+        Params:
+            project_dname: String with the path to the project root directory
+        """
+        self.__root_dname = os.path.abspath(project_dname)
+        # Maps directory paths to the names of their entries
+        # (None if the directory does not exist)
+        self.__entry_dict: dict[str, set[str] | None] = {}
+
+    def exists(self, path: str) -> bool:
+        """Check whether a file or directory exists
+
+        Params:
+            path: String with the path to the file or directory
+        Returns: True if the path exists (or has been added to the index)
+        """
+        dname, name = os.path.split(os.path.abspath(path))
+        entry_set = self.__entries(dname)
+        return entry_set is not None and name in entry_set
+
+    def add(self, path: str) -> list[str]:
+        """Add a file that will be created to the index
+
+        Params:
+            path: String with the path to the file
+        Returns: List of directories that have to be created for the file
+            (parent directories first)
+        """
+        dname, name = os.path.split(os.path.abspath(path))
+        dname_list = self.__add_dir(dname)
+        entry_set = self.__entry_dict[dname]
+        if entry_set is not None:
+            entry_set.add(name)
+        return dname_list
+
+    def __add_dir(self, dname: str) -> list[str]:
+        """Add a directory to the index (including parent directories)
+
+        Returns: List of directories that do not exist (parent directories
+            first)
+        """
+        if self.__entries(dname) is not None:
+            return []
+        parent_dname, name = os.path.split(dname)
+        dname_list = []
+        if parent_dname != dname:
+            dname_list = self.__add_dir(parent_dname)
+            parent_entry_set = self.__entry_dict[parent_dname]
+            if parent_entry_set is not None:
+                parent_entry_set.add(name)
+        self.__entry_dict[dname] = set()
+        dname_list.append(dname)
+        return dname_list
+
+    def __entries(self, dname: str) -> set[str] | None:
+        """Obtain the names of the entries of a directory
+
+        Returns: Set of strings, None if the directory does not exist
+        """
+        if dname in self.__entry_dict:
+            return self.__entry_dict[dname]
+        entry_set: set[str] | None = None
+        # A directory within the project root can only exist if it is listed
+        # in its parent directory
+        parent_dname, name = os.path.split(dname)
+        if dname.startswith(self.__root_dname + os.sep):
+            parent_entry_set = self.__entries(parent_dname)
+            if parent_entry_set is None or name not in parent_entry_set:
+                self.__entry_dict[dname] = None
+                return None
+        try:
+            with os.scandir(dname) as entry_iter:
+                entry_set = {entry.name for entry in entry_iter}
+        except OSError:
+            entry_set = None
+        self.__entry_dict[dname] = entry_set
+        return entry_set
+
+
 class DevOpsTemplate:
     """Create and modify instances of the DevOps template:
 
@@ -35,12 +216,46 @@ class DevOpsTemplate:
     cookiecutter: generate cookiecutter template from the devops template
     """
 
+    # Directory in the distribution package that contains the template files
+    __template_dname = "template"
+    # Static variables storing the template definitions (template.json,
+    # dependencies.json) and the Jinja2 environments (with and without
+    # bytecode cache)
+    __template_dict: ClassVar[dict[str, list[str]]] = {}
+    __dependency_dict: ClassVar[dict[str, list[str]]] = {}
+    __env_dict: ClassVar[dict[bool, Environment]] = {}
+    # Static variable storing compiled templates for file paths in
+    # template.json (None for literal paths without template syntax)
+    __path_template_dict: ClassVar[dict[str, Template | None]] = {}
+    # Static variable storing properties of template sources (hashes, static
+    # files without template syntax)
+    __source_dict: ClassVar[dict[str, TemplateSource]] = {}
+    # Static variable storing install plans for lists of components
+    __plan_dict: ClassVar[dict[tuple[str, ...], InstallPlan]] = {}
+    # Static variables storing the context variables referenced by templates
+    # (None if the template includes other templates) and the sizes and
+    # hashes of rendered outputs (keyed by template and referenced context,
+    # least recently used outputs are dropped, see OUTPUT_CACHE_SIZE)
+    __variable_dict: ClassVar[dict[str, frozenset[str] | None]] = {}
+    __output_dict: ClassVar[OrderedDict[tuple[str, str], tuple[int, str]]] = (
+        OrderedDict()
+    )
+    # Lock for the static variables (instances are used by several threads,
+    # see workers, acreate/amanage)
+    __cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(
         self,
         projectdirectory: str,
         overwrite_exists: bool = False,
         skip_exists: bool = False,
         dry_run: bool = False,
+        workers: int = 1,
+        cache: bool = True,
+        archive: ArchiveWriter | None = None,
+        link_static: str | None = None,
+        upgrade: bool = False,
+        store_bases: bool = False,
     ) -> None:
         """Provide configurations that are common to all DevOpsTemplate actions
 
@@ -53,34 +268,676 @@ class DevOpsTemplate:
                 skipped/ignores. An error is raised otherwise.
             dry_run: Boolean specifying whether to not perform any actions in
                 order to see (in the log) what would have happened.
+            workers: Number of threads for rendering and writing template
+                files. Files are installed sequentially if workers <= 1.
+            cache: Boolean specifying whether to load/store compiled templates
+                from/in the user cache directory.
+            archive: ArchiveWriter object for writing the project to an
+                archive instead of the project directory. Files are stored
+                below the base name of the project directory and are written
+                sequentially. Nothing is written to disk. (optional)
+            link_static: String specifying whether static template files
+                (without template syntax) are linked to a copy in the object
+                store of the user cache directory instead of being copied
+                (see static.LINK_MODES: reflink, hardlink). Files are copied
+                if linking is not supported. (optional)
+            upgrade: Boolean specifying whether existing files that have been
+                installed from the template (see lock manifest) are upgraded:
+                changes of the template are merged with changes in the
+                project (three-way merge with the installed output, see
+                merge module). Upgraded outputs are stored as bases for the
+                next upgrade (see store_bases).
+            store_bases: Boolean specifying whether installed outputs are
+                stored in the object store of the user cache directory as
+                bases for future upgrades. Outputs are only stored if the
+                lock manifest is written and cache=True. The lock manifest
+                records that the project is upgradable, later calls store
+                outputs as well.
+        Raises:
+            ValueError: if link_static is not a valid link mode
         """
+        if link_static is not None and link_static not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_static}'")
         self.__project_dir = projectdirectory
+        self.__archive = archive
+        self.__archive_root = projectdirectory
         self.__overwrite = overwrite_exists
         self.__skip = skip_exists
         self.__dry_run = dry_run
-        with pkg.stream(TEMPLATES_FNAME) as handle:
-            self.__template_dict = json.load(handle)
-        self.__template_dname = "template"
-        # ATTENTION: using __package__ may only work as long as this module
-        # (template.py) is located in the top-level import directory
-        loader = PackageLoader(__package__, self.__template_dname)
-        self.__env = Environment(
-            loader=loader, autoescape=select_autoescape(default=True)
-        )
+        self.__workers = workers
+        self.__link_static = link_static
+        self.__upgrade = upgrade
+        self.__store_bases = store_bases or upgrade
+        self.__cache = cache
+        self.__objects = ObjectStore()
+        self.__env = self.__load(cache)
         # Create project base directory if not present
         self.__mkdir(projectdirectory)
 
-    def __components(self, context: dict[str, Any], components: list[str]) -> None:
+    @staticmethod
+    def __load(cache: bool) -> Environment:
+        """Load template definitions and the Jinja2 environment if not loaded
+        already. Both are shared by all instances (avoids reloading and
+        recompiling templates).
+
+        Params:
+            cache: Boolean specifying whether to load/store compiled templates
+                from/in the user cache directory.
+        Returns: Jinja2 environment
+        """
+        start = time.perf_counter()
+        with DevOpsTemplate.__cache_lock:
+            if not DevOpsTemplate.__template_dict:
+                # Definitions and template sources are obtained from the
+                # precompiled pack if available
+                template_pack = pack.TemplatePack.load()
+                if template_pack is not None:
+                    DevOpsTemplate.__source_dict.update(template_pack.sources)
+                template_dict = json.loads(pack.string(TEMPLATES_FNAME))
+                DevOpsTemplate.__dependency_dict = json.loads(
+                    pack.string(DEPENDENCIES_FNAME)
+                )
+                DevOpsTemplate.__path_template_dict = DevOpsTemplate.__compile_paths(
+                    template_dict
+                )
+                DevOpsTemplate.__template_dict = template_dict
+            if cache not in DevOpsTemplate.__env_dict:
+                DevOpsTemplate.__env_dict[cache] = DevOpsTemplate.__environment(cache)
+            env = DevOpsTemplate.__env_dict[cache]
+        Profiler.record("environment", start)
+        return env
+
+    @staticmethod
+    def preload(cache: bool = True) -> None:
+        """Load template definitions and compile all templates in advance,
+        e.g., in a long running process (see server module). Compiled
+        templates are kept by the Jinja2 environment.
+
+        Params:
+            cache: Boolean specifying whether to load/store compiled templates
+                from/in the user cache directory.
+        """
+        env = DevOpsTemplate.__load(cache)
+        for pkg_fname in set(itertools.chain(*DevOpsTemplate.__template_dict.values())):
+            env.get_template(pkg_fname)
+
+    @staticmethod
+    def __environment(cache: bool) -> Environment:
+        """Create the Jinja2 environment for loading templates from the
+        distribution package
+
+        Templates are loaded from the precompiled pack if available (see
+        pack module), the bytecode cache is not needed then.
+
+        Params:
+            cache: Boolean specifying whether to load/store compiled templates
+                from/in the user cache directory.
+        Returns: Jinja2 environment
+        """
+        logger = logging.getLogger("DevOpsTemplate.__environment")
+        template_pack = pack.TemplatePack.load()
+        if template_pack is not None:
+            logger.debug("Loading templates from %s", PACK_FNAME)
+            return pack.environment(template_pack.loader)
+        # ATTENTION: using __package__ may only work as long as this module
+        # (template.py) is located in the top-level import directory
+        loader = PackageLoader(__package__, DevOpsTemplate.__template_dname)
+        # Compiled templates are cached in the user cache directory if possible
+        bytecode_cache = None
+        if cache:
+            try:
+                bytecode_cache = TemplateBytecodeCache()
+            except OSError as err:
+                logger.debug("Template cache not available: %s", err)
+        return pack.environment(loader, bytecode_cache)
+
+    @staticmethod
+    def __compile_paths(
+        template_dict: dict[str, list[str]],
+    ) -> dict[str, Template | None]:
+        """Compile the file paths of all template components. File paths can
+        contain template variables, e.g., the project slug.
+
+        Params:
+            template_dict: Dictionary representing template.json
+        Returns: Dictionary mapping from file paths to compiled templates,
+            None for literal file paths (without template syntax)
+        """
+        path_template_dict: dict[str, Template | None] = {}
+        for template_fpath in itertools.chain(*template_dict.values()):
+            if any(token in template_fpath for token in TEMPLATE_TOKENS):
+                path_template_dict[template_fpath] = Template(template_fpath)
+            else:
+                path_template_dict[template_fpath] = None
+        return path_template_dict
+
+    def __render_path(self, template_fpath: str, context: dict[str, Any]) -> str:
+        """Render a file path from template.json (paths can contain template
+        variables)
+
+        Params:
+            template_fpath: String specifying the file path in template.json
+            context: Dictionary with the context for rendering Jinja2
+                templates.
+        Returns: String with the file path in the project
+        """
+        path_template = self.__path_template_dict[template_fpath]
+        if path_template is None:
+            return template_fpath
+        return path_template.render(**context)
+
+    def __source(self, pkg_fname: str) -> TemplateSource:
+        """Hash and classify the source of a template file (sources are read
+        once per process)
+
+        Params:
+            pkg_fname: String specifying the file in the distribution package
+        Returns: TemplateSource object
+        """
+        with DevOpsTemplate.__cache_lock:
+            source = DevOpsTemplate.__source_dict.get(pkg_fname)
+        if source is None:
+            pkg_fpath = os.path.join(self.__template_dname, pkg_fname)
+            with pkg.stream(pkg_fpath) as handle:
+                source = TemplateSource(handle.read())
+            with DevOpsTemplate.__cache_lock:
+                DevOpsTemplate.__source_dict[pkg_fname] = source
+        return source
+
+    def __components(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str,
+        lock: bool = True,
+    ) -> list[str]:
         """Install components for the DevOps template given the context for rendering
         Jinja2 templates and the list of components to install.
+
+        Components are resolved into an install plan (see __plan). All
+        component files are checked for conflicts before any file is
+        installed. The installed files are recorded in the lock manifest of
+        the project (unless lock=False). Files that are up to date according
+        to the manifest are not installed again.
+
+        The target directory is passed with every call (no instance state),
+        such that an instance can install to several directories
+        concurrently.
+
+        Returns: List of strings with the paths to files with merge conflicts
+            (upgrade mode, see __upgrade_file)
+        """
+        level_list, optional, project_lock = self.__component_files(
+            context, components, project_dir, lock
+        )
+        conflict_list = self.__install_files(
+            level_list, context, project_dir, project_lock, optional
+        )
+        self.__write_lock(project_lock, context, components)
+        return conflict_list
+
+    async def __acomponents(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str,
+        lock: bool = True,
+    ) -> list[str]:
+        """Install components for the DevOps template without blocking the
+        event loop (see __components). Rendering and file system operations
+        are performed in worker threads. The number of files that are
+        rendered/written concurrently is limited by the number of workers.
+
+        Files of a level of the install plan are written concurrently. If the
+        task is cancelled, files that are written already remain in the
+        project and the lock manifest is not updated.
+
+        Returns: List of strings with the paths to files with merge conflicts
+        """
+        start = time.perf_counter()
+        level_list, optional, project_lock = await asyncio.to_thread(
+            self.__component_files, context, components, project_dir, lock
+        )
+        context_hash = context_digest(context)
+        install_list = await asyncio.to_thread(
+            self.__prepare,
+            level_list,
+            context_hash,
+            project_dir,
+            project_lock,
+            optional,
+        )
+        # Files are added to archives one after the other
+        limit = 1 if self.__archive is not None else max(self.__workers, 1)
+        semaphore = asyncio.Semaphore(limit)
+
+        async def write_group(group: list[InstallFile]) -> list[str | None]:
+            async with semaphore:
+                return await asyncio.to_thread(self.__write_group, group, context)
+
+        # Levels of the install plan are written one after the other, task
+        # and position in the group of every item
+        task_dict: dict[InstallFile, tuple[asyncio.Task[list[str | None]], int]] = {}
+        for level in range(len(level_list)):
+            write_list = [
+                item for item in install_list if item.write and item.level == level
+            ]
+            async with asyncio.TaskGroup() as task_group:
+                for group in self.__groups(write_list):
+                    task = task_group.create_task(write_group(group))
+                    for position, item in enumerate(group):
+                        task_dict[item] = (task, position)
+        conflict_list = self.__record(
+            install_list,
+            (
+                task_dict[item][0].result()[task_dict[item][1]]
+                for item in install_list
+                if item.write
+            ),
+            context_hash,
+            project_lock,
+        )
+        await asyncio.to_thread(self.__evict_objects, install_list)
+        self.__summary(install_list, project_dir, start)
+        await asyncio.to_thread(self.__write_lock, project_lock, context, components)
+        return conflict_list
+
+    def __component_files(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str,
+        lock: bool,
+    ) -> tuple[list[list[tuple[str, str]]], set[str], ProjectLock | None]:
+        """Obtain the files of template components (according to the install
+        plan) and the lock manifest
+
+        Returns:
+            level_list: List of lists of (pkg_fname, project_fname) tuples for
+                each level of the install plan, see __install_files
+            optional: Set of strings with pkg_fnames that are only installed
+                as dependencies, see __preflight
+            project_lock: ProjectLock object, None if lock=False
         """
         logger = logging.getLogger("DevOpsTemplate.__components")
-        # Install files for components
-        for component in components:
-            logger.debug(" # %s", component)
-            self.__install_component(component, context)
+        plan = self.__plan(components)
+        if plan.dependencies:
+            logger.debug("Dependencies: %s", ", ".join(sorted(plan.dependencies)))
+        # Render template file paths (paths can contain template variables)
+        level_list = [
+            [
+                (template_fpath, self.__render_path(template_fpath, context))
+                for template_fpath in template_fpath_list
+            ]
+            for template_fpath_list in plan.levels
+        ]
+        project_lock = None
+        if lock:
+            # Archives always start with an empty manifest
+            project_lock = ProjectLock(project_dir, load=self.__archive is None)
+        return level_list, plan.optional, project_lock
+
+    def __plan(self, components: list[str]) -> InstallPlan:
+        """Obtain the install plan for a list of components. Plans are
+        computed once and are shared by all instances.
+
+        Raises:
+            ValueError: if a component is unknown
+        """
+        key = tuple(components)
+        with DevOpsTemplate.__cache_lock:
+            plan = DevOpsTemplate.__plan_dict.get(key)
+        if plan is None:
+            plan = InstallPlan(components, self.__template_dict, self.__dependency_dict)
+            with DevOpsTemplate.__cache_lock:
+                DevOpsTemplate.__plan_dict[key] = plan
+        return plan
+
+    def __write_lock(
+        self,
+        project_lock: ProjectLock | None,
+        context: dict[str, Any],
+        components: list[str],
+    ) -> None:
+        """Record the project configuration and write the lock manifest to the
+        project or to the archive (unless in dry-run mode)
+        """
+        if project_lock is None or self.__dry_run:
+            return
+        project_lock.update_config(context, components, self.__store_bases)
+        if self.__archive is None:
+            project_lock.write()
+        else:
+            self.__write_text(project_lock.fpath, project_lock.dumps())
+
+    def __install_files(
+        self,
+        level_list: list[list[tuple[str, str]]],
+        context: dict[str, Any],
+        project_dir: str,
+        project_lock: ProjectLock | None = None,
+        optional: set[str] | None = None,
+    ) -> list[str]:
+        """Render and install template files to the project. Files are written
+        with a thread pool if more than one worker has been configured. The
+        levels of the install plan are written one after the other.
+
+        Params:
+            level_list: List of lists of (pkg_fname, project_fname) tuples
+                specifying files in the distribution package and target files
+                in the project for each level of the install plan.
+            context: Dictionary with the context for rendering Jinja2 templates
+            project_dir: String with the path to the target directory
+            project_lock: ProjectLock object for skipping files that are up
+                to date and for recording installed files. (optional)
+            optional: Set of strings with pkg_fnames that are only installed
+                if not present in the project, see __preflight. (optional)
+        Returns: List of strings with the paths to files with merge conflicts
+        Raises:
+            FileNotFoundError: if a pkg_fname is not available
+            FileExistsError: if project files already exist in the project
+                and skip-exists=False, overwrite-exists=False
+        """
+        start = time.perf_counter()
+        context_hash = context_digest(context)
+        install_list = self.__prepare(
+            level_list, context_hash, project_dir, project_lock, optional
+        )
+        write_list_iter = (
+            [item for item in install_list if item.write and item.level == level]
+            for level in range(len(level_list))
+        )
+        with ThreadPoolExecutor(max_workers=max(self.__workers, 1)) as executor:
+            # Files are added to archives one after the other
+            parallel = self.__workers > 1 and self.__archive is None
+
+            def write_level(write_list: list[InstallFile]) -> Iterator[str | None]:
+                if not parallel:
+                    return map(self.__write_file, write_list, itertools.repeat(context))
+                group_list = self.__groups(write_list)
+                hash_dict: dict[InstallFile, str | None] = {}
+                for group, hash_list in zip(
+                    group_list,
+                    executor.map(
+                        self.__write_group, group_list, itertools.repeat(context)
+                    ),
+                ):
+                    hash_dict.update(zip(group, hash_list))
+                return (hash_dict[item] for item in write_list)
+
+            # The files of the next level are submitted when all results of
+            # the current level have been consumed
+            result_iter = itertools.chain.from_iterable(
+                write_level(write_list) for write_list in write_list_iter
+            )
+            conflict_list = self.__record(
+                install_list, result_iter, context_hash, project_lock
+            )
+        self.__evict_objects(install_list)
+        self.__summary(install_list, project_dir, start)
+        return conflict_list
+
+    def __prepare(
+        self,
+        level_list: list[list[tuple[str, str]]],
+        context_hash: str,
+        project_dir: str,
+        project_lock: ProjectLock | None,
+        optional: set[str] | None = None,
+    ) -> list[InstallFile]:
+        """Check template files (see __preflight) and create missing
+        directories in the project
+
+        Returns: List of InstallFile objects for files that will be installed
+        """
+        install_list, dname_list = self.__preflight(
+            level_list, context_hash, project_dir, project_lock, optional
+        )
+        if not self.__dry_run and self.__archive is None:
+            # Create missing parent directories (parents first)
+            for dname in dname_list:
+                try:
+                    os.mkdir(dname)
+                except FileExistsError:
+                    pass
+        return install_list
+
+    def __record(
+        self,
+        install_list: list[InstallFile],
+        output_hash_iter: Iterator[str | None],
+        context_hash: str,
+        project_lock: ProjectLock | None,
+    ) -> list[str]:
+        """Log installed files and record them in the lock manifest
+
+        Params:
+            install_list: List of InstallFile objects, see __prepare
+            output_hash_iter: Iterator over the results of __write_file for
+                all items in install_list that are written (in list order)
+            context_hash: String with the hash of the rendering context
+            project_lock: ProjectLock object of the project. (optional)
+        Returns: List of strings with the paths to files with merge conflicts
+            (see InstallFile.conflict)
+        """
+        logger = logging.getLogger("DevOpsTemplate.__render")
+        conflict_list: list[str] = []
+        # Log messages are emitted in list order (independent of the
+        # order in which files are written by the thread pool)
+        for item in install_list:
+            if item.write:
+                output_hash = next(output_hash_iter)
+                if project_lock is not None and output_hash is not None:
+                    project_lock.update(
+                        item.project_fpath,
+                        item.pkg_fname,
+                        self.__source(item.pkg_fname).source_hash,
+                        context_hash,
+                        output_hash,
+                    )
+                if item.conflict:
+                    conflict_list.append(item.project_fpath)
+            logger.info(
+                "template:%s  ->  project:%s",
+                item.pkg_fname,
+                item.project_fpath,
+                extra={
+                    LOG_EVENT_KEY: {
+                        "event": "file",
+                        "template": item.pkg_fname,
+                        "path": item.project_fpath,
+                        "written": item.write,
+                        "bytes": item.size,
+                        "render_seconds": item.render_seconds,
+                        "write_seconds": item.write_seconds,
+                    }
+                },
+            )
+        return conflict_list
+
+    def __evict_objects(self, install_list: list[InstallFile]) -> None:
+        """Bound the size of the object store if objects may have been added
+        (see cache.ObjectStore.evict)
+
+        Params:
+            install_list: List of InstallFile objects, see __prepare
+        """
+        logger = logging.getLogger("DevOpsTemplate.__evict_objects")
+        if self.__dry_run or (
+            self.__link_static is None
+            and not any(item.store_base for item in install_list)
+        ):
+            return
+        try:
+            self.__objects.evict()
+        except OSError as err:
+            logger.debug("Could not evict objects: %s", err)
+
+    def __summary(
+        self, install_list: list[InstallFile], project_dir: str, start: float
+    ) -> None:
+        """Log a summary of installed files (see __record)
+
+        Params:
+            install_list: List of InstallFile objects, see __prepare
+            project_dir: String with the path to the target directory
+            start: Float with the start time of the installation (perf_counter)
+        """
+        logger = logging.getLogger("DevOpsTemplate.__summary")
+        seconds = time.perf_counter() - start
+        write_list = [item for item in install_list if item.write]
+        size = sum(item.size for item in write_list)
+        logger.info(
+            "%d file(s) installed, %d bytes written in %.3f s",
+            len(install_list),
+            size,
+            seconds,
+            extra={
+                LOG_EVENT_KEY: {
+                    "event": "summary",
+                    "project_dir": project_dir,
+                    "files": len(install_list),
+                    "written": len(write_list),
+                    "bytes": size,
+                    "render_seconds": sum(item.render_seconds for item in write_list),
+                    "write_seconds": sum(item.write_seconds for item in write_list),
+                    "seconds": seconds,
+                    "dry_run": self.__dry_run,
+                }
+            },
+        )
+
+    def __preflight(
+        self,
+        level_list: list[list[tuple[str, str]]],
+        context_hash: str,
+        project_dir: str,
+        project_lock: ProjectLock | None = None,
+        optional: set[str] | None = None,
+    ) -> tuple[list[InstallFile], list[str]]:
+        """Check whether template files can be installed to the project before
+        any file is installed. Existing files are looked up in a ProjectIndex
+        of the project directory. Existing files that are up to date according
+        to the lock manifest are skipped (no conflict). Existing files that
+        are only installed as dependencies are skipped as well. If several
+        template files are installed to the same project file, the file
+        exists for the later template files (like installing the files one
+        after the other, see __write_group).
+
+        Params:
+            level_list: List of lists of (pkg_fname, project_fname) tuples,
+                see __install_files
+            context_hash: String with the hash of the rendering context
+            project_dir: String with the path to the target directory
+            project_lock: ProjectLock object of the project. (optional)
+            optional: Set of strings with pkg_fnames that are only installed
+                as dependencies. (optional)
+        Returns:
+            install_list: List of InstallFile objects for files that will be
+                installed (in level order).
+            dname_list: List of directories that have to be created for
+                installing the files (parent directories first).
+        Raises:
+            FileNotFoundError: if a pkg_fname is not available
+            FileExistsError: if project files already exist in the project
+                and skip-exists=False, overwrite-exists=False (reports all
+                conflicting files)
+        """
+        logger = logging.getLogger("DevOpsTemplate.__render")
+        index = ProjectIndex(project_dir)
+        install_list: list[InstallFile] = []
+        dname_list: list[str] = []
+        conflict_list: list[str] = []
+        conflict_err: FileExistsError | None = None
+        # Installed outputs are stored as bases for upgrades (if recorded)
+        store_base = (
+            project_lock is not None
+            and self.__cache
+            and (self.__store_bases or project_lock.upgradable)
+        )
+        # Items that install a project file (latest item per file)
+        scheduled_dict: dict[str, InstallFile] = {}
+        file_iter = (
+            (level, pkg_fname, project_fname)
+            for level, file_list in enumerate(level_list)
+            for pkg_fname, project_fname in file_list
+        )
+        for level, pkg_fname, project_fname in file_iter:
+            pkg_fpath = os.path.join(self.__template_dname, pkg_fname)
+            # Files in the template pack exist in the package
+            if pkg_fname not in DevOpsTemplate.__source_dict and not pkg.exists(
+                pkg_fpath
+            ):
+                raise FileNotFoundError(
+                    f"File {pkg_fpath} not available in distribution package"
+                )
+            project_fpath = os.path.join(project_dir, project_fname)
+            scheduled_item = scheduled_dict.get(project_fpath)
+            # Archives are written from scratch (no existing files), files
+            # of previous template files exist
+            exists = scheduled_item is not None or (
+                self.__archive is None and index.exists(project_fpath)
+            )
+            if (
+                exists
+                and scheduled_item is None
+                and project_lock is not None
+                and project_lock.is_current(
+                    project_fpath, self.__source(pkg_fname).source_hash, context_hash
+                )
+            ):
+                logger.debug("File %s is up to date, skipping", project_fpath)
+                continue
+            base_hash = None
+            if (
+                exists
+                and scheduled_item is None
+                and self.__upgrade
+                and project_lock is not None
+            ):
+                entry = project_lock.entry(project_fpath)
+                if entry is not None:
+                    base_hash = entry.get(LOCK_OUTPUT_HASH_KEY)
+            if base_hash is not None:
+                logger.debug("File %s will be upgraded", project_fpath)
+            elif exists and optional is not None and pkg_fname in optional:
+                logger.debug("File %s exists (dependency), skipping", project_fpath)
+                continue
+            else:
+                try:
+                    self.__check_project_file(project_fpath, exists)
+                except SkipFileError:
+                    logger.warning("File %s exists, skipping", project_fpath)
+                    continue
+                except FileExistsError as err:
+                    conflict_list.append(project_fpath)
+                    conflict_err = err
+                    continue
+            item = InstallFile(
+                pkg_fname, project_fpath, True, exists, level, base_hash, store_base
+            )
+            if scheduled_item is not None and self.__archive is not None:
+                # Overwritten files are not added to archives twice
+                scheduled_item.write = False
+            install_list.append(item)
+            scheduled_dict[project_fpath] = item
+            dname_list.extend(index.add(project_fpath))
+        if len(conflict_list) > 1:
+            raise FileExistsError(
+                f"Files {', '.join(conflict_list)} already exist, exit."
+                " (use --skip-exists or --overwrite-exists"
+                " to control behavior)"
+            )
+        if conflict_err is not None:
+            raise conflict_err
+        return install_list, dname_list
 
-    def create(self, context: dict[str, Any], components: list[str]) -> None:
+    def create(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> None:
         """Create a new project from the DevOps template given config options.
 
         Installs components which are defined in template.json
@@ -89,14 +946,23 @@ class DevOpsTemplate:
             context: Dictionary with configuration flags supported by the
                 template (typically generated by the CLI, see main.create).
             components: Template components that should be installed.
+            project_dir: String with the path to the project directory,
+                default: projectdirectory (see __init__). Calls with different
+                project directories can run concurrently in threads.
         """
         logger = logging.getLogger("DevOpsTemplate.create")
         logger.info("Create project from template")
         logger.info("Project name: %s", context[ARGUMENTS_PROJECT_NAME_KEY])
         logger.info("Package name: %s", context[ARGUMENTS_PROJECT_SLUG_KEY])
-        self.__components(context, components)
+        project_dir = self.__target(project_dir)
+        self.__components(context, components, project_dir)
 
-    def cookiecutter(self, context: dict[str, Any], components: list[str]) -> None:
+    def cookiecutter(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> None:
         """Create a new cookiecutter template from the DevOps template given
         config options. Config options only affect the default values for the
         cookiecutter template, which are provided in cookiecutter.json
@@ -109,17 +975,53 @@ class DevOpsTemplate:
                 can be modified based on command-line args, see
                 main.cookiecutter)
             components: Template components that should be installed.
+            project_dir: String with the path to the cookiecutter template
+                root directory, default: projectdirectory (see __init__).
+                Calls with different directories can run concurrently in
+                threads.
         """
         logger = logging.getLogger("DevOpsTemplate.cookiecutter")
         logger.info("Generate cookiecutter template")
+        project_dir = self.__target(project_dir)
+        cookiecutter_project_dname, cookiecutter_config = self.__cookiecutter_base(
+            context, project_dir
+        )
+        # Install all template components to the project template directory
+        # within the cookiecutter template root directory (cookiecutter
+        # templates are not recorded in a lock manifest)
+        self.__components(
+            cookiecutter_config,
+            components,
+            os.path.join(project_dir, cookiecutter_project_dname),
+            lock=False,
+        )
+
+    def __cookiecutter_base(
+        self, context: dict[str, Any], project_dir: str
+    ) -> tuple[str, dict[str, str]]:
+        """Generate the files of a cookiecutter template that do not depend on
+        template components (cookiecutter.json, README.md) and the project
+        template directory.
+
+        Params:
+            context: Dictionary with configuration flags, see cookiecutter
+            project_dir: String with the path to the cookiecutter template
+                root directory
+        Returns:
+            cookiecutter_project_dname: String with the name of the project
+                template directory
+            cookiecutter_config: Dictionary with the context for rendering
+                cookiecutter template variables
+        """
+        logger = logging.getLogger("DevOpsTemplate.cookiecutter")
         # Generate cookiecutter.json
         # configuration is provided by the context dictionary
-        cookiecutter_json_fpath = os.path.join(self.__project_dir, COOKIECUTTER_FNAME)
+        cookiecutter_json_fpath = os.path.join(project_dir, COOKIECUTTER_FNAME)
         try:
-            self.__check_project_file(cookiecutter_json_fpath)
-            if not self.__dry_run:
-                with open(cookiecutter_json_fpath, "w", encoding="utf-8") as handle:
-                    json.dump(context, handle, indent=2)
+            self.__check_project_file(
+                cookiecutter_json_fpath, self.__exists(cookiecutter_json_fpath)
+            )
+            self.__write_text(cookiecutter_json_fpath, json.dumps(context, indent=2))
             logger.info("project:%s", cookiecutter_json_fpath)
         except SkipFileError:
             logger.warning("File %s exists, skipping", cookiecutter_json_fpath)
@@ -127,12 +1029,9 @@ class DevOpsTemplate:
         # Only generate *cookiecutter* readme if not present already
         # Note: a template readme can be installed via template components
         # (see below)
-        readme_fpath = os.path.join(self.__project_dir, COOKIECUTTER_README_FNAME)
-        if not os.path.exists(readme_fpath):
-            if not self.__dry_run:
-                with open(readme_fpath, "w", encoding="utf-8") as handle:
-                    readme_content_list = ["# Cookiecutter PyDevops"]
-                    handle.writelines(readme_content_list)
+        readme_fpath = os.path.join(project_dir, COOKIECUTTER_README_FNAME)
+        if not self.__exists(readme_fpath):
+            self.__write_text(readme_fpath, "# Cookiecutter PyDevops")
             logger.info("project:%s", readme_fpath)
 
         # Generate hooks directory with pre/post generation scripts if required
@@ -142,13 +1041,7 @@ class DevOpsTemplate:
         cookiecutter_project_dname = (
             f"{{{{cookiecutter.{ARGUMENTS_PROJECT_NAME_KEY}}}}}/"
         )
-        self.__mkdir(cookiecutter_project_dname)
-        # Adjust projectdirectory such that __install installs to the correct
-        # directory (projectdirectory represents cookiecutter template root)
-        cookiecutter_rootdir = self.__project_dir
-        self.__project_dir = os.path.join(
-            self.__project_dir, cookiecutter_project_dname
-        )
+        self.__mkdir(cookiecutter_project_dname, project_dir)
         # Generate cookiecutterconfig for rendering cookiecutter template
         # variables
         # pylint: disable=consider-using-f-string
@@ -156,27 +1049,289 @@ class DevOpsTemplate:
         cookiecutter_config = {
             key: "{{cookiecutter.%s}}" % key for key in context.keys()
         }
-        # Install all template components
-        self.__components(cookiecutter_config, components)
+        return cookiecutter_project_dname, cookiecutter_config
 
-        # Revert project directory to cookiecutter root directory
-        self.__project_dir = cookiecutter_rootdir
-
-    def manage(self, context: dict[str, Any], components: list[str]) -> None:
+    def manage(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> list[str]:
         """Add functionality/components to an existing project that has been
         created from the DevOps template given configuration options.
 
+        In upgrade mode (see __init__), template changes are merged into
+        files that have been modified in the project. Conflicting changes
+        are marked in the files (like merge conflicts in git).
+
         Params:
             context: Dictionary with configuration flags supported by the
                 template (flags are defined in ProjectConfig.manage and
                 can be modified based on command-line args, see
                 main.manage)
             components: Template components that should be installed.
+            project_dir: String with the path to the project directory,
+                default: projectdirectory (see __init__).
+        Returns: List of strings with the paths to files with merge conflicts
+            (upgrade mode)
         """
         logger = logging.getLogger("DevOpsTemplate.manage")
         logger.info("Adding template components to existing project")
         # Install files for components
-        self.__components(context, components)
+        conflict_list = self.__components(
+            context, components, self.__target(project_dir)
+        )
+        return sorted(conflict_list)
+
+    def diff(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> list[dict[str, str | None]]:
+        """Compare template components with the files of an existing project
+        (drift detection). Templates are rendered in memory, nothing is
+        written to the project.
+
+        Files are compared without rendering if possible: files that are up
+        to date according to the lock manifest are unchanged, files with a
+        different size are changed (static files are compared by size and
+        hash without reading the template).
+
+        Params:
+            context: Dictionary with the context for rendering Jinja2 templates
+                (see ProjectConfig.diff)
+            components: Template components that should be compared.
+            project_dir: String with the path to the project directory,
+                default: projectdirectory (see __init__).
+        Returns: List of dictionaries with the keys
+            status: String with the status of the project file (DIFF_ADDED:
+                installed from the template according to the lock manifest
+                but not part of the components, DIFF_CHANGED, DIFF_MISSING,
+                DIFF_UNCHANGED)
+            path: String with the path to the file (relative to the project
+                directory)
+            template: String specifying the file in the distribution package
+        Raises:
+            FileNotFoundError: if the project directory does not exist
+            ValueError: if a component is unknown
+        """
+        logger = logging.getLogger("DevOpsTemplate.diff")
+        if project_dir is None:
+            project_dir = self.__project_dir
+        if not os.path.isdir(project_dir):
+            raise FileNotFoundError(f"Project directory {project_dir} does not exist")
+        project_lock = ProjectLock(project_dir)
+        level_list, _, _ = self.__component_files(
+            context, components, project_dir, lock=False
+        )
+        context_hash = context_digest(context)
+        # Files are compared once (paths can be rendered to the same file)
+        compare_dict: dict[str, tuple[str, str]] = {}
+        for pkg_fname, project_fname in itertools.chain(*level_list):
+            project_fpath = os.path.join(project_dir, project_fname)
+            compare_dict.setdefault(
+                project_lock.relpath(project_fpath), (pkg_fname, project_fpath)
+            )
+
+        def compare(item: tuple[str, str]) -> str:
+            return self.__compare(*item, context, context_hash, project_lock)
+
+        with ThreadPoolExecutor(max_workers=max(self.__workers, 1)) as executor:
+            if self.__workers > 1:
+                status_iter = executor.map(compare, compare_dict.values())
+            else:
+                status_iter = map(compare, compare_dict.values())
+            diff_list: list[dict[str, str | None]] = [
+                {"status": status, "path": relpath, "template": pkg_fname}
+                for (relpath, (pkg_fname, _)), status in zip(
+                    compare_dict.items(), status_iter
+                )
+            ]
+        for relpath, entry in sorted(project_lock.files.items()):
+            if relpath in compare_dict:
+                continue
+            if os.path.exists(os.path.join(project_dir, relpath)):
+                diff_list.append(
+                    {
+                        "status": DIFF_ADDED,
+                        "path": relpath,
+                        "template": entry.get(LOCK_TEMPLATE_KEY),
+                    }
+                )
+        for diff_dict in diff_list:
+            logger.debug("%s: %s", diff_dict["status"], diff_dict["path"])
+        return diff_list
+
+    def __compare(
+        self,
+        pkg_fname: str,
+        project_fpath: str,
+        context: dict[str, Any],
+        context_hash: str,
+        project_lock: ProjectLock,
+    ) -> str:
+        """Compare a template file with a project file (see diff)
+
+        Returns: String with the status of the project file
+        """
+        try:
+            size = os.stat(project_fpath).st_size
+        except FileNotFoundError:
+            return DIFF_MISSING
+        source = self.__source(pkg_fname)
+        if project_lock.is_current(project_fpath, source.source_hash, context_hash):
+            return DIFF_UNCHANGED
+        if source.static_size is not None and source.static_hash is not None:
+            if size != source.static_size:
+                return DIFF_CHANGED
+            output_hash = source.static_hash
+        else:
+            output_size, output_hash = self.__render_output(pkg_fname, context)
+            if size != output_size:
+                return DIFF_CHANGED
+        if file_digest(project_fpath) != output_hash:
+            return DIFF_CHANGED
+        return DIFF_UNCHANGED
+
+    def __render_output(
+        self, pkg_fname: str, context: dict[str, Any]
+    ) -> tuple[int, str]:
+        """Render a template in memory (once per template and distinct values
+        of the context variables it references, e.g., for comparing many
+        projects that only differ in a few variables)
+
+        Params:
+            pkg_fname: String specifying the file in the distribution package
+            context: Dictionary with the context for rendering Jinja2 templates
+        Returns: Tuple with the size and the hash of the rendered output
+        """
+        variables = self.__variables(pkg_fname)
+        if variables is not None:
+            context_subset = {
+                name: value for name, value in context.items() if name in variables
+            }
+        else:
+            context_subset = context
+        key = (pkg_fname, context_digest(context_subset))
+        with DevOpsTemplate.__cache_lock:
+            output = DevOpsTemplate.__output_dict.get(key)
+            if output is not None:
+                DevOpsTemplate.__output_dict.move_to_end(key)
+        if output is None:
+            template = self.__env.get_template(pkg_fname)
+            data = template.render(**context).encode("utf-8")
+            output = (len(data), digest(data))
+            with DevOpsTemplate.__cache_lock:
+                DevOpsTemplate.__output_dict[key] = output
+                if len(DevOpsTemplate.__output_dict) > OUTPUT_CACHE_SIZE:
+                    DevOpsTemplate.__output_dict.popitem(last=False)
+        return output
+
+    def __variables(self, pkg_fname: str) -> frozenset[str] | None:
+        """Determine the context variables referenced by a template (the
+        source is parsed once per process)
+
+        Params:
+            pkg_fname: String specifying the file in the distribution package
+        Returns: Set of strings with variable names, None if the template
+            includes, imports or extends other templates (the whole context
+            is referenced then)
+        """
+        with DevOpsTemplate.__cache_lock:
+            if pkg_fname in DevOpsTemplate.__variable_dict:
+                return DevOpsTemplate.__variable_dict[pkg_fname]
+        pkg_fpath = os.path.join(self.__template_dname, pkg_fname)
+        with pkg.stream(pkg_fpath) as handle:
+            ast = self.__env.parse(handle.read().decode("utf-8"))
+        variables: frozenset[str] | None = None
+        include_types = (
+            nodes.Extends,
+            nodes.Include,
+            nodes.Import,
+            nodes.FromImport,
+        )
+        if next(ast.find_all(include_types), None) is None:
+            variables = frozenset(meta.find_undeclared_variables(ast))
+        with DevOpsTemplate.__cache_lock:
+            DevOpsTemplate.__variable_dict[pkg_fname] = variables
+        return variables
+
+    async def acreate(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> None:
+        """Create a new project from the DevOps template without blocking the
+        event loop (asyncio). Generates the same files as create.
+
+        Templates are rendered and files are written in worker threads, at
+        most workers files at a time. The coroutine can be cancelled.
+
+        Params:
+            context: Dictionary with configuration flags, see create
+            components: Template components that should be installed.
+            project_dir: String with the path to the project directory, see
+                create
+        """
+        logger = logging.getLogger("DevOpsTemplate.acreate")
+        logger.info("Create project from template")
+        logger.info("Project name: %s", context[ARGUMENTS_PROJECT_NAME_KEY])
+        logger.info("Package name: %s", context[ARGUMENTS_PROJECT_SLUG_KEY])
+        project_dir = await asyncio.to_thread(self.__target, project_dir)
+        await self.__acomponents(context, components, project_dir)
+
+    async def acookiecutter(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> None:
+        """Create a new cookiecutter template without blocking the event loop
+        (asyncio). Generates the same files as cookiecutter.
+
+        Params:
+            context: Dictionary with configuration flags, see cookiecutter
+            components: Template components that should be installed.
+            project_dir: String with the path to the cookiecutter template
+                root directory, see cookiecutter
+        """
+        logger = logging.getLogger("DevOpsTemplate.acookiecutter")
+        logger.info("Generate cookiecutter template")
+        project_dir = await asyncio.to_thread(self.__target, project_dir)
+        cookiecutter_project_dname, cookiecutter_config = await asyncio.to_thread(
+            self.__cookiecutter_base, context, project_dir
+        )
+        await self.__acomponents(
+            cookiecutter_config,
+            components,
+            os.path.join(project_dir, cookiecutter_project_dname),
+            lock=False,
+        )
+
+    async def amanage(
+        self,
+        context: dict[str, Any],
+        components: list[str],
+        project_dir: str | None = None,
+    ) -> list[str]:
+        """Add components to an existing project without blocking the event
+        loop (asyncio). Generates the same files as manage.
+
+        Params:
+            context: Dictionary with configuration flags, see manage
+            components: Template components that should be installed.
+            project_dir: String with the path to the project directory, see
+                manage
+        Returns: List of strings with the paths to files with merge conflicts
+            (upgrade mode)
+        """
+        logger = logging.getLogger("DevOpsTemplate.amanage")
+        logger.info("Adding template components to existing project")
+        project_dir = await asyncio.to_thread(self.__target, project_dir)
+        conflict_list = await self.__acomponents(context, components, project_dir)
+        return sorted(conflict_list)
 
     def __install_component(
         self, template_component: str, context: dict[str, Any]
@@ -190,28 +1345,64 @@ class DevOpsTemplate:
             context: Dictionary with the context for rendering Jinja2
                 templates.
         """
-        file_list = self.__template_dict[template_component]
-        for template_fpath in file_list:
-            # Render template file path (paths can contain template variables)
-            project_fpath = Template(template_fpath).render(**context)
-            # Render template file (template content) and write to project_fpath
-            self.__install_file(template_fpath, project_fpath, context)
+        self.__components(context, [template_component], self.__project_dir)
+
+    def __target(self, project_dir: str | None) -> str:
+        """Resolve the target directory of a call (create the directory if
+        not present)
+
+        Params:
+            project_dir: String with the path to the target directory, None
+                for projectdirectory (see __init__)
+        Returns: String with the path to the target directory
+        """
+        if project_dir is None:
+            return self.__project_dir
+        self.__mkdir(os.path.abspath(project_dir))
+        return project_dir
 
-    def __mkdir(self, project_dname: str) -> None:
+    def __mkdir(self, project_dname: str, project_dir: str | None = None) -> None:
         """Create a directory within the project if not present
 
         Params:
             project_dname: String specifying the name of the directory
+            project_dir: String with the path to the project directory,
+                default: projectdirectory (see __init__)
         """
         logger = logging.getLogger("DevOpsTemplate.__mkdir")
-        project_dpath = os.path.join(self.__project_dir, project_dname)
+        if project_dir is None:
+            project_dir = self.__project_dir
+        project_dpath = os.path.join(project_dir, project_dname)
         if not os.path.exists(project_dpath):
             logger.info("creating directory: %s", project_dpath)
-            if not self.__dry_run:
-                os.makedirs(project_dpath)
+            # Directories are not created for archives (implicit in file paths)
+            if not self.__dry_run and self.__archive is None:
+                os.makedirs(project_dpath, exist_ok=True)
         else:
             logger.debug("directory %s exists", project_dpath)
 
+    @staticmethod
+    def __groups(write_list: list[InstallFile]) -> list[list[InstallFile]]:
+        """Group items by target file (see __write_group)
+
+        Returns: List of lists of InstallFile objects with the same target
+            file (in list order)
+        """
+        group_dict: dict[str, list[InstallFile]] = {}
+        for item in write_list:
+            group_dict.setdefault(item.project_fpath, []).append(item)
+        return list(group_dict.values())
+
+    def __write_group(
+        self, group: list[InstallFile], context: dict[str, Any]
+    ) -> list[str | None]:
+        """Write items with the same target file one after the other (by one
+        worker, like a sequential installation, see __preflight)
+
+        Returns: List with the results of __write_file
+        """
+        return [self.__write_file(item, context) for item in group]
+
     def __install_file(
         self,
         pkg_fname: str,
@@ -232,30 +1423,310 @@ class DevOpsTemplate:
             FileExistsError: if project_fname already exists in the project
                 and skip-exists=False, overwrite-exists=False
         """
-        logger = logging.getLogger("DevOpsTemplate.__render")
-        pkg_fpath = os.path.join(self.__template_dname, pkg_fname)
-        if not pkg.exists(pkg_fpath):
-            raise FileNotFoundError(
-                f"File {pkg_fpath} not available in distribution package"
-            )
-        project_fpath = os.path.join(self.__project_dir, project_fname)
+        self.__install_files(
+            [[(pkg_fname, project_fname)]], context, self.__project_dir
+        )
+
+    def __write_file(self, item: InstallFile, context: dict[str, Any]) -> str | None:
+        """Render template file and write the result to the project (unless
+        in dry-run mode). Existing files are not rewritten if their content
+        is identical to the rendered template (modification times are kept).
+        Static template files (without template syntax) are copied.
+
+        Params:
+            item: InstallFile object specifying the template file and the
+                target file
+            context: Dictionary with the context for rendering Jinja2 templates
+        Returns: String with the hash of the rendered template, None in
+            dry-run mode
+        """
+        logger = logging.getLogger("DevOpsTemplate.__write_file")
+        if self.__dry_run:
+            return None
+        start = time.perf_counter()
+        if item.base_hash is not None:
+            with Profiler.phase("upgrade", item.project_fpath):
+                output_hash = self.__upgrade_file(item, context)
+            item.write_seconds = time.perf_counter() - start
+            return output_hash
+        source = self.__source(item.pkg_fname)
+        if source.static_size is not None:
+            with Profiler.phase("copy", item.project_fpath):
+                output_hash = self.__copy_file(
+                    item, source.static_size, source.static_hash
+                )
+            item.write_seconds = time.perf_counter() - start
+            return output_hash
+        # Load and instantiate template
+        with Profiler.phase("compile", item.pkg_fname):
+            template = self.__env.get_template(item.pkg_fname)
+        if self.__archive is not None:
+            # Stream rendered chunks to the archive and hash them on the way
+            hasher = hashlib.sha256()
+
+            def chunk_iter() -> Iterator[bytes]:
+                for text in template.stream(**context):
+                    chunk = text.encode("utf-8")
+                    hasher.update(chunk)
+                    item.size += len(chunk)
+                    yield chunk
+
+            write_start = time.perf_counter()
+            item.render_seconds = write_start - start
+            with Profiler.phase("archive", item.project_fpath):
+                self.__archive.write(self.__arcname(item.project_fpath), chunk_iter())
+            # Rendering is interleaved with writing to the archive
+            item.write_seconds = time.perf_counter() - write_start
+            return hasher.hexdigest()
+        # Stream rendered chunks to a temporary file next to the target file
+        # and hash them on the way, the target file is replaced if modified
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_fpath = f"{item.project_fpath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write_start = time.perf_counter()
+        item.render_seconds = write_start - start
+        with Profiler.phase("write", item.project_fpath):
+            try:
+                with open(tmp_fpath, "wb") as tmp_fh:
+                    for text in template.stream(**context):
+                        chunk = text.encode("utf-8")
+                        hasher.update(chunk)
+                        tmp_fh.write(chunk)
+                        size += len(chunk)
+                output_hash = hasher.hexdigest()
+                if item.store_base:
+                    with open(tmp_fpath, "rb") as output_fh:
+                        self.__store_object(output_fh, size, output_hash)
+                if item.exists and file_digest(item.project_fpath) == output_hash:
+                    logger.debug("File %s is unchanged", item.project_fpath)
+                else:
+                    if item.exists:
+                        # Replacing the file keeps linked objects unmodified
+                        shutil.copymode(item.project_fpath, tmp_fpath)
+                    os.replace(tmp_fpath, item.project_fpath)
+                    item.size = size
+            finally:
+                if os.path.exists(tmp_fpath):
+                    os.remove(tmp_fpath)
+        # Rendering is interleaved with writing the temporary file
+        item.write_seconds = time.perf_counter() - write_start
+        return output_hash
+
+    def __store_base(self, output_hash: str, data: bytes) -> None:
+        """Store an installed output in the object store, it is the base for
+        merging future template changes (see __upgrade_file, only called
+        for InstallFile.store_base).
+
+        Params:
+            output_hash: String with the hash of the output
+            data: Bytes with the output
+        """
+        logger = logging.getLogger("DevOpsTemplate.__store_base")
         try:
-            self.__check_project_file(project_fpath)
-        except SkipFileError:
-            logger.warning("File %s exists, skipping", project_fpath)
+            self.__objects.put(output_hash, data)
+        except OSError as err:
+            logger.debug("Could not store object %s: %s", output_hash, err)
+
+    def __upgrade_file(self, item: InstallFile, context: dict[str, Any]) -> str | None:
+        """Upgrade a project file that has been installed from the template.
+        Files that have not been modified in the project are replaced,
+        modified files are merged with the template output (three-way merge
+        with the installed output as base). Merge conflicts are marked in the
+        file and are reported with the item (InstallFile.conflict).
+
+        Params:
+            item: InstallFile object specifying the template file, the
+                target file and the hash of the installed output
+            context: Dictionary with the context for rendering Jinja2 templates
+        Returns: String with the hash of the template output (base for the
+            next upgrade), None if the file could not be merged
+        """
+        logger = logging.getLogger("DevOpsTemplate.__upgrade_file")
+        source = self.__source(item.pkg_fname)
+        if source.static_size is not None:
+            pkg_fpath = os.path.join(self.__template_dname, item.pkg_fname)
+            with pkg.stream(pkg_fpath) as pkg_fh:
+                data = pkg_fh.read(source.static_size)
+        else:
+            template = self.__env.get_template(item.pkg_fname)
+            data = template.render(**context).encode("utf-8")
+        output_hash = digest(data)
+        if item.store_base:
+            self.__store_base(output_hash, data)
+        with open(item.project_fpath, "rb") as project_fh:
+            project_data = project_fh.read()
+        project_hash = digest(project_data)
+        if project_hash == output_hash:
+            logger.debug("File %s is unchanged", item.project_fpath)
+            return output_hash
+        if output_hash == item.base_hash:
+            # Only modified in the project
+            logger.debug("File %s is up to date, keeping changes", item.project_fpath)
+            return output_hash
+        if project_hash != item.base_hash:
+            base_data = None
+            if item.base_hash is not None:
+                base_data = self.__objects.read(item.base_hash)
+            if base_data is None:
+                logger.warning(
+                    "File %s has been modified, base for merging not available,"
+                    " skipping",
+                    item.project_fpath,
+                )
+                item.conflict = True
+                return None
+            try:
+                merged, conflicts = merge3(
+                    base_data.decode("utf-8"),
+                    project_data.decode("utf-8"),
+                    data.decode("utf-8"),
+                )
+            except UnicodeDecodeError:
+                logger.warning(
+                    "File %s has been modified and cannot be merged, skipping",
+                    item.project_fpath,
+                )
+                item.conflict = True
+                return None
+            if conflicts:
+                logger.warning(
+                    "File %s: %d merge conflict(s)", item.project_fpath, conflicts
+                )
+                item.conflict = True
+            else:
+                logger.debug("File %s has been merged", item.project_fpath)
+            data = merged.encode("utf-8")
+        unshare(item.project_fpath)
+        with open(item.project_fpath, "wb") as project_fh:
+            project_fh.write(data)
+        item.size = len(data)
+        return output_hash
+
+    def __copy_file(
+        self, item: InstallFile, size: int, output_hash: str | None
+    ) -> str | None:
+        """Copy a static template file to the project or to the archive
+        (skips decoding, rendering and encoding)
+
+        Params:
+            item: InstallFile object specifying the template file and the
+                target file
+            size: Integer with the number of bytes to copy (see
+                TemplateSource.static_size)
+            output_hash: String with the hash of the copied content
+        Returns: String with the hash of the copied content
+        """
+        logger = logging.getLogger("DevOpsTemplate.__copy_file")
+        if item.exists and file_digest(item.project_fpath) == output_hash:
+            logger.debug("File %s is unchanged", item.project_fpath)
+            return output_hash
+        if item.exists and self.__archive is None:
+            unshare(item.project_fpath)
+        pkg_fpath = os.path.join(self.__template_dname, item.pkg_fname)
+        with pkg.stream(pkg_fpath) as pkg_fh:
+            if self.__archive is not None:
+                self.__archive.write(
+                    self.__arcname(item.project_fpath), [pkg_fh.read(size)]
+                )
+            elif not (
+                self.__link_static is not None
+                and output_hash is not None
+                and self.__link_file(
+                    item, pkg_fh, size, output_hash, self.__link_static
+                )
+            ):
+                if item.store_base and output_hash is not None:
+                    self.__store_object(pkg_fh, size, output_hash)
+                copy_file(pkg_fh, item.project_fpath, size)
+        item.size = size
+        return output_hash
+
+    def __link_file(
+        self,
+        item: InstallFile,
+        pkg_fh: BinaryIO,
+        size: int,
+        output_hash: str,
+        mode: str,
+    ) -> bool:
+        """Link a static template file to its copy in the object store (the
+        object is added if not present)
+
+        Params:
+            item: InstallFile object specifying the target file
+            pkg_fh: Binary file object of the template file (positioned at the
+                beginning, the position is restored)
+            size: Integer with the size of the static content
+            output_hash: String with the hash of the static content
+            mode: String with the link mode (see static.LINK_MODES)
+        Returns: True if the file has been linked, False if the file has to be
+            copied
+        """
+        logger = logging.getLogger("DevOpsTemplate.__link_file")
+        try:
+            object_fpath = self.__objects.add(output_hash, pkg_fh, size)
+        except OSError as err:
+            logger.debug("Could not store object %s: %s", output_hash, err)
+            pkg_fh.seek(0)
+            return False
+        if link_file(object_fpath, item.project_fpath, mode):
+            return True
+        logger.debug("Could not %s %s, file is copied", mode, item.project_fpath)
+        pkg_fh.seek(0)
+        return False
+
+    def __store_object(self, pkg_fh: BinaryIO, size: int, output_hash: str) -> None:
+        """Store an installed output in the object store (base for merging
+        future template changes, see __upgrade_file)
+
+        Params:
+            pkg_fh: Binary file object of the static template file or of the
+                rendered output (positioned at the beginning, the position is
+                restored)
+            size: Integer with the size of the output
+            output_hash: String with the hash of the output
+        """
+        logger = logging.getLogger("DevOpsTemplate.__store_object")
+        try:
+            self.__objects.add(output_hash, pkg_fh, size)
+        except OSError as err:
+            logger.debug("Could not store object %s: %s", output_hash, err)
+        pkg_fh.seek(0)
+
+    def __write_text(self, project_fpath: str, text: str) -> None:
+        """Write a text file to the project or to the archive (unless in
+        dry-run mode)
+
+        Params:
+            project_fpath: String specifying the path to the target file
+            text: String with the content of the file
+        """
+        if self.__dry_run:
             return
-        if not self.__dry_run:
-            # Create parent directories if not present
-            parent_dname = os.path.dirname(project_fpath)
-            if not os.path.exists(parent_dname):
-                os.makedirs(parent_dname)
-            # Load and instantiate template
-            template = self.__env.get_template(pkg_fname)
-            with open(project_fpath, "wb") as project_fh:
-                template.stream(**context).dump(project_fh, encoding="utf-8")
-        logger.info("template:%s  ->  project:%s", pkg_fname, project_fpath)
+        if self.__archive is not None:
+            self.__archive.write(self.__arcname(project_fpath), [text.encode("utf-8")])
+            return
+        with open(project_fpath, "w", encoding="utf-8") as handle:
+            handle.write(text)
+
+    def __arcname(self, project_fpath: str) -> str:
+        """Obtain the path of a project file in the archive
+
+        Returns: String with the path relative to the parent of the project
+            directory (separated by "/")
+        """
+        root_dpath = os.path.abspath(self.__archive_root)
+        relpath = os.path.relpath(os.path.abspath(project_fpath), root_dpath)
+        arcname = os.path.join(os.path.basename(root_dpath), relpath)
+        return arcname.replace(os.sep, "/")
+
+    def __exists(self, project_fpath: str) -> bool:
+        """Check whether a project file exists (never for archives)"""
+        return self.__archive is None and os.path.exists(project_fpath)
 
-    def __check_project_file(self, project_fpath: str) -> bool:
+    def __check_project_file(
+        self, project_fpath: str, exists: bool | None = None
+    ) -> bool:
         """Check whether the given file can be created in the project without
         conflict. A conflict arises if the file exists and should not be
         skipped or overwritten.
@@ -263,15 +1734,19 @@ class DevOpsTemplate:
         Params:
             project_fpath: String specifying the path to the file in the
                 project.
+            exists: Boolean specifying whether the file exists, if known
+                already. (optional)
         Returns: True if the file can be created without conflict.
         Raises:
             SkipFileError: if the creation of the new file should be skipped.
             FileExistsError: if the file that should be created already exists
                 and should not be overwritten.
         """
-        if os.path.exists(project_fpath) and self.__skip:
+        if exists is None:
+            exists = os.path.exists(project_fpath)
+        if exists and self.__skip:
             raise SkipFileError(f"File {project_fpath} already exists, skip.")
-        if os.path.exists(project_fpath) and not self.__overwrite:
+        if exists and not self.__overwrite:
             raise FileExistsError(
                 f"File {project_fpath} already exists, exit."
                 " (use --skip-exists or --overwrite-exists"
@@ -1,3 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep caches of the tests out of the user's cache directory"""
+    cache_dname = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_dname))
+    return cache_dname
+
+
 def ref_file_head():
     ref_file_list = [
         "# --- Makefile Intro ---",
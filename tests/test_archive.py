@@ -0,0 +1,119 @@
+"""Check writing projects to archive streams
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from devopstemplate.archive import (
+    ArchiveWriter,
+    archive_format,
+    archive_writer,
+    open_archive,
+)
+from devopstemplate.config import (
+    ARGUMENTS_PROJECT_NAME_KEY,
+    ARGUMENTS_PROJECT_SLUG_KEY,
+)
+from devopstemplate.lock import LOCK_FNAME
+from devopstemplate.template import DevOpsTemplate
+
+
+class UnseekableStream(io.RawIOBase):
+    """Write-only stream that does not support seek/tell (like a pipe)"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        self.__components = ["src", "make", "docker"]
+
+    def __create(self, tmpdirname, archive):
+        project_dname = os.path.join(tmpdirname, "project")
+        template = DevOpsTemplate(projectdirectory=project_dname, archive=archive)
+        template.create(self.__context, self.__components)
+        # Nothing has been written to the project directory
+        self.assertFalse(os.path.exists(project_dname))
+
+    def test_archive_format(self):
+        self.assertEqual(archive_format("project.tar.gz"), "tar.gz")
+        self.assertEqual(archive_format("project.TGZ"), "tar.gz")
+        self.assertEqual(archive_format("project.zip"), "zip")
+        self.assertEqual(archive_format("project.tar"), "tar")
+        with self.assertRaises(ValueError):
+            archive_format("project.rar")
+        with self.assertRaises(ValueError):
+            archive_writer(io.BytesIO(), "rar")
+
+    def test_tar(self):
+        stream = UnseekableStream()
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            with archive_writer(stream, "tar.gz") as archive:
+                self.assertIsInstance(archive, ArchiveWriter)
+                self.__create(tmpdirname, archive)
+            reference_dname = os.path.join(tmpdirname, "reference", "project")
+            DevOpsTemplate(projectdirectory=reference_dname).create(
+                self.__context, self.__components
+            )
+            stream.buffer.seek(0)
+            with tarfile.open(fileobj=stream.buffer, mode="r:gz") as tar:
+                name_list = tar.getnames()
+                self.assertIn("project/Makefile", name_list)
+                self.assertIn("project/src/project/main.py", name_list)
+                self.assertIn(f"project/{LOCK_FNAME}", name_list)
+                with open(os.path.join(reference_dname, "Makefile"), "rb") as handle:
+                    self.assertEqual(
+                        tar.extractfile("project/Makefile").read(), handle.read()
+                    )
+
+    def test_zip(self):
+        stream = UnseekableStream()
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            with archive_writer(stream, "zip") as archive:
+                self.__create(tmpdirname, archive)
+        with zipfile.ZipFile(io.BytesIO(stream.buffer.getvalue())) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            lock_dict = json.loads(zip_file.read(f"project/{LOCK_FNAME}"))
+            self.assertEqual(lock_dict["context"], self.__context)
+            self.assertIn("Dockerfile", lock_dict["files"])
+            self.assertIn("project/Dockerfile", zip_file.namelist())
+
+    def test_open_archive(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            archive_fpath = os.path.join(tmpdirname, "project.zip")
+            with open_archive(archive_fpath) as archive:
+                archive.write("project/README.md", [b"# project", b"\n"])
+            with zipfile.ZipFile(archive_fpath) as zip_file:
+                self.assertEqual(zip_file.read("project/README.md"), b"# project\n")
+            # Incomplete archives are removed
+            archive_fpath = os.path.join(tmpdirname, "project.tar")
+            with self.assertRaises(RuntimeError):
+                with open_archive(archive_fpath) as archive:
+                    archive.write("project/README.md", [b"# project"])
+                    raise RuntimeError("failed")
+            self.assertFalse(os.path.exists(archive_fpath))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Check generating many projects in one process
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+from devopstemplate.batch import ProjectSpec, generate, generate_bulk
+from devopstemplate.config import (
+    ARGUMENTS_PROJECT_NAME_KEY,
+    ARGUMENTS_PROJECT_SLUG_KEY,
+)
+from devopstemplate.template import DevOpsTemplate
+
+
+class BatchTest(unittest.TestCase):
+
+    def test_generate(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            spec_list = []
+            for name in ("project1", "project2"):
+                context = {
+                    ARGUMENTS_PROJECT_NAME_KEY: name,
+                    ARGUMENTS_PROJECT_SLUG_KEY: name,
+                }
+                spec_list.append(
+                    ProjectSpec(
+                        os.path.join(tmpdirname, name), context, ["src", "make"]
+                    )
+                )
+            # Second project is generated even though the first one fails
+            os.makedirs(os.path.join(tmpdirname, "project1"))
+            open(os.path.join(tmpdirname, "project1", "Makefile"), "w").close()
+            result_list = list(generate(spec_list))
+
+            self.assertEqual([r.spec for r in result_list], spec_list)
+            self.assertFalse(result_list[0].ok)
+            self.assertIsInstance(result_list[0].error, FileExistsError)
+            self.assertTrue(result_list[1].ok)
+            self.assertTrue(all(r.seconds >= 0 for r in result_list))
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(tmpdirname, "project2", "src", "project2", "main.py")
+                )
+            )
+
+    def test_shared_environment(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template1 = DevOpsTemplate(os.path.join(tmpdirname, "project1"))
+            template2 = DevOpsTemplate(os.path.join(tmpdirname, "project2"))
+            self.assertIs(
+                template1._DevOpsTemplate__env, template2._DevOpsTemplate__env
+            )
+
+    def test_from_args(self):
+        args_ns = Namespace()
+        args_ns.project_dir = "project"
+        args_ns.add_gitignore = True
+        args_ns.add_sonar = False
+        args_ns.add_makefile = False
+        args_ns.add_meta = False
+        args_ns.add_setuptools = False
+        args_ns.add_docker = False
+        args_ns.add_mongo = False
+        args_ns.add_mlflow = False
+        args_ns.overwrite_exists = False
+        args_ns.skip_exists = False
+        args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+
+        spec = ProjectSpec.from_args(args_ns, "manage")
+        self.assertEqual(spec.project_dir, os.path.abspath("project"))
+        self.assertEqual(spec.context, {ARGUMENTS_PROJECT_NAME_KEY: "project"})
+        self.assertEqual(spec.components, ["git"])
+        self.assertEqual(spec.command, "manage")
+        with self.assertRaises(ValueError):
+            ProjectSpec("project", {}, [], "delete")
+
+    def test_generate_bulk(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            line_list = [
+                json.dumps({"project_dir": os.path.join(tmpdirname, "project1")}),
+                "",
+                json.dumps(
+                    {
+                        "project_dir": os.path.join(tmpdirname, "project-2"),
+                        "add-docker": True,
+                        "author_name": "full name",
+                    }
+                ),
+                json.dumps({"project_dir": "project3", "add_unknown": True}),
+                "[]",
+                json.dumps(
+                    {
+                        "project_dir": os.path.join(tmpdirname, "project6"),
+                        "add-docker": "false",
+                    }
+                ),
+            ]
+            status_list = list(generate_bulk(line_list, processes=2))
+            status_dict = {status["line"]: status for status in status_list}
+
+            self.assertEqual(sorted(status_dict), [1, 3, 4, 5, 6])
+            self.assertEqual(status_dict[1]["status"], "ok")
+            self.assertEqual(status_dict[3]["status"], "ok")
+            self.assertEqual(status_dict[4]["status"], "error")
+            self.assertEqual(status_dict[4]["project_dir"], "project3")
+            self.assertIn("add_unknown", status_dict[4]["error"])
+            self.assertEqual(status_dict[5]["status"], "error")
+            self.assertEqual(status_dict[6]["status"], "error")
+            self.assertIn("add_docker", status_dict[6]["error"])
+            self.assertFalse(os.path.exists(os.path.join(tmpdirname, "project6")))
+            project_dname = os.path.join(tmpdirname, "project-2")
+            self.assertTrue(os.path.exists(os.path.join(project_dname, "Dockerfile")))
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(project_dname, "src", "project_2", "__init__.py")
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Check caching compiled templates
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jinja2 import DictLoader, Environment
+
+import devopstemplate
+from devopstemplate.cache import TemplateBytecodeCache, cache_dir
+
+
+class TemplateBytecodeCacheTest(unittest.TestCase):
+
+    def test_cache_dir(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/cache"}):
+            self.assertEqual(cache_dir(), "/tmp/cache/devopstemplate")
+
+    def test_load(self):
+        loader = DictLoader({"file": "{{ value }}"})
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            env = Environment(
+                loader=loader, bytecode_cache=TemplateBytecodeCache(tmpdirname)
+            )
+            self.assertEqual(env.get_template("file").render(value=1), "1")
+            version_dname = os.path.join(tmpdirname, devopstemplate.__version__)
+            self.assertEqual(len(os.listdir(version_dname)), 1)
+            # Warm environment must not compile the template
+            env = Environment(
+                loader=loader, bytecode_cache=TemplateBytecodeCache(tmpdirname)
+            )
+            with patch.object(env, "compile") as compile_mock:
+                self.assertEqual(env.get_template("file").render(value=2), "2")
+                compile_mock.assert_not_called()
+
+    def test_evict(self):
+        loader = DictLoader({f"file{idx}": "{{ value }}" for idx in range(4)})
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            cache = TemplateBytecodeCache(tmpdirname)
+            env = Environment(loader=loader, bytecode_cache=cache)
+            env.get_template("file0")
+            version_dname = os.path.join(tmpdirname, devopstemplate.__version__)
+            entry_size = os.path.getsize(
+                os.path.join(version_dname, os.listdir(version_dname)[0])
+            )
+            cache = TemplateBytecodeCache(tmpdirname, max_size=2 * entry_size)
+            env = Environment(loader=loader, bytecode_cache=cache)
+            for idx in range(1, 4):
+                env.get_template(f"file{idx}")
+            self.assertEqual(len(os.listdir(version_dname)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,15 +5,22 @@ template/tests/test_*.py ( {{ }} syntax)
 or exclude these tests
 """
 
-import unittest
 import os
+import tempfile
+import unittest
 from argparse import Namespace
+from unittest.mock import patch
+
 from devopstemplate.config import (
-    ProjectConfig,
-    ARGUMENTS_PROJECT_NAME_KEY,
     ARGUMENTS_PACKAGE_NAME_KEY,
+    ARGUMENTS_PROJECT_NAME_KEY,
     ARGUMENTS_PROJECT_SLUG_KEY,
+    COMMANDS_CREATE_KEY,
+    COMMANDS_PARAMETERS_KEY,
+    CommandsConfig,
+    ProjectConfig,
 )
+from devopstemplate.lock import ProjectLock
 
 
 class ProjectConfigTest(unittest.TestCase):
@@ -41,6 +48,11 @@ class ProjectConfigTest(unittest.TestCase):
         args_ns.quiet = False
         args_ns.version = False
         args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
         args_ns.interactive = False
 
         params_ref = {
@@ -112,6 +124,11 @@ class ProjectConfigTest(unittest.TestCase):
         args_ns.quiet = False
         args_ns.version = False
         args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
 
         params_ref = {ARGUMENTS_PROJECT_NAME_KEY: os.path.basename(os.getcwd())}
         comps_ref = ["git", "sonar", "make"]
@@ -133,6 +150,76 @@ class ProjectConfigTest(unittest.TestCase):
         self.assertEqual(param_dict, params_ref)
         self.assertEqual(comp_list, comps_ref[:-2])
 
+    def test_diff(self):
+        """Check config representation for diff sub-command"""
+        args_ns = Namespace()
+        args_ns.package_name = None
+        args_ns.project_version = "0.1.0"
+        args_ns.project_url = ""
+        args_ns.project_description = ""
+        args_ns.author_name = "full name"
+        args_ns.author_email = "full.name@mail.com"
+        args_ns.add_gitignore = False
+        args_ns.add_sonar = True
+        args_ns.add_makefile = False
+        args_ns.add_meta = False
+        args_ns.add_setuptools = False
+        args_ns.add_docker = False
+        args_ns.add_mongo = False
+        args_ns.add_mlflow = False
+        args_ns.all = False
+        args_ns.overwrite_exists = False
+        args_ns.skip_exists = False
+        args_ns.verbose = False
+        args_ns.quiet = False
+        args_ns.version = False
+        args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            args_ns.project_dir = os.path.join(tmpdirname, "Test-Project")
+            os.mkdir(args_ns.project_dir)
+            # Without lock manifest: defaults of create
+            config = ProjectConfig(args_ns)
+            param_dict, comp_list = config.diff()
+            self.assertEqual(param_dict[ARGUMENTS_PROJECT_NAME_KEY], "Test-Project")
+            self.assertEqual(param_dict[ARGUMENTS_PROJECT_SLUG_KEY], "test_project")
+            self.assertEqual(param_dict["author_name"], "full name")
+            self.assertEqual(
+                comp_list,
+                ["src", "tests", "make", "setuptools", "readme", "meta", "git"]
+                + ["sonar", "make"],
+            )
+            # Configuration recorded in the lock manifest
+            project_lock = ProjectLock(args_ns.project_dir)
+            project_lock.update_config(
+                {ARGUMENTS_PROJECT_SLUG_KEY: "slug", "author_name": "other"},
+                ["src", "docker"],
+            )
+            project_lock.write()
+            config = ProjectConfig(args_ns)
+            param_dict, comp_list = config.diff()
+            self.assertEqual(param_dict[ARGUMENTS_PROJECT_NAME_KEY], "Test-Project")
+            self.assertEqual(param_dict[ARGUMENTS_PROJECT_SLUG_KEY], "slug")
+            self.assertEqual(param_dict["author_name"], "other")
+            self.assertEqual(comp_list, ["src", "docker", "sonar", "make"])
+            # Upgrade mode: configuration and components of the lock manifest
+            args_ns.upgrade = True
+            config = ProjectConfig(args_ns)
+            param_dict, comp_list = config.manage()
+            self.assertEqual(
+                param_dict,
+                {
+                    ARGUMENTS_PROJECT_NAME_KEY: "Test-Project",
+                    ARGUMENTS_PROJECT_SLUG_KEY: "slug",
+                    "author_name": "other",
+                },
+            )
+            self.assertEqual(comp_list, ["src", "docker", "sonar", "make"])
+
     def test_cookiecutter(self):
         args_ns = Namespace()
         args_ns.project_dir = "."
@@ -151,6 +238,11 @@ class ProjectConfigTest(unittest.TestCase):
         args_ns.quiet = False
         args_ns.version = False
         args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
         args_ns.interactive = False
 
         project_slug = "".join(
@@ -193,5 +285,39 @@ class ProjectConfigTest(unittest.TestCase):
         self.assertEqual(comp_list, comps_ref)
 
 
+class CommandsConfigTest(unittest.TestCase):
+    """Check loading command definitions"""
+
+    def test_cache(self):
+        with patch.object(CommandsConfig, "_CommandsConfig__commands_dict", {}):
+            param_list = CommandsConfig().values_dict(
+                COMMANDS_CREATE_KEY, COMMANDS_PARAMETERS_KEY
+            )
+            cache_dname = os.path.join(os.environ["XDG_CACHE_HOME"], "devopstemplate")
+            self.assertEqual(len(os.listdir(cache_dname)), 1)
+            # Definitions are loaded from the cache (without parsing)
+            CommandsConfig._CommandsConfig__commands_dict = {}
+            with patch("devopstemplate.pkg.string") as string_mock:
+                cached_list = CommandsConfig().values_dict(
+                    COMMANDS_CREATE_KEY, COMMANDS_PARAMETERS_KEY
+                )
+            string_mock.assert_not_called()
+            self.assertEqual(
+                [repr(param) for param in cached_list],
+                [repr(param) for param in param_list],
+            )
+            # Modified sources invalidate the cache
+            CommandsConfig._CommandsConfig__commands_dict = {}
+            with (
+                patch(
+                    "devopstemplate.config.CommandsConfig._CommandsConfig__source_key",
+                    return_value=("0.0.0", (1, 1)),
+                ),
+                patch("devopstemplate.pkg.string", return_value="{}") as string_mock,
+            ):
+                CommandsConfig()
+            string_mock.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()
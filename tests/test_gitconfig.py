@@ -0,0 +1,146 @@
+"""Check reading git config files without git
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from devopstemplate.config import CommandsConfig, GitDefault
+from devopstemplate.gitconfig import GitConfig, GitConfigError
+from devopstemplate.main import parse_args
+
+
+class GitConfigTest(unittest.TestCase):
+
+    def test_parse(self):
+        text = (
+            "# comment\n"
+            "[User]\n"
+            '\tName = "Full  Name" suffix  ; comment\n'
+            "\temail=mail@mail.com\n"
+            '[remote "Origin"]\n'
+            "  url = a\\\n"
+            'b \\"q\\" \\t\n'
+            "  bare\n"
+            "[section.Sub]\n"
+            "key = 1\n"
+        )
+        self.assertEqual(
+            GitConfig.parse(text),
+            [
+                ("user.name", "Full  Name suffix"),
+                ("user.email", "mail@mail.com"),
+                ("remote.Origin.url", 'ab "q" \t'),
+                ("remote.Origin.bare", "true"),
+                ("section.sub.key", "1"),
+            ],
+        )
+
+    def test_parse_errors(self):
+        # Line continuation with CRLF line endings
+        self.assertEqual(
+            GitConfig.parse("[user]\r\n\tname = a\\\r\nb\r\n"),
+            [("user.name", "ab")],
+        )
+        for text in ("[user\nname = a\n", "[user]\n!name = a\n", '[user]\nname = "a\n'):
+            with self.assertRaises(GitConfigError):
+                GitConfig.parse(text)
+
+    def test_get(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            global_fpath = os.path.join(tmpdirname, "gitconfig")
+            include_fpath = os.path.join(tmpdirname, "include")
+            repo_dname = os.path.join(tmpdirname, "repo")
+            os.makedirs(os.path.join(repo_dname, ".git"))
+            os.makedirs(os.path.join(repo_dname, "sub"))
+            with open(global_fpath, "w") as fh:
+                fh.write("[user]\n\tname = global\n[include]\n\tpath = include\n")
+            with open(include_fpath, "w") as fh:
+                fh.write("[user]\n\temail = include@mail.com\n")
+            env = {
+                "GIT_CONFIG_GLOBAL": global_fpath,
+                "GIT_CONFIG_NOSYSTEM": "1",
+            }
+            with patch.dict(os.environ, env):
+                os.environ.pop("GIT_DIR", None)
+                self.assertEqual(GitConfig.get("user.name", tmpdirname), "global")
+                self.assertEqual(
+                    GitConfig.get("User.Email", tmpdirname), "include@mail.com"
+                )
+                self.assertIsNone(GitConfig.get("user.signingkey", tmpdirname))
+                # Repository config overrides global config
+                with open(os.path.join(repo_dname, ".git", "config"), "w") as fh:
+                    fh.write("[user]\n\tname = repo\n")
+                cwd = os.path.join(repo_dname, "sub")
+                self.assertEqual(GitConfig.get("user.name", cwd), "repo")
+                # Modified files are read again
+                with open(global_fpath, "w") as fh:
+                    fh.write("[user]\n\tname = modified global\n")
+                self.assertEqual(
+                    GitConfig.get("user.name", tmpdirname), "modified global"
+                )
+
+    @unittest.skipUnless(shutil.which("git"), "git is not available")
+    def test_include_if(self):
+        """Check obtaining the git user with git for conditional includes"""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            global_fpath = os.path.join(tmpdirname, "gitconfig")
+            work_fpath = os.path.join(tmpdirname, "work")
+            repo_dname = os.path.join(tmpdirname, "repo")
+            os.makedirs(os.path.join(repo_dname, ".git"))
+            with open(global_fpath, "w") as fh:
+                fh.write(
+                    "[user]\n\tname = global\n\temail = global@mail.com\n"
+                    f'[includeIf "gitdir:{repo_dname}/"]\n\tpath = {work_fpath}\n'
+                )
+            with open(work_fpath, "w") as fh:
+                fh.write("[user]\n\temail = work@mail.com\n")
+            env = {
+                "GIT_CONFIG_GLOBAL": global_fpath,
+                "GIT_CONFIG_NOSYSTEM": "1",
+            }
+            cwd = os.getcwd()
+            with patch.dict(os.environ, env):
+                os.environ.pop("GIT_DIR", None)
+                with self.assertRaises(GitConfigError):
+                    GitConfig.get("user.email", repo_dname)
+                subprocess.run(
+                    ["git", "init", "-q", repo_dname], check=True, env=os.environ
+                )
+                os.chdir(repo_dname)
+                try:
+                    self.assertEqual(
+                        CommandsConfig.git_user(), ("global", "work@mail.com")
+                    )
+                finally:
+                    os.chdir(cwd)
+
+    def test_lazy_default(self):
+        with patch.object(
+            CommandsConfig, "git_user", return_value=("full name", "mail@mail.com")
+        ) as git_mock:
+            # Command definitions do not depend on the git config
+            CommandsConfig()
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                parse_args(["--version"])
+            git_mock.assert_not_called()
+            default = GitDefault("{{git_name}} <{{git_email}}>")
+            self.assertEqual(str(default), "full name <mail@mail.com>")
+            self.assertEqual(default, "full name <mail@mail.com>")
+            with redirect_stdout(stdout), self.assertRaises(SystemExit):
+                parse_args(["create", "--help"])
+            self.assertIn('(from git): "full name"', stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
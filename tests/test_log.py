@@ -0,0 +1,120 @@
+"""Check log message formats
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from logging.handlers import QueueHandler
+
+import devopstemplate
+from devopstemplate.config import (
+    ARGUMENTS_PROJECT_NAME_KEY,
+    ARGUMENTS_PROJECT_SLUG_KEY,
+)
+from devopstemplate.log import LOG_EVENT_KEY, JsonFormatter
+from devopstemplate.template import DevOpsTemplate
+
+
+class LogTest(unittest.TestCase):
+
+    def test_json(self):
+        logconfig = devopstemplate.LOGCONFIG
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        logconfig.add_handler(handler)
+        try:
+            logger = logging.getLogger("LogTest.test_json")
+            logconfig.json()
+            logconfig.debug()
+            self.assertTrue(logconfig.json_enabled())
+            logger.info("file %s", "a.txt", extra={LOG_EVENT_KEY: {"bytes": 3}})
+            logconfig.json(False)
+            logger.info("text")
+        finally:
+            logconfig.remove_handler(handler)
+            logconfig.json(False)
+            logconfig.info()
+        line_list = stream.getvalue().splitlines()
+        event_dict = json.loads(line_list[0])
+        self.assertEqual(event_dict["message"], "file a.txt")
+        self.assertEqual(event_dict["level"], "INFO")
+        self.assertEqual(event_dict["bytes"], 3)
+        self.assertTrue(line_list[1].endswith("text"))
+
+    def test_queue(self):
+        logconfig = devopstemplate.LOGCONFIG
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        logger = logging.getLogger("LogTest.test_queue")
+        logconfig.queue()
+        try:
+            logconfig.add_handler(handler)
+            self.assertTrue(logconfig.queue_enabled())
+            self.assertNotIn(handler, logging.getLogger().handlers)
+            thread_list = [
+                threading.Thread(target=logger.info, args=("thread %d", index))
+                for index in range(4)
+            ]
+            for thread in thread_list:
+                thread.start()
+            for thread in thread_list:
+                thread.join()
+            logconfig.flush()
+            self.assertEqual(
+                sorted(stream.getvalue().splitlines()),
+                [f"thread {index}" for index in range(4)],
+            )
+            logger.info("last")
+        finally:
+            logconfig.queue(False)
+            logconfig.remove_handler(handler)
+        # Queued records are written when the queue mode is disabled
+        self.assertTrue(stream.getvalue().endswith("last\n"))
+        self.assertFalse(logconfig.queue_enabled())
+        self.assertFalse(
+            any(isinstance(h, QueueHandler) for h in logging.getLogger().handlers)
+        )
+
+    def test_file_events(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            project_dname = os.path.join(tmpdirname, "project")
+            template = DevOpsTemplate(projectdirectory=project_dname)
+            with self.assertLogs() as log_cm:
+                template.create(context, ["make", "readme"])
+            event_list = [
+                json.loads(JsonFormatter().format(record))
+                for record in log_cm.records
+                if hasattr(record, LOG_EVENT_KEY)
+            ]
+            file_list = [event for event in event_list if event["event"] == "file"]
+            self.assertEqual(
+                sorted(event["template"] for event in file_list),
+                ["Makefile", "README.md"],
+            )
+            for event in file_list:
+                fpath = os.path.join(project_dname, event["template"])
+                self.assertEqual(event["path"], fpath)
+                self.assertEqual(event["bytes"], os.path.getsize(fpath))
+                self.assertGreater(event["render_seconds"], 0)
+            summary = event_list[-1]
+            self.assertEqual(summary["event"], "summary")
+            self.assertEqual(summary["files"], 2)
+            self.assertEqual(
+                summary["bytes"], sum(event["bytes"] for event in file_list)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,11 +5,23 @@ template/tests/test_*.py ( {{ }} syntax)
 or exclude these tests
 """
 
+import io
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
-from unittest.mock import patch
 from argparse import Namespace
-from devopstemplate.config import CommandsConfig
+from contextlib import redirect_stderr
+from unittest.mock import patch
+
 import devopstemplate.main
+from devopstemplate.config import CommandsConfig
+
+# Budget (microseconds) for the cumulative import time of devopstemplate.main
+IMPORT_BUDGET_US = 50000
+# Modules that must not be imported for --version, --help and argument errors
+IMPORT_FORBIDDEN = ("jinja2", "asyncio", "multiprocessing", "subprocess")
 
 
 class TestMain(unittest.TestCase):
@@ -39,10 +51,21 @@ class TestMain(unittest.TestCase):
         args_ns.overwrite_exists = False
         args_ns.skip_exists = False
         args_ns.verbose = False
+        args_ns.log_json = False
+        args_ns.log_async = False
         args_ns.quiet = False
         args_ns.version = False
         args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+        args_ns.profile = False
+        args_ns.profile_json = None
+        args_ns.profile_pstats = None
         args_ns.interactive = False
+        args_ns.upgradable = False
         args_ns.func = mock_create
 
         mock_create.assert_called_with(args_ns)
@@ -61,6 +84,7 @@ class TestMain(unittest.TestCase):
         devopstemplate.main.parse_args(arg_list)
         args_ns = Namespace()
         args_ns.project_dir = "."
+        args_ns.upgrade = False
         args_ns.add_gitignore = False
         args_ns.add_makefile = False
         args_ns.add_setuptools = False
@@ -72,9 +96,19 @@ class TestMain(unittest.TestCase):
         args_ns.overwrite_exists = False
         args_ns.skip_exists = False
         args_ns.verbose = False
+        args_ns.log_json = False
+        args_ns.log_async = False
         args_ns.quiet = False
         args_ns.version = False
         args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+        args_ns.profile = False
+        args_ns.profile_json = None
+        args_ns.profile_pstats = None
         args_ns.func = mock_manage
 
         mock_manage.assert_called_with(args_ns)
@@ -96,14 +130,187 @@ class TestMain(unittest.TestCase):
         args_ns.overwrite_exists = False
         args_ns.skip_exists = False
         args_ns.verbose = False
+        args_ns.log_json = False
+        args_ns.log_async = False
         args_ns.quiet = False
         args_ns.version = False
         args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+        args_ns.profile = False
+        args_ns.profile_json = None
+        args_ns.profile_pstats = None
         args_ns.interactive = False
         args_ns.func = mock_cookiecutter
 
         mock_cookiecutter.assert_called_with(args_ns)
 
+    @patch("devopstemplate.main.bulk")
+    def test_parse_bulk(self, mock_bulk):
+        """Check parsing (default) argument list for bulk sub-command"""
+        arg_list = ["--skip-exists", "bulk", "--processes", "2"]
+        devopstemplate.main.parse_args(arg_list)
+        args_ns = Namespace()
+        args_ns.spec_file = "-"
+        args_ns.processes = 2
+        args_ns.overwrite_exists = False
+        args_ns.skip_exists = True
+        args_ns.verbose = False
+        args_ns.log_json = False
+        args_ns.log_async = False
+        args_ns.quiet = False
+        args_ns.version = False
+        args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+        args_ns.profile = False
+        args_ns.profile_json = None
+        args_ns.profile_pstats = None
+        args_ns.func = mock_bulk
+
+        mock_bulk.assert_called_with(args_ns)
+        # Projects are not written to archives
+        mock_bulk.reset_mock()
+        for arg_list in (
+            ["--archive", "out.zip", "bulk"],
+            ["--archive-format", "zip", "bulk"],
+        ):
+            stderr = io.StringIO()
+            with redirect_stderr(stderr), self.assertRaises(SystemExit) as ctx:
+                devopstemplate.main.parse_args(arg_list)
+            self.assertEqual(ctx.exception.code, 2)
+            self.assertIn("not allowed with bulk", stderr.getvalue())
+        mock_bulk.assert_not_called()
+
+    @patch("devopstemplate.main.serve")
+    def test_parse_serve(self, mock_serve):
+        """Check parsing argument list for serve sub-command"""
+        arg_list = ["serve", "--socket", "test.sock"]
+        devopstemplate.main.parse_args(arg_list)
+        args_ns = Namespace()
+        args_ns.socket = "test.sock"
+        args_ns.overwrite_exists = False
+        args_ns.skip_exists = False
+        args_ns.verbose = False
+        args_ns.log_json = False
+        args_ns.log_async = False
+        args_ns.quiet = False
+        args_ns.version = False
+        args_ns.dry_run = False
+        args_ns.workers = 1
+        args_ns.no_cache = False
+        args_ns.archive = None
+        args_ns.archive_format = None
+        args_ns.link_static = None
+        args_ns.profile = False
+        args_ns.profile_json = None
+        args_ns.profile_pstats = None
+        args_ns.func = mock_serve
+
+        mock_serve.assert_called_with(args_ns)
+
+    @patch("devopstemplate.main.diff")
+    def test_parse_diff(self, mock_diff):
+        devopstemplate.main.parse_args(["diff", "--add-docker", "--all"])
+        args_ns = mock_diff.call_args.args[0]
+        self.assertEqual(args_ns.project_dir, ".")
+        self.assertTrue(args_ns.add_docker)
+        self.assertFalse(args_ns.add_sonar)
+        self.assertTrue(args_ns.all)
+        self.assertIsNone(args_ns.package_name)
+        self.assertEqual(args_ns.func, mock_diff)
+
+    @patch("devopstemplate.main.scan_projects")
+    def test_parse_scan(self, mock_scan):
+        devopstemplate.main.parse_args(["scan", "projects", "--processes", "2"])
+        args_ns = mock_scan.call_args.args[0]
+        self.assertEqual(args_ns.root, "projects")
+        self.assertEqual(args_ns.processes, 2)
+        self.assertFalse(args_ns.add_docker)
+        self.assertEqual(args_ns.func, mock_scan)
+        # Worker processes and threads must be positive integers
+        for arg_list in (
+            ["bulk", "--processes", "0"],
+            ["scan", "--processes", "x"],
+            ["--workers", "0", "create", "project"],
+            ["--workers", "-3", "create", "project"],
+        ):
+            with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                devopstemplate.main.parse_args(arg_list)
+
+    def test_create_manage(self):
+        """Check adding components to a created project (files that are up to
+        date according to the lock manifest are not in conflict)
+        """
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            project_dname = os.path.join(tmpdirname, "project")
+            makefile_fpath = os.path.join(project_dname, "Makefile")
+            devopstemplate.main.parse_args(["--no-cache", "create", project_dname])
+            mtime = os.stat(makefile_fpath).st_mtime_ns
+            manage_args = ["--no-cache", "manage", "--project_dir", project_dname]
+            for flag in ("--add-makefile", "--add-docker"):
+                devopstemplate.main.parse_args(manage_args + [flag])
+            self.assertEqual(os.stat(makefile_fpath).st_mtime_ns, mtime)
+            self.assertTrue(os.path.exists(os.path.join(project_dname, "Dockerfile")))
+            # Modified files are still in conflict
+            with open(makefile_fpath, "a", encoding="utf-8") as fh:
+                fh.write("# modified\n")
+            with self.assertRaises(FileExistsError):
+                devopstemplate.main.parse_args(manage_args + ["--add-makefile"])
+
+    def test_imports(self):
+        """Check that the fast paths neither import Jinja2 nor spawn processes
+        (python -X importtime, with an empty and with a filled cache)
+        """
+        src_dname = os.path.dirname(os.path.dirname(devopstemplate.__file__))
+        code = (
+            "import sys;from devopstemplate.main import main;"
+            "sys.argv=['devopstemplate']+sys.argv[1:];main()"
+        )
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            env = dict(os.environ)
+            env["PYTHONPATH"] = src_dname
+            env["XDG_CACHE_HOME"] = os.path.join(tmpdirname, "cache")
+            env["DEVOPSTEMPLATE_SOCKET"] = os.path.join(tmpdirname, "none.sock")
+            # Compile modified modules (bytecode) before measuring
+            subprocess.run(
+                [sys.executable, "-c", "import devopstemplate.main"],
+                env=env,
+                check=True,
+            )
+            for arg_list in (
+                ["--version"],
+                ["--version"],
+                ["--help"],
+                ["create"],
+                ["create", "--help"],
+            ):
+                result = subprocess.run(
+                    [sys.executable, "-X", "importtime", "-c", code] + arg_list,
+                    env=env,
+                    cwd=tmpdirname,
+                    capture_output=True,
+                    text=True,
+                )
+                # import time: self [us] | cumulative | imported package
+                import_dict = {}
+                for line in result.stderr.splitlines():
+                    if line.startswith("import time:") and "|" in line:
+                        _, cumulative, module = line.split("|")
+                        if cumulative.strip().isdigit():
+                            import_dict[module.strip()] = int(cumulative)
+                for module in import_dict:
+                    self.assertNotIn(module.split(".")[0], IMPORT_FORBIDDEN, arg_list)
+                self.assertLess(
+                    import_dict["devopstemplate.main"], IMPORT_BUDGET_US, arg_list
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,9 +4,10 @@ WARNING: use unittest framework, pytest conflicts with test templates:
 template/tests/test_*.py ( {{ }} syntax)
 or exclude these tests
 """
+import tempfile
 import unittest
 from itertools import chain
-import tempfile
+
 from devopstemplate.makefile import MakefileTemplate as MkTemplate
 
 
@@ -0,0 +1,42 @@
+"""Check three-way merges of template files
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import unittest
+
+from devopstemplate.merge import merge3
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_merge3(self):
+        base = "a\nb\nc\nd\n"
+        # Changes of one side are applied
+        self.assertEqual(merge3(base, base, "a\nB\nc\nd\n"), ("a\nB\nc\nd\n", 0))
+        self.assertEqual(merge3(base, "a\nc\nd\n", base), ("a\nc\nd\n", 0))
+        # Non-conflicting changes of both sides are combined
+        self.assertEqual(
+            merge3(base, "x\na\nb\nc\nd\n", "a\nb\nc\nD\ne\n"),
+            ("x\na\nb\nc\nD\ne\n", 0),
+        )
+        # Identical changes are no conflict
+        self.assertEqual(
+            merge3(base, "a\nX\nc\nd\n", "a\nX\nc\nd\n"), ("a\nX\nc\nd\n", 0)
+        )
+        self.assertEqual(merge3("", "", "new\n"), ("new\n", 0))
+
+    def test_conflict(self):
+        merged, conflicts = merge3("a\nb\n", "a\nX\n", "a\nY")
+        self.assertEqual(conflicts, 1)
+        self.assertEqual(
+            merged, "a\n<<<<<<< project\nX\n=======\nY\n>>>>>>> template\n"
+        )
+        _, conflicts = merge3("a\nb\nc\n", "A\nb\nX\n", "B\nb\nY\n")
+        self.assertEqual(conflicts, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Check building and loading the precompiled template pack
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jinja2 import PackageLoader, TemplateNotFound
+
+import devopstemplate.pkg as pkg
+from devopstemplate.config import TEMPLATES_FNAME
+from devopstemplate.pack import (
+    PACK_RESOURCES,
+    TemplatePack,
+    build,
+    environment,
+    main,
+)
+from devopstemplate.static import TemplateSource
+
+
+class TemplatePackTest(unittest.TestCase):
+
+    def test_build(self):
+        context = {"project_name": "project", "project_slug": "project"}
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            pack_fpath = os.path.join(tmpdirname, "template.pack")
+            count = build(pack_fpath)
+            template_pack = TemplatePack.read(pack_fpath)
+            self.assertIsNotNone(template_pack)
+            for resource_name in PACK_RESOURCES:
+                self.assertEqual(
+                    template_pack.resource(resource_name), pkg.string(resource_name)
+                )
+            self.assertIsNone(template_pack.resource("cookiecutter.json"))
+            # Compiled templates render like templates loaded from the package
+            pack_env = environment(template_pack.loader)
+            pkg_env = environment(PackageLoader("devopstemplate", "template"))
+            template_dict = json.loads(pkg.string(TEMPLATES_FNAME))
+            pkg_fname_set = {f for fl in template_dict.values() for f in fl}
+            self.assertEqual(count, len(pkg_fname_set))
+            self.assertEqual(pack_env.list_templates(), sorted(pkg_fname_set))
+            for pkg_fname in pkg_fname_set:
+                self.assertEqual(
+                    pack_env.get_template(pkg_fname).render(**context),
+                    pkg_env.get_template(pkg_fname).render(**context),
+                )
+                with pkg.stream(os.path.join("template", pkg_fname)) as fh:
+                    source = TemplateSource(fh.read())
+                self.assertEqual(vars(template_pack.sources[pkg_fname]), vars(source))
+            with self.assertRaises(TemplateNotFound):
+                pack_env.get_template("unknown")
+
+    def test_cold_start(self):
+        """Check that templates are loaded from the pack without reading the
+        template files in the package (new process, copy of the package)
+        """
+        code = (
+            "import json, os, sys\n"
+            "opened = []\n"
+            "sys.addaudithook(lambda event, args: event in "
+            "('open', 'os.scandir', 'os.listdir') and opened.append(str(args[0])))\n"
+            "import devopstemplate\n"
+            "from devopstemplate.template import DevOpsTemplate\n"
+            "DevOpsTemplate.preload(cache=False)\n"
+            "template = DevOpsTemplate(sys.argv[1], dry_run=True, cache=False)\n"
+            "template.create({'project_name': 'p', 'project_slug': 'p'}, "
+            "['src', 'make', 'docker'])\n"
+            "dname = os.path.join(os.path.dirname(devopstemplate.__file__), "
+            "'template', '')\n"
+            "print(json.dumps([f for f in opened if f.startswith(dname)]))\n"
+        )
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            src_dname = os.path.dirname(os.path.dirname(pkg.__file__))
+            package_dname = os.path.join(tmpdirname, "devopstemplate")
+            shutil.copytree(
+                os.path.join(src_dname, "devopstemplate"),
+                package_dname,
+                ignore=shutil.ignore_patterns("__pycache__", "*.pack"),
+            )
+            build(os.path.join(package_dname, "template.pack"))
+            env = dict(os.environ)
+            env["PYTHONPATH"] = tmpdirname
+            result = subprocess.run(
+                [sys.executable, "-c", code, os.path.join(tmpdirname, "project")],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        self.assertEqual(json.loads(result.stdout), [])
+
+    def test_read(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            pack_fpath = os.path.join(tmpdirname, "template.pack")
+            self.assertIsNone(TemplatePack.read(pack_fpath))
+            out = io.StringIO()
+            main([pack_fpath], out=out.write)
+            self.assertIn(pack_fpath, out.getvalue())
+            # Packs of other versions are not used
+            with patch("devopstemplate.pack.__version__", "0.0.0"):
+                self.assertIsNone(TemplatePack.read(pack_fpath))
+            with open(pack_fpath, "r+b") as fh:
+                fh.write(b"\x00\x00")
+            self.assertIsNone(TemplatePack.read(pack_fpath))
+            with open(pack_fpath, "wb") as fh:
+                fh.write(b"")
+            self.assertIsNone(TemplatePack.read(pack_fpath))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,11 +5,13 @@ template/tests/test_*.py ( {{ }} syntax)
 or exclude these tests
 """
 
-import unittest
-import os
-import json
 import itertools
+import json
+import os
+import unittest
+
 from conftest import ref_file_head
+
 import devopstemplate.pkg as pkg
 
 
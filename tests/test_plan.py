@@ -0,0 +1,62 @@
+"""Check resolving template components into install plans
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import json
+import unittest
+
+import devopstemplate.pkg as pkg
+from devopstemplate.config import DEPENDENCIES_FNAME, TEMPLATES_FNAME
+from devopstemplate.plan import InstallPlan
+
+
+class InstallPlanTest(unittest.TestCase):
+
+    def test_dependencies(self):
+        template_dict = json.loads(pkg.string(TEMPLATES_FNAME))
+        dependency_dict = json.loads(pkg.string(DEPENDENCIES_FNAME))
+        plan = InstallPlan(["sonar", "docker", "sonar"], template_dict, dependency_dict)
+        self.assertEqual(plan.components, ["make", "setuptools", "sonar", "docker"])
+        self.assertEqual(plan.dependencies, {"make", "setuptools"})
+        self.assertEqual(len(plan.levels), 2)
+        self.assertEqual(plan.levels[0], ["Makefile", "pyproject.toml"])
+        self.assertEqual(plan.optional, {"Makefile", "pyproject.toml"})
+        # Requested dependencies are not optional
+        plan = InstallPlan(["sonar", "make"], template_dict, dependency_dict)
+        self.assertEqual(plan.components, ["make", "sonar"])
+        self.assertEqual(plan.dependencies, set())
+        self.assertEqual(plan.optional, set())
+        # All dependencies refer to components
+        for component, dependency_list in dependency_dict.items():
+            self.assertIn(component, template_dict)
+            for dependency in dependency_list:
+                self.assertIn(dependency, template_dict)
+
+    def test_deduplicate(self):
+        template_dict = {
+            "a": ["README.md", "a.py"],
+            "b": ["README.md", "b.py"],
+            "c": ["c.py"],
+        }
+        plan = InstallPlan(["b", "a"], template_dict, {"b": ["c"]})
+        self.assertEqual(plan.levels, [["README.md", "a.py", "c.py"], ["b.py"]])
+        self.assertEqual(plan.optional, {"c.py"})
+        file_list = [fpath for level in plan.levels for fpath in level]
+        self.assertEqual(len(file_list), len(set(file_list)))
+
+    def test_errors(self):
+        template_dict = {"a": ["a.py"], "b": ["b.py"]}
+        with self.assertRaises(ValueError) as err_cm:
+            InstallPlan(["a"], template_dict, {"a": ["b"], "b": ["a"]})
+        self.assertIn("a -> b -> a", str(err_cm.exception))
+        with self.assertRaises(ValueError):
+            InstallPlan(["c"], template_dict, {})
+        with self.assertRaises(ValueError):
+            InstallPlan(["a"], template_dict, {"a": ["c"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Check per-phase timing of commands (--profile)
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from devopstemplate.main import parse_args
+from devopstemplate.profiling import Profiler
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def tearDown(self):
+        Profiler.disable()
+
+    def test_report(self):
+        Profiler.record("ignored", 0.0, 1.0)
+        with Profiler.phase("ignored"):
+            pass
+        Profiler.enable(0.0)
+        Profiler.record("render", 1.0, 1.5, "a.txt")
+        Profiler.record("render", 2.0, 4.0, "b.txt")
+        with Profiler.phase("environment"):
+            pass
+        Profiler.disable()
+        Profiler.record("ignored", 0.0, 1.0)
+        report = Profiler.report()
+        phase_dict = {entry["phase"]: entry for entry in report["phases"]}
+
+        self.assertNotIn("ignored", phase_dict)
+        self.assertEqual(phase_dict["render"]["count"], 2)
+        self.assertAlmostEqual(phase_dict["render"]["seconds"], 2.5)
+        self.assertEqual(phase_dict["environment"]["count"], 1)
+        self.assertEqual(
+            [entry["file"] for entry in report["files"]], ["b.txt", "a.txt"]
+        )
+        table = Profiler.table(report)
+        self.assertIn("render", table)
+        self.assertIn("b.txt", table)
+
+    def test_profile_command(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            json_fpath = os.path.join(tmpdirname, "profile.json")
+            pstats_fpath = os.path.join(tmpdirname, "profile.pstats")
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                parse_args(
+                    [
+                        "--profile",
+                        "--profile-json",
+                        json_fpath,
+                        "--profile-pstats",
+                        pstats_fpath,
+                        "--dry-run",
+                        "create",
+                        os.path.join(tmpdirname, "project"),
+                    ]
+                )
+            self.assertFalse(Profiler.enabled())
+            with open(json_fpath, "r", encoding="utf-8") as fh:
+                report = json.load(fh)
+            phase_list = [entry["phase"] for entry in report["phases"]]
+            for phase in ("commands", "argparse", "config", "environment"):
+                self.assertIn(phase, phase_list)
+            self.assertIn("seconds", stderr.getvalue())
+            # Dry runs are not rendered
+            self.assertNotIn("render", phase_list)
+            self.assertGreater(pstats.Stats(pstats_fpath).total_calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
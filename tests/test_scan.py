@@ -0,0 +1,116 @@
+"""Check scanning many projects for drift from the template
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from devopstemplate.config import (
+    ARGUMENTS_PROJECT_NAME_KEY,
+    ARGUMENTS_PROJECT_SLUG_KEY,
+)
+from devopstemplate.scan import discover, scan, scan_project
+from devopstemplate.template import DevOpsTemplate
+
+
+class ScanTest(unittest.TestCase):
+
+    def create(self, project_dname, components, slug=None):
+        name = os.path.basename(project_dname)
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: name,
+            ARGUMENTS_PROJECT_SLUG_KEY: slug or name,
+        }
+        DevOpsTemplate(projectdirectory=project_dname).create(context, components)
+
+    def test_discover(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for dname in ("a/project1/sub", "b", "b/project2", ".hidden", "venv"):
+                os.makedirs(os.path.join(tmpdirname, dname))
+            fpath_list = [
+                "a/project1/.devopstemplate.lock",
+                "a/project1/sub/.devopstemplate.lock",
+                "b/project2/Makefile",
+                "b/project2/pyproject.toml",
+                "b/Makefile",
+                ".hidden/.devopstemplate.lock",
+                "venv/.devopstemplate.lock",
+            ]
+            for fpath in fpath_list:
+                open(os.path.join(tmpdirname, fpath), "w").close()
+            self.assertEqual(
+                list(discover(tmpdirname)),
+                [
+                    os.path.join(tmpdirname, "a", "project1"),
+                    os.path.join(tmpdirname, "b", "project2"),
+                ],
+            )
+            project_dname = os.path.join(tmpdirname, "a", "project1")
+            self.assertEqual(list(discover(project_dname)), [project_dname])
+
+    def test_scan(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for name in ("project1", "project2"):
+                self.create(os.path.join(tmpdirname, name), ["make", "readme"])
+            with open(os.path.join(tmpdirname, "project2", "README.md"), "a") as fh:
+                fh.write("local change\n")
+            os.makedirs(os.path.join(tmpdirname, "project3"))
+            for fname in ("Makefile", "pyproject.toml"):
+                open(os.path.join(tmpdirname, "project3", fname), "w").close()
+            status_list = list(scan(tmpdirname, processes=2))
+            status_dict = {
+                os.path.basename(status["project_dir"]): status
+                for status in status_list
+            }
+
+            self.assertEqual(sorted(status_dict), ["project1", "project2", "project3"])
+            self.assertEqual(status_dict["project1"]["status"], "ok")
+            self.assertEqual(status_dict["project1"]["unchanged"], 2)
+            self.assertEqual(status_dict["project2"]["status"], "drift")
+            self.assertEqual(status_dict["project2"]["changed"], ["README.md"])
+            # Projects without lock are compared with the create defaults
+            self.assertEqual(status_dict["project3"]["status"], "drift")
+            self.assertIn("Makefile", status_dict["project3"]["changed"])
+            self.assertTrue(status_dict["project3"]["missing"])
+            # Errors are reported per project
+            status = scan_project({}, os.path.join(tmpdirname, "missing"))
+            self.assertEqual(status["status"], "error")
+            self.assertIsNotNone(status["error"])
+
+    def test_render_once(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for name in ("project1", "project2"):
+                project_dname = os.path.join(tmpdirname, name)
+                self.create(project_dname, ["make", "readme"], slug="shared")
+                # Outdated lock manifest: files are compared by rendering
+                os.remove(os.path.join(project_dname, ".devopstemplate.lock"))
+            template = DevOpsTemplate(projectdirectory=tmpdirname, dry_run=True)
+            env = template._DevOpsTemplate__env
+            for name in ("project1", "project2"):
+                context = {
+                    ARGUMENTS_PROJECT_NAME_KEY: name,
+                    ARGUMENTS_PROJECT_SLUG_KEY: "shared",
+                }
+                with patch.object(
+                    env, "get_template", wraps=env.get_template
+                ) as get_mock:
+                    diff_list = template.diff(
+                        context, ["make", "readme"], os.path.join(tmpdirname, name)
+                    )
+                self.assertEqual(
+                    {diff_dict["status"] for diff_dict in diff_list}, {"unchanged"}
+                )
+                rendered = {call.args[0] for call in get_mock.call_args_list}
+                if name == "project2":
+                    # The Makefile only depends on the (shared) project slug
+                    self.assertNotIn("Makefile", rendered)
+                    self.assertIn("README.md", rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
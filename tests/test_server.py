@@ -0,0 +1,160 @@
+"""Check processing commands in a resident server
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+import devopstemplate
+from devopstemplate.main import parse_args
+from devopstemplate.server import (
+    SOCKET_ENV,
+    TemplateServer,
+    forward,
+    forwardable,
+    socket_path,
+)
+
+
+class TemplateServerTest(unittest.TestCase):
+
+    def test_socket_path(self):
+        with patch.dict(os.environ, {SOCKET_ENV: "/tmp/test.sock"}):
+            self.assertEqual(socket_path(), "/tmp/test.sock")
+        with patch.dict(os.environ, {SOCKET_ENV: "", "XDG_RUNTIME_DIR": "/run/1"}):
+            self.assertEqual(socket_path(), "/run/1/devopstemplate.sock")
+
+    def test_forwardable(self):
+        self.assertTrue(forwardable(["create", "project"]))
+        self.assertTrue(forwardable(["--archive", "project.zip", "create", "p"]))
+        self.assertFalse(forwardable(["create", "-i", "project"]))
+        self.assertFalse(forwardable(["create", "-hi", "project"]))
+        # Abbreviated options are rejected by the parser (not forwarded)
+        for arg_list in (
+            ["create", "--interact", "project"],
+            ["--profile-js=p.json", "create", "project"],
+            ["create", "--he"],
+        ):
+            with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as cm:
+                parse_args(arg_list)
+            self.assertEqual(cm.exception.code, 2)
+        self.assertFalse(forwardable(["bulk"]))
+        self.assertFalse(forwardable(["serve"]))
+        self.assertFalse(forwardable(["--help"]))
+        self.assertFalse(forwardable(["--archive", "-", "create", "project"]))
+        self.assertFalse(forwardable(["--profile", "create", "project"]))
+        self.assertFalse(forwardable(["--profile-json=p.json", "create", "p"]))
+
+    def test_forward(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "run", "test.sock")
+            # Server is not running
+            self.assertIsNone(forward(["manage"], path))
+            server = TemplateServer(path, parse_args)
+            threading.Thread(target=server.serve, daemon=True).start()
+            while not os.path.exists(path):
+                pass
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+            # Running server cannot be started twice
+            with self.assertRaises(RuntimeError):
+                TemplateServer(path, parse_args).serve()
+
+            # git user (defaults for create) outside of a repository
+            gitconfig_fpath = os.path.join(tmpdirname, "gitconfig")
+            with open(gitconfig_fpath, "w") as fh:
+                fh.write("[user]\n\tname = full name\n\temail = mail@mail.com\n")
+            cwd = os.getcwd()
+            os.chdir(tmpdirname)
+            try:
+                stdout = io.StringIO()
+                stderr = io.StringIO()
+                with (
+                    redirect_stdout(stdout),
+                    redirect_stderr(stderr),
+                    patch.dict(os.environ, {"GIT_CONFIG_GLOBAL": gitconfig_fpath}),
+                ):
+                    exit_code = forward(["create", "project"], path)
+                    self.assertEqual(exit_code, 0)
+                    # Errors are reported with exit code
+                    with open(os.path.join("project", "Makefile"), "a") as fh:
+                        fh.write("# modified")
+                    exit_code = forward(["create", "project"], path)
+                    self.assertEqual(exit_code, 1)
+                    exit_code = forward(["create", "--unknown", "project"], path)
+                    self.assertEqual(exit_code, 2)
+            finally:
+                os.chdir(cwd)
+            self.assertTrue(
+                os.path.exists(os.path.join(tmpdirname, "project", "Makefile"))
+            )
+            self.assertIn("project:", stderr.getvalue())
+            self.assertIn("FileExistsError", stderr.getvalue())
+            self.assertIn("unrecognized arguments", stderr.getvalue())
+
+    def test_forward_version(self):
+        """Check processing locally if the server runs a different version"""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "test.sock")
+            server_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server_sock.bind(path)
+            server_sock.listen()
+
+            def greet():
+                conn, _ = server_sock.accept()
+                with conn:
+                    conn.sendall(b'{"version": "0.0.0"}\n')
+                    # No request is sent by the client
+                    self.assertEqual(conn.recv(1), b"")
+
+            thread = threading.Thread(target=greet, daemon=True)
+            thread.start()
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                self.assertIsNone(forward(["create", "project"], path))
+            thread.join()
+            server_sock.close()
+            self.assertIn("version 0.0.0", stderr.getvalue())
+
+    def test_handle_environment(self):
+        """Check processing requests with the environment of the client"""
+        env_list = []
+
+        def process(args_list):
+            env_list.append(
+                (os.environ.get("GIT_CONFIG_GLOBAL"), os.environ.get("GIT_DIR"))
+            )
+
+        server = TemplateServer("unused.sock", process)
+        client_sock, server_sock = socket.socketpair()
+        with client_sock, server_sock, tempfile.TemporaryDirectory() as tmpdirname:
+            request = {
+                "argv": ["create", "project"],
+                "cwd": tmpdirname,
+                "env": {"GIT_CONFIG_GLOBAL": "/tmp/gitconfig", "GIT_DIR": None},
+            }
+            client_sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with patch.dict(os.environ, {"GIT_DIR": "server"}):
+                server.handle(server_sock)
+                self.assertEqual(os.environ["GIT_DIR"], "server")
+                server_env = os.environ.get("GIT_CONFIG_GLOBAL")
+            with client_sock.makefile("rb") as reader:
+                greeting = json.loads(reader.readline())
+                response = json.loads(reader.readline())
+        self.assertEqual(greeting["version"], devopstemplate.__version__)
+        self.assertEqual(response["exit"], 0)
+        self.assertEqual(env_list, [("/tmp/gitconfig", None)])
+        self.assertNotEqual(server_env, "/tmp/gitconfig")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+"""Check copying static template files
+
+WARNING: use unittest framework, pytest conflicts with test templates:
+template/tests/test_*.py ( {{ }} syntax)
+or exclude these tests
+"""
+
+import io
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jinja2 import Environment, PackageLoader, select_autoescape
+
+import devopstemplate.pkg as pkg
+from devopstemplate.cache import ObjectStore
+from devopstemplate.config import (
+    ARGUMENTS_PROJECT_NAME_KEY,
+    ARGUMENTS_PROJECT_SLUG_KEY,
+)
+from devopstemplate.lock import digest
+from devopstemplate.static import (
+    LINK_HARDLINK,
+    LINK_REFLINK,
+    TemplateSource,
+    copy_file,
+    is_static,
+    link_file,
+    unshare,
+)
+from devopstemplate.template import DevOpsTemplate
+
+
+class StaticTest(unittest.TestCase):
+
+    def test_is_static(self):
+        self.assertTrue(is_static(b"*.pyc\n"))
+        self.assertTrue(is_static(b""))
+        self.assertFalse(is_static(b"name: {{ project_name }}\n"))
+        self.assertFalse(is_static(b"{% if docker %}\n"))
+        self.assertFalse(is_static(b"{# comment #}"))
+        self.assertFalse(is_static(b"line\r\n"))
+        self.assertFalse(is_static(b"\xff\xfe"))
+        source = TemplateSource(b"*.pyc\n\n")
+        self.assertEqual(source.static_size, 6)
+        self.assertIsNone(TemplateSource(b"{{ name }}").static_size)
+
+    def test_render(self):
+        # Copying static files is equivalent to rendering them
+        env = Environment(
+            loader=PackageLoader("devopstemplate", "template"),
+            autoescape=select_autoescape(default=True),
+        )
+        with pkg.stream("template.json") as fh:
+            template_dict = json.load(fh)
+        static_count = 0
+        for pkg_fname in set(itertools.chain(*template_dict.values())):
+            with pkg.stream(os.path.join("template", pkg_fname)) as fh:
+                data = fh.read()
+            source = TemplateSource(data)
+            if source.static_size is None:
+                continue
+            static_count += 1
+            rendered = env.get_template(pkg_fname).render().encode("utf-8")
+            self.assertEqual(data[: source.static_size], rendered, pkg_fname)
+        self.assertGreater(static_count, 0)
+
+    def test_copy_file(self):
+        data = b"0123456789" * 1000
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            src_fpath = os.path.join(tmpdirname, "src")
+            dst_fpath = os.path.join(tmpdirname, "dst")
+            with open(src_fpath, "wb") as fh:
+                fh.write(data)
+            with open(src_fpath, "rb") as fh:
+                copy_file(fh, dst_fpath, len(data) - 1)
+            with open(dst_fpath, "rb") as fh:
+                self.assertEqual(fh.read(), data[:-1])
+            # Fallbacks if kernel copies are not supported
+            with patch("os.copy_file_range", side_effect=OSError(22, "invalid")):
+                with open(src_fpath, "rb") as fh:
+                    copy_file(fh, dst_fpath, 15)
+            with open(dst_fpath, "rb") as fh:
+                self.assertEqual(fh.read(), data[:15])
+            with patch("os.copy_file_range", side_effect=OSError(22, "invalid")):
+                with patch("os.sendfile", side_effect=OSError(22, "invalid")):
+                    with open(src_fpath, "rb") as fh:
+                        copy_file(fh, dst_fpath, 25)
+            with open(dst_fpath, "rb") as fh:
+                self.assertEqual(fh.read(), data[:25])
+            # File objects without file descriptor are copied in user space
+            copy_file(io.BytesIO(data), dst_fpath, 35)
+            with open(dst_fpath, "rb") as fh:
+                self.assertEqual(fh.read(), data[:35])
+
+    def test_template(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(projectdirectory=tmpdirname)
+            env = template._DevOpsTemplate__env
+            with patch.object(env, "get_template", wraps=env.get_template) as get_mock:
+                template.create(context, ["git", "docker"])
+            pkg_fname_list = [call.args[0] for call in get_mock.call_args_list]
+            self.assertNotIn(".gitignore", pkg_fname_list)
+            self.assertNotIn(".dockerignore", pkg_fname_list)
+            self.assertTrue(os.path.exists(os.path.join(tmpdirname, ".gitignore")))
+
+    def test_object_store(self):
+        data = b"*.pyc\n"
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            src_fpath = os.path.join(tmpdirname, "src")
+            with open(src_fpath, "wb") as fh:
+                fh.write(data)
+            objects = ObjectStore(os.path.join(tmpdirname, "objects"))
+            with open(src_fpath, "rb") as fh:
+                object_fpath = objects.add("abcd", fh, len(data))
+            self.assertEqual(object_fpath, objects.path("abcd"))
+            self.assertEqual(os.stat(object_fpath).st_mode & 0o777, 0o444)
+            with open(object_fpath, "rb") as fh:
+                self.assertEqual(fh.read(), data)
+            # Hardlinks share the object, existing files are replaced
+            # (hardlinks are not used for root)
+            dst_fpath = os.path.join(tmpdirname, "dst")
+            with open(dst_fpath, "wb") as fh:
+                fh.write(b"old")
+            with patch("os.geteuid", return_value=1000):
+                self.assertTrue(link_file(object_fpath, dst_fpath, LINK_HARDLINK))
+                self.assertTrue(os.path.samefile(object_fpath, dst_fpath))
+                self.assertTrue(link_file(object_fpath, dst_fpath, LINK_HARDLINK))
+            self.assertEqual(sorted(os.listdir(tmpdirname)), ["dst", "objects", "src"])
+            unshare(dst_fpath)
+            self.assertFalse(os.path.exists(dst_fpath))
+            with open(object_fpath, "rb") as fh:
+                self.assertEqual(fh.read(), data)
+            with patch("os.link", side_effect=OSError(18, "cross-device link")):
+                self.assertFalse(link_file(object_fpath, dst_fpath, LINK_HARDLINK))
+            with self.assertRaises(ValueError):
+                link_file(object_fpath, dst_fpath, "symlink")
+
+    def test_object_store_evict(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            objects = ObjectStore(tmpdirname, max_size=8)
+            data_list = [b"data", b"atad", b"taad"]
+            hash_list = [digest(data) for data in data_list]
+            for idx, data in enumerate(data_list):
+                object_fpath = objects.put(hash_list[idx], data)
+                os.utime(object_fpath, (idx, idx))
+            # Reading marks objects as recently used
+            self.assertEqual(objects.read(hash_list[0]), b"data")
+            objects.evict()
+            self.assertIsNone(objects.read(hash_list[1]))
+            self.assertEqual(objects.read(hash_list[0]), b"data")
+            self.assertEqual(objects.read(hash_list[2]), b"taad")
+
+    def test_object_store_verify(self):
+        data = b"*.pyc\n"
+        object_hash = digest(data)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            src_fpath = os.path.join(tmpdirname, "src")
+            with open(src_fpath, "wb") as fh:
+                fh.write(data)
+            objects = ObjectStore(os.path.join(tmpdirname, "objects"))
+            with open(src_fpath, "rb") as fh:
+                object_fpath = objects.add(object_hash, fh, len(data))
+            # Modified objects (same size) are neither read nor reused
+            os.chmod(object_fpath, 0o644)
+            with open(object_fpath, "wb") as fh:
+                fh.write(b"*.pyo\n")
+            self.assertIsNone(objects.read(object_hash))
+            with open(src_fpath, "rb") as fh:
+                objects.add(object_hash, fh, len(data))
+            self.assertEqual(objects.read(object_hash), data)
+            # Root is not restricted by read-only objects, no hardlinks
+            dst_fpath = os.path.join(tmpdirname, "dst")
+            with patch("os.geteuid", return_value=0):
+                link_file(object_fpath, dst_fpath, LINK_HARDLINK)
+            self.assertFalse(
+                os.path.exists(dst_fpath) and os.path.samefile(object_fpath, dst_fpath)
+            )
+
+    def test_link_static(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            with self.assertRaises(ValueError):
+                DevOpsTemplate(projectdirectory=tmpdirname, link_static="copy")
+            hard_dname = os.path.join(tmpdirname, "hardlink")
+            template = DevOpsTemplate(
+                projectdirectory=hard_dname, link_static=LINK_HARDLINK
+            )
+            with patch("os.geteuid", return_value=1000):
+                template.create(context, ["git", "readme"])
+            gitignore_fpath = os.path.join(hard_dname, ".gitignore")
+            self.assertGreater(os.stat(gitignore_fpath).st_nlink, 1)
+            self.assertEqual(os.stat(gitignore_fpath).st_mode & 0o777, 0o444)
+            # Rendered files are written normally
+            readme_fpath = os.path.join(hard_dname, "README.md")
+            self.assertEqual(os.stat(readme_fpath).st_nlink, 1)
+            with open(gitignore_fpath, "rb") as fh:
+                gitignore_data = fh.read()
+            # Reflinks fall back to copies if not supported
+            ref_dname = os.path.join(tmpdirname, "reflink")
+            template = DevOpsTemplate(
+                projectdirectory=ref_dname, link_static=LINK_REFLINK
+            )
+            template.create(context, ["git", "readme"])
+            with open(os.path.join(ref_dname, ".gitignore"), "rb") as fh:
+                self.assertEqual(fh.read(), gitignore_data)
+            self.assertEqual(os.stat(os.path.join(ref_dname, ".gitignore")).st_nlink, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
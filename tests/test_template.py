@@ -5,22 +5,28 @@ template/tests/test_*.py ( {{ }} syntax)
 or exclude these tests
 """
 
-import unittest
-import os
+import asyncio
 import itertools
-import tempfile
 import json
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
+
+from conftest import ref_file_head, ref_template_head
 from jinja2 import Template
-from conftest import ref_file_head
-from conftest import ref_template_head
+
 import devopstemplate.pkg as pkg
-from devopstemplate.template import DevOpsTemplate
 from devopstemplate.config import (
     ARGUMENTS_PROJECT_NAME_KEY,
     ARGUMENTS_PROJECT_SLUG_KEY,
     COOKIECUTTER_FNAME,
 )
+from devopstemplate.lock import LOCK_FNAME
+from devopstemplate.template import DevOpsTemplate, ProjectIndex
 
 
 class TestDevOpsTemplate(unittest.TestCase):
@@ -113,6 +119,86 @@ class TestDevOpsTemplate(unittest.TestCase):
                 "non_existing_file", None, context={}
             )
 
+    def test_render_replace(self):
+        """Check replacing existing files with rendered output (permissions
+        are kept, linked files are not modified, no temporary files remain)
+        """
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(
+                projectdirectory=tmpdirname, overwrite_exists=True
+            )
+            tmp_fpath = os.path.join(tmpdirname, "tmp_file")
+            link_fpath = os.path.join(tmpdirname, "link_file")
+            with open(tmp_fpath, "w") as fh:
+                fh.write("existing")
+            os.chmod(tmp_fpath, 0o750)
+            os.link(tmp_fpath, link_fpath)
+            template._DevOpsTemplate__install_files(
+                [[("Makefile", "tmp_file")]], {}, tmpdirname
+            )
+            with open(tmp_fpath, "r", encoding="utf-8") as fh:
+                content_list = fh.read().splitlines()
+            with open(link_fpath, "r", encoding="utf-8") as fh:
+                self.assertEqual(fh.read(), "existing")
+            self.assertEqual(os.stat(tmp_fpath).st_mode & 0o777, 0o750)
+            self.assertEqual(sorted(os.listdir(tmpdirname)), ["link_file", "tmp_file"])
+        self.assertEqual(
+            content_list[: len(self.__ref_template_index_head)],
+            self.__ref_template_index_head,
+        )
+
+    def test_duplicate_targets(self):
+        """Check installing several template files to a project file like
+        installing them one after the other (sequentially and in parallel)
+        """
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+            "project_version": "0.1.0",
+            "author_name": "full name",
+            "author_email": "full.name@mail.com",
+        }
+        level_list = [
+            [
+                ("Makefile", "target"),
+                ("entrypoint.sh", "other"),
+                ("Dockerfile", "target"),
+            ]
+        ]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+
+            def install(dname, file_list, **kwargs):
+                project_dname = os.path.join(tmpdirname, dname)
+                template = DevOpsTemplate(projectdirectory=project_dname, **kwargs)
+                template._DevOpsTemplate__install_files(
+                    [file_list], context, project_dname
+                )
+                with open(os.path.join(project_dname, "target"), "rb") as fh:
+                    return fh.read()
+
+            first_data = install("first", [("Makefile", "target")])
+            last_data = install("last", [("Dockerfile", "target")])
+            for workers in (1, 4):
+                # Files of previous template files are conflicts
+                with self.assertRaises(FileExistsError):
+                    install(f"error{workers}", level_list[0], workers=workers)
+                self.assertFalse(
+                    os.path.exists(os.path.join(tmpdirname, f"error{workers}", "other"))
+                )
+                data = install(
+                    f"skip{workers}", level_list[0], workers=workers, skip_exists=True
+                )
+                self.assertEqual(data, first_data, workers)
+                with self.assertLogs("DevOpsTemplate.__render") as log_cm:
+                    data = install(
+                        f"overwrite{workers}",
+                        level_list[0],
+                        workers=workers,
+                        overwrite_exists=True,
+                    )
+                self.assertEqual(data, last_data, workers)
+                self.assertEqual(len(log_cm.output), 3)
+
     def test_create(self):
 
         # Define test project
@@ -159,6 +245,321 @@ class TestDevOpsTemplate(unittest.TestCase):
                 fpath = os.path.join(tmpdirname, fpath)
                 self.assertTrue(os.path.exists(fpath))
 
+    def test_create_parallel(self):
+
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+            "project_version": "0.1.0",
+            "author_name": "full name",
+            "author_email": "full.name@mail.com",
+        }
+        components = ["src", "tests", "make", "setuptools", "readme", "docker"]
+
+        def project_files(dirname):
+            file_dict = {}
+            for root, _, fname_list in os.walk(dirname):
+                for fname in fname_list:
+                    fpath = os.path.join(root, fname)
+                    with open(fpath, "rb") as fh:
+                        file_dict[os.path.relpath(fpath, dirname)] = fh.read()
+            return file_dict
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            seq_dname = os.path.join(tmpdirname, "sequential")
+            par_dname = os.path.join(tmpdirname, "parallel")
+            DevOpsTemplate(projectdirectory=seq_dname).create(context, components)
+            template = DevOpsTemplate(projectdirectory=par_dname, workers=4)
+            with self.assertLogs("DevOpsTemplate.__render") as log_cm:
+                template.create(context, components)
+            self.assertEqual(project_files(seq_dname), project_files(par_dname))
+            # Log output follows the order of the components
+            pkg_fname_list = [msg.split("  ->  ")[0] for msg in log_cm.output]
+            self.assertEqual(
+                pkg_fname_list[0],
+                "INFO:DevOpsTemplate.__render:"
+                "template:src/{{project_slug}}/__init__.py",
+            )
+            self.assertEqual(
+                pkg_fname_list[-1],
+                "INFO:DevOpsTemplate.__render:" "template:entrypoint.sh",
+            )
+            # Existing files are detected before any file is written
+            with open(os.path.join(par_dname, "README.md"), "a") as fh:
+                fh.write("modified")
+            with self.assertRaises(FileExistsError):
+                template.create(context, components)
+
+    def test_preflight(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(projectdirectory=tmpdirname)
+            Path(os.path.join(tmpdirname, "Makefile")).touch()
+            Path(os.path.join(tmpdirname, "README.md")).touch()
+            # All conflicts are reported before any file is written
+            with self.assertRaises(FileExistsError) as err_cm:
+                template.create(context, ["src", "make", "readme"])
+            self.assertIn("Makefile", str(err_cm.exception))
+            self.assertIn("README.md", str(err_cm.exception))
+            self.assertFalse(os.path.exists(os.path.join(tmpdirname, "src")))
+
+    def test_dependencies(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(projectdirectory=tmpdirname)
+            # Dependencies are installed if not present
+            dep_dname = os.path.join(tmpdirname, "dependency")
+            template.create(context, ["sonar"], dep_dname)
+            self.assertTrue(os.path.exists(os.path.join(dep_dname, "Makefile")))
+            # Existing files of dependencies are not a conflict
+            own_dname = os.path.join(tmpdirname, "own")
+            os.mkdir(own_dname)
+            with open(os.path.join(own_dname, "Makefile"), "w") as fh:
+                fh.write("# own Makefile\n")
+            template.create(context, ["sonar"], own_dname)
+            with open(os.path.join(own_dname, "Makefile")) as fh:
+                self.assertEqual(fh.read(), "# own Makefile\n")
+            self.assertTrue(os.path.exists(os.path.join(own_dname, ".sonartoken")))
+            # Requested components are checked for conflicts
+            with self.assertRaises(FileExistsError):
+                template.create(context, ["sonar", "make"], own_dname)
+            with self.assertRaises(ValueError):
+                template.create(context, ["unknown"], own_dname)
+
+    def test_diff(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        components = ["src", "make", "readme", "git"]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(projectdirectory=tmpdirname)
+            template.create(context, components)
+            # Up-to-date files are not rendered
+            env = template._DevOpsTemplate__env
+            with patch.object(env, "get_template", wraps=env.get_template) as get_mock:
+                diff_list = template.diff(context, components)
+            self.assertFalse(get_mock.called)
+            self.assertEqual({d["status"] for d in diff_list}, {"unchanged"})
+            self.assertIn(
+                {
+                    "status": "unchanged",
+                    "path": "src/project/main.py",
+                    "template": "src/{{project_slug}}/main.py",
+                },
+                diff_list,
+            )
+            with open(os.path.join(tmpdirname, "Makefile"), "a") as fh:
+                fh.write("# modified")
+            os.remove(os.path.join(tmpdirname, "README.md"))
+            # Static file with the same size
+            gitignore_fpath = os.path.join(tmpdirname, ".gitignore")
+            with open(gitignore_fpath, "r+b") as fh:
+                first = fh.read(1)
+                fh.seek(0)
+                fh.write(b"X" if first != b"X" else b"Y")
+            mtime_dict = {
+                path: os.stat(path).st_mtime_ns for path in Path(tmpdirname).rglob("*")
+            }
+            diff_dict = {
+                d["path"]: d["status"]
+                for d in template.diff(context, ["src", "make", "git", "docker"])
+            }
+            self.assertEqual(diff_dict["Makefile"], "changed")
+            self.assertEqual(diff_dict[".gitignore"], "changed")
+            self.assertEqual(diff_dict["Dockerfile"], "missing")
+            self.assertEqual(diff_dict["src/project/log.py"], "unchanged")
+            # Deleted files that are not part of the components are ignored
+            self.assertNotIn("README.md", diff_dict)
+            # Nothing has been written
+            self.assertEqual(
+                mtime_dict,
+                {
+                    path: os.stat(path).st_mtime_ns
+                    for path in Path(tmpdirname).rglob("*")
+                },
+            )
+            diff_dict = {
+                d["path"]: d["status"] for d in template.diff(context, ["make"])
+            }
+            self.assertEqual(diff_dict["src/project/log.py"], "added")
+            with self.assertRaises(FileNotFoundError):
+                template.diff(context, components, os.path.join(tmpdirname, "none"))
+
+    def test_output_cache(self):
+        """Least recently used outputs are dropped from the cache"""
+        template = DevOpsTemplate(projectdirectory=".", dry_run=True)
+        render_output = template._DevOpsTemplate__render_output
+        env = template._DevOpsTemplate__env
+        with (
+            patch("devopstemplate.template.OUTPUT_CACHE_SIZE", 2),
+            patch.object(
+                DevOpsTemplate, "_DevOpsTemplate__output_dict", OrderedDict()
+            ) as output_dict,
+        ):
+            for name in ("a", "b", "a", "c"):
+                render_output("README.md", {"project_name": name})
+            self.assertEqual(len(output_dict), 2)
+            with patch.object(env, "get_template", wraps=env.get_template) as get_mock:
+                render_output("README.md", {"project_name": "a"})
+                self.assertFalse(get_mock.called)
+                render_output("README.md", {"project_name": "b"})
+                self.assertTrue(get_mock.called)
+
+    def test_lock(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(projectdirectory=tmpdirname)
+            template.create(context, ["src", "make"])
+            with open(os.path.join(tmpdirname, LOCK_FNAME), "r") as fh:
+                lock_dict = json.load(fh)
+            self.assertEqual(lock_dict["context"], context)
+            self.assertEqual(lock_dict["components"], ["src", "make"])
+            self.assertIn("src/project/main.py", lock_dict["files"])
+            entry_dict = lock_dict["files"]["Makefile"]
+            self.assertEqual(
+                sorted(entry_dict),
+                ["context_hash", "output_hash", "template", "template_hash"],
+            )
+            makefile_fpath = os.path.join(tmpdirname, "Makefile")
+            main_fpath = os.path.join(tmpdirname, "src", "project", "main.py")
+            os.utime(makefile_fpath, ns=(0, 0))
+            os.utime(main_fpath, ns=(0, 0))
+            # Files that are up to date are neither rendered nor rewritten
+            with patch.object(
+                template._DevOpsTemplate__env, "get_template"
+            ) as get_mock:
+                template.manage(context, ["src", "make"])
+            get_mock.assert_not_called()
+            self.assertEqual(os.stat(makefile_fpath).st_mtime_ns, 0)
+            # Modified files are conflicts, identical output is not rewritten
+            with open(main_fpath, "a") as fh:
+                fh.write("# modified")
+            with self.assertRaises(FileExistsError):
+                template.manage(context, ["src", "make"])
+            template = DevOpsTemplate(
+                projectdirectory=tmpdirname, overwrite_exists=True
+            )
+            context["unused"] = "value"
+            template.manage(context, ["src", "make", "git"])
+            self.assertNotEqual(os.stat(main_fpath).st_mtime_ns, 0)
+            self.assertEqual(os.stat(makefile_fpath).st_mtime_ns, 0)
+            with open(os.path.join(tmpdirname, LOCK_FNAME), "r") as fh:
+                lock_dict = json.load(fh)
+            self.assertEqual(lock_dict["components"], ["src", "make", "git"])
+
+    def test_async(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        components = ["src", "tests", "make", "readme", "docker"]
+
+        def project_files(dirname):
+            file_dict = {}
+            for root, _, fname_list in os.walk(dirname):
+                for fname in fname_list:
+                    fpath = os.path.join(root, fname)
+                    with open(fpath, "rb") as fh:
+                        file_dict[os.path.relpath(fpath, dirname)] = fh.read()
+            return file_dict
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for action in ("create", "manage", "cookiecutter"):
+                sync_dname = os.path.join(tmpdirname, action, "sync")
+                async_dname = os.path.join(tmpdirname, action, "async")
+                template = DevOpsTemplate(projectdirectory=sync_dname)
+                getattr(template, action)(context, components)
+                template = DevOpsTemplate(projectdirectory=async_dname, workers=3)
+                asyncio.run(getattr(template, f"a{action}")(context, components))
+                self.assertEqual(project_files(sync_dname), project_files(async_dname))
+
+            # Cancellation stops the installation before the lock is written
+            cancel_dname = os.path.join(tmpdirname, "cancel")
+            template = DevOpsTemplate(projectdirectory=cancel_dname)
+            write_file = template._DevOpsTemplate__write_file
+
+            async def cancel_create():
+                task = asyncio.current_task()
+                loop = asyncio.get_running_loop()
+
+                def cancel_write_file(item, context):
+                    loop.call_soon_threadsafe(task.cancel)
+                    return write_file(item, context)
+
+                with patch.object(
+                    template, "_DevOpsTemplate__write_file", cancel_write_file
+                ):
+                    await template.acreate(context, components)
+
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(cancel_create())
+            self.assertFalse(os.path.exists(os.path.join(cancel_dname, LOCK_FNAME)))
+            self.assertLess(
+                len(project_files(cancel_dname)),
+                len(project_files(os.path.join(tmpdirname, "create", "sync"))),
+            )
+
+    def test_project_index(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            os.makedirs(os.path.join(tmpdirname, "src", "project"))
+            Path(os.path.join(tmpdirname, "src", "project", "main.py")).touch()
+            with patch("os.scandir", wraps=os.scandir) as scandir_mock:
+                index = ProjectIndex(tmpdirname)
+                self.assertTrue(
+                    index.exists(os.path.join(tmpdirname, "src", "project", "main.py"))
+                )
+                self.assertFalse(
+                    index.exists(os.path.join(tmpdirname, "src", "project", "log.py"))
+                )
+                self.assertTrue(index.exists(os.path.join(tmpdirname, "src")))
+                # Missing directories are not listed
+                self.assertFalse(
+                    index.exists(os.path.join(tmpdirname, "tests", "a", "test.py"))
+                )
+                self.assertEqual(scandir_mock.call_count, 3)
+            dname_list = index.add(os.path.join(tmpdirname, "tests", "a", "test.py"))
+            self.assertEqual(
+                dname_list,
+                [
+                    os.path.join(tmpdirname, "tests"),
+                    os.path.join(tmpdirname, "tests", "a"),
+                ],
+            )
+            self.assertTrue(
+                index.exists(os.path.join(tmpdirname, "tests", "a", "test.py"))
+            )
+            self.assertEqual(
+                index.add(os.path.join(tmpdirname, "tests", "test.py")), []
+            )
+
+    def test_render_path(self):
+        context = {ARGUMENTS_PROJECT_SLUG_KEY: "project"}
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(projectdirectory=tmpdirname)
+            # File paths are compiled once per process
+            with patch("devopstemplate.template.Template") as template_mock:
+                render_path = template._DevOpsTemplate__render_path
+                self.assertEqual(render_path("Makefile", context), "Makefile")
+                self.assertEqual(
+                    render_path("src/{{project_slug}}/main.py", context),
+                    "src/project/main.py",
+                )
+                template.manage(context, ["src"])
+                template_mock.assert_not_called()
+            self.assertTrue(
+                os.path.exists(os.path.join(tmpdirname, "src", "project", "log.py"))
+            )
+
     def test_manage(self):
 
         # Define test project
@@ -266,6 +667,55 @@ class TestDevOpsTemplate(unittest.TestCase):
             # tmp directory
             self.assertEqual(template._DevOpsTemplate__project_dir, tmpdirname)
 
+    def test_cookiecutter_concurrent(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+        }
+        components = ["src", "tests", "make", "readme"]
+
+        def project_files(dirname):
+            file_dict = {}
+            for root, _, fname_list in os.walk(dirname):
+                for fname in fname_list:
+                    fpath = os.path.join(root, fname)
+                    with open(fpath, "rb") as fh:
+                        file_dict[os.path.relpath(fpath, dirname)] = fh.read()
+            return file_dict
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            ref_dname = os.path.join(tmpdirname, "reference")
+            DevOpsTemplate(projectdirectory=ref_dname).cookiecutter(context, components)
+            # One instance generates many cookiecutter templates and projects
+            # in parallel threads
+            base_dname = os.path.join(tmpdirname, "base")
+            template = DevOpsTemplate(projectdirectory=base_dname)
+            action_list = ["cookiecutter", "create"] * 4
+            dname_list = [
+                os.path.join(tmpdirname, f"{action}{i}")
+                for i, action in enumerate(action_list)
+            ]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                future_list = [
+                    executor.submit(
+                        getattr(template, action), context, components, dname
+                    )
+                    for action, dname in zip(action_list, dname_list)
+                ]
+                for future in future_list:
+                    future.result()
+            ref_file_dict = project_files(ref_dname)
+            for action, dname in zip(action_list, dname_list):
+                if action == "cookiecutter":
+                    self.assertEqual(project_files(dname), ref_file_dict)
+                else:
+                    self.assertTrue(os.path.exists(os.path.join(dname, "Makefile")))
+            # Errors do not affect the instance
+            with self.assertRaises(FileExistsError):
+                template.cookiecutter(context, components, dname_list[0])
+            template.create(context, ["make"])
+            self.assertTrue(os.path.exists(os.path.join(base_dname, "Makefile")))
+
 
 class Jinja2RenderTest(unittest.TestCase):
 
@@ -285,6 +735,92 @@ class Jinja2RenderTest(unittest.TestCase):
         text = Template("{{project_slug}}/__init__.py").render(**context)
         self.assertEqual(text, "{{cookiecutter.project_name}}/__init__.py")
 
+    def test_upgrade(self):
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+            "project_description": "old description",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            project_dname = os.path.join(tmpdirname, "project")
+            objects_dname = os.path.join(
+                os.environ["XDG_CACHE_HOME"], "devopstemplate", "objects"
+            )
+            # Outputs are only stored for upgradable projects
+            template = DevOpsTemplate(projectdirectory=project_dname + "-plain")
+            template.create(context, ["readme", "make"])
+            self.assertFalse(os.path.exists(objects_dname))
+            template = DevOpsTemplate(projectdirectory=project_dname, store_bases=True)
+            template.create(context, ["readme", "make"])
+            self.assertTrue(os.path.exists(objects_dname))
+            readme_fpath = os.path.join(project_dname, "README.md")
+            makefile_fpath = os.path.join(project_dname, "Makefile")
+            with open(readme_fpath, "w") as fh:
+                fh.write("# project (fork)\n\nold description")
+            with open(makefile_fpath, "a") as fh:
+                fh.write("# local target\n")
+            context["project_description"] = "new description"
+            # Modified files are conflicts without upgrade mode
+            with self.assertRaises(FileExistsError):
+                template.manage(context, ["readme", "make"])
+            template = DevOpsTemplate(projectdirectory=project_dname, upgrade=True)
+            self.assertEqual(template.manage(context, ["readme", "make"]), [])
+            with open(readme_fpath) as fh:
+                self.assertEqual(fh.read(), "# project (fork)\n\nnew description")
+            # Files with unchanged template output keep local changes
+            with open(makefile_fpath) as fh:
+                self.assertTrue(fh.read().endswith("# local target\n"))
+            # Conflicting changes are marked
+            with open(readme_fpath, "w") as fh:
+                fh.write("# project (fork)\n\nlocal description")
+            context["project_description"] = "newer description"
+            conflict_list = template.manage(context, ["readme"])
+            self.assertEqual(conflict_list, [readme_fpath])
+            with open(readme_fpath) as fh:
+                self.assertEqual(
+                    fh.read(),
+                    "# project (fork)\n\n<<<<<<< project\nlocal description\n"
+                    "=======\nnewer description\n>>>>>>> template\n",
+                )
+            # Modified files cannot be merged without base
+            with open(readme_fpath, "w") as fh:
+                fh.write("resolved")
+            context["project_description"] = "newest description"
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": tmpdirname + "-empty"}):
+                template = DevOpsTemplate(projectdirectory=project_dname, upgrade=True)
+                self.assertEqual(template.manage(context, ["readme"]), [readme_fpath])
+            with open(readme_fpath) as fh:
+                self.assertEqual(fh.read(), "resolved")
+
+    def test_upgrade_concurrent(self):
+        """Conflicts are reported per call (overlapping calls of an instance)"""
+        context = {
+            ARGUMENTS_PROJECT_NAME_KEY: "project",
+            ARGUMENTS_PROJECT_SLUG_KEY: "project",
+            "project_description": "old description",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            template = DevOpsTemplate(
+                projectdirectory=tmpdirname, upgrade=True, workers=2
+            )
+            dname_list = [os.path.join(tmpdirname, name) for name in "ab"]
+            for project_dname in dname_list:
+                template.create(context, ["readme"], project_dname)
+            readme_fpath = os.path.join(dname_list[0], "README.md")
+            with open(readme_fpath, "w") as fh:
+                fh.write("# project\n\nlocal description")
+            context["project_description"] = "new description"
+
+            async def manage_all():
+                return await asyncio.gather(
+                    *(
+                        template.amanage(context, ["readme"], project_dname)
+                        for project_dname in dname_list
+                    )
+                )
+
+            self.assertEqual(asyncio.run(manage_all()), [[readme_fpath], []])
+
 
 if __name__ == "__main__":
     unittest.main()